@@ -8,18 +8,78 @@ Description: Comprehensive tool for researching doctors and medical professional
 NOTE: Medical board URLs may occasionally change or be temporarily unavailable.
 If you encounter a broken link, please report it at:
 https://github.com/shadowdevnotreal/Doctor-Contact-Tool/issues
+In the meantime it can be corrected locally in ~/.doctordork_platforms.json,
+which is picked up by running sessions without a restart.
 """
 
 import os
 import sys
 import json
+import random
+import asyncio
 import csv
+import string
+import itertools
+import time
+import sqlite3
+import uuid
+import argparse
 import webbrowser
 import urllib.parse
+import urllib.request
+import urllib.error
+import ssl
+import threading
+import hashlib
+import socket
+import subprocess
+import gzip
+import math
+import io
+import html
+import queue
+import shutil
+import re
+import bisect
+import copy
+import heapq
+import marshal
+import mmap
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+# File locking is fcntl on POSIX and msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Optional export compressors; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Tab completion in the interactive prompts needs readline (absent on stock Windows Python)
+try:
+    import readline
+except ImportError:
+    readline = None
+
 # ANSI Color codes for cross-platform support
 class Colors:
     """ANSI color codes for terminal output"""
@@ -28,18 +88,2884 @@ class Colors:
     GREEN = '\033[92m'
     YELLOW = '\033[93m'
     BLUE = '\033[94m'
+    INFO = '\033[94m'
     MAGENTA = '\033[95m'
     CYAN = '\033[96m'
     WHITE = '\033[97m'
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+class Screen:
+    """Buffered terminal renderer for the interactive menus
+
+    A screen is a list of text regions (logo, menu, body) composed into one
+    buffer and written with a single call using ANSI cursor-home and erase
+    sequences, so no shell is spawned and nothing flickers. When the screen
+    still shows the previous frame (it was drawn together with a prompt and
+    fitted the terminal), leading regions that are unchanged are left in
+    place and only the rest is redrawn.
+
+    Screens that print their own body after the regions open a frame with
+    `begin`: until the frame is flushed (by `input()`, a progress line or the
+    next draw), everything printed goes to the same buffer, so the whole
+    screen still reaches the terminal in one write.
+    """
+
+    HOME = "\033[H"
+    ERASE_LINE = "\033[K"
+    ERASE_BELOW = "\033[J"
+
+    class Frame(io.TextIOBase):
+        """Stand-in for sys.stdout that holds writes until flushed"""
+
+        def __init__(self, stream):
+            super().__init__()
+            self.stream = stream
+            self.parts = []
+
+        def writable(self) -> bool:
+            return True
+
+        def write(self, text: str) -> int:
+            self.parts.append(text)
+            return len(text)
+
+        def flush(self):
+            if self.parts:
+                text, self.parts = "".join(self.parts), []
+                self.stream.write(text)
+            self.stream.flush()
+
+        def isatty(self) -> bool:
+            return self.stream.isatty()
+
+        def fileno(self) -> int:
+            return self.stream.fileno()
+
+        @property
+        def encoding(self):
+            return getattr(self.stream, "encoding", None)
+
+        @property
+        def errors(self):
+            return getattr(self.stream, "errors", None)
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.shown = []
+        self.intact = False
+        self.frame = None
+        self.saved = None
+
+    def begin(self, *regions: str):
+        """Draw `regions` into a new frame and buffer the screen's own prints behind them"""
+        self.end()
+        regions = [region for region in regions if region]
+        self.frame = self.Frame(self.stream)
+        self.frame.write(self.compose(regions))
+        self.shown = regions
+        # The caller prints freely below this frame, so its position is no longer known
+        self.intact = False
+        self.saved, sys.stdout = sys.stdout, self.frame
+
+    def end(self):
+        """Write out the open frame, if any, and give sys.stdout back"""
+        if self.frame is None:
+            return
+        self.frame.flush()
+        if sys.stdout is self.frame:
+            sys.stdout = self.saved
+        self.frame = self.saved = None
+
+    def compose(self, regions: List[str], keep: int = 0) -> str:
+        """Escape sequences and text that paint `regions`, leaving the first `keep` in place"""
+        tty = self.stream.isatty()
+        if not tty:
+            out = ""
+        elif keep:
+            row = sum(region.count("\n") for region in regions[:keep])
+            out = f"\033[{row + 1};1H"
+        else:
+            out = self.HOME
+        body = "".join(regions[keep:])
+        if tty:
+            body = body.replace("\n", self.ERASE_LINE + "\n") + self.ERASE_BELOW
+        return out + body
+
+    def draw(self, *regions: str, prompt: Optional[str] = None) -> Optional[str]:
+        """Draw `regions` in one write; with `prompt`, also show it and return the line typed"""
+        self.end()
+        regions = [region for region in regions if region]
+        tty = self.stream.isatty()
+        keep = 0
+        if self.intact:
+            while keep < min(len(regions), len(self.shown)) and regions[keep] == self.shown[keep]:
+                keep += 1
+        self.stream.write(self.compose(regions, keep) + (prompt or ""))
+        self.stream.flush()
+        self.shown = regions
+        if prompt is None:
+            # The caller prints freely below this frame, so its position is no longer known
+            self.intact = False
+            return None
+        rows = sum(region.count("\n") for region in regions) + prompt.count("\n") + 1
+        self.intact = tty and rows < shutil.get_terminal_size().lines
+        return input()
+
+    def invalidate(self):
+        """Force the next draw to repaint every region"""
+        self.intact = False
+
+
+class ResultStore:
+    """Durable SQLite checkpoint store for batch runs
+
+    Every row of a batch is written to the store when the run is created and
+    its generated links are filled in as the row completes, so an interrupted
+    run can be resumed by run ID and partial output can be read while the
+    run is still going (the database is opened in WAL mode).
+    """
+
+    # Claims of a distributed-run chunk before it is given up on
+    MAX_CHUNK_ATTEMPTS = 3
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created TEXT NOT NULL,
+                source TEXT,
+                total INTEGER NOT NULL,
+                status TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                run_id TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                doctor_info TEXT NOT NULL,
+                results TEXT,
+                completed TEXT,
+                PRIMARY KEY (run_id, row_index)
+            );
+        """)
+        # Columns added for incremental runs; older stores are upgraded in place
+        for table, column in (("runs", "version TEXT"), ("runs", "base_run TEXT"), ("runs", "enrich TEXT"),
+                              ("rows", "fingerprint TEXT"), ("rows", "origin TEXT")):
+            existing = {info[1] for info in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column.split()[0] not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS rows_fingerprint ON rows (run_id, fingerprint)")
+        # Work queue for distributed runs: row ranges claimed by workers under a time-limited lease
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                run_id TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                start_row INTEGER NOT NULL,
+                end_row INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                lease TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (run_id, chunk_id)
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        self.conn.close()
+
+    @staticmethod
+    def fingerprint(doctor_info: Dict, version: str) -> str:
+        """Hash of a row's input and the link-table version it is generated against"""
+        data = json.dumps(doctor_info, sort_keys=True) + "|" + version
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def create_run(self, doctors: List[Dict], source: str = "", run_id: Optional[str] = None,
+                   version: str = "", enrich: tuple = ()) -> str:
+        """Register a new run and all of its input rows, fingerprinted against `version`"""
+        if not run_id:
+            run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, created, source, total, status, version, enrich) "
+                "VALUES (?, ?, ?, 0, 'running', ?, ?)",
+                (run_id, datetime.now().isoformat(), source, version, json.dumps(list(enrich)))
+            )
+            total = 0
+            for chunk in _chunked(enumerate(doctors), 5000):
+                self.conn.executemany(
+                    "INSERT INTO rows (run_id, row_index, doctor_info, fingerprint) VALUES (?, ?, ?, ?)",
+                    [(run_id, i, json.dumps(info), self.fingerprint(info, version)) for i, info in chunk]
+                )
+                total += len(chunk)
+            self.conn.execute("UPDATE runs SET total = ? WHERE run_id = ?", (total, run_id))
+        return run_id
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        """Return run metadata with its completed row count, or None"""
+        row = self.conn.execute(
+            "SELECT run_id, created, source, total, status, enrich, version FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if not row:
+            return None
+        done = self.conn.execute(
+            "SELECT COUNT(*) FROM rows WHERE run_id = ? AND completed IS NOT NULL", (run_id,)
+        ).fetchone()[0]
+        return {"run_id": row[0], "created": row[1], "source": row[2], "total": row[3], "status": row[4],
+                "completed": done, "enrich": tuple(json.loads(row[5])) if row[5] else (), "version": row[6] or ""}
+
+    def latest_run(self, source: str, exclude: str = "") -> Optional[str]:
+        """ID of the newest completed run of the same source, to reuse unchanged rows from"""
+        row = self.conn.execute(
+            "SELECT run_id FROM runs WHERE source = ? AND status = 'complete' AND run_id != ? "
+            "ORDER BY created DESC LIMIT 1", (source, exclude)
+        ).fetchone()
+        return row[0] if row else None
+
+    def reuse(self, run_id: str, base_run: str) -> int:
+        """Complete pending rows whose fingerprint matches a row of `base_run`; returns rows reused
+
+        Reused rows don't copy results; `origin` points at the run that holds
+        them (following the base run's own origin for rows it reused).
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE rows SET completed = ?, origin = ("
+                "  SELECT COALESCE(b.origin, b.run_id) FROM rows b WHERE b.run_id = ?"
+                "  AND b.fingerprint = rows.fingerprint AND b.completed IS NOT NULL LIMIT 1) "
+                "WHERE run_id = ? AND completed IS NULL AND fingerprint IN ("
+                "  SELECT fingerprint FROM rows WHERE run_id = ? AND completed IS NOT NULL)",
+                (datetime.now().isoformat(), base_run, run_id, base_run)
+            )
+            self.conn.execute("UPDATE runs SET base_run = ? WHERE run_id = ?", (base_run, run_id))
+        return cursor.rowcount
+
+    def list_runs(self) -> List[Dict]:
+        """Return metadata for every run, newest first"""
+        ids = [r[0] for r in self.conn.execute("SELECT run_id FROM runs ORDER BY created DESC")]
+        return [self.get_run(run_id) for run_id in ids]
+
+    def pending_rows(self, run_id: str, start: int = 0, end: Optional[int] = None):
+        """Yield (row_index, doctor_info) for rows that have not completed yet, optionally in [start, end)"""
+        cursor = self.conn.execute(
+            "SELECT row_index, doctor_info FROM rows WHERE run_id = ? AND completed IS NULL "
+            "AND row_index >= ? AND row_index < ? ORDER BY row_index",
+            (run_id, start, end if end is not None else 2 ** 62)
+        )
+        for row_index, info in cursor.fetchall():
+            yield row_index, json.loads(info)
+
+    def record(self, run_id: str, completed: List[tuple]):
+        """Checkpoint a group of (row_index, results) pairs in one transaction"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE rows SET results = ?, completed = ? WHERE run_id = ? AND row_index = ?",
+                [(json.dumps(results), now, run_id, i) for i, results in completed]
+            )
+
+    def publish_chunks(self, run_id: str, size: int) -> int:
+        """Split a run's pending rows into queued chunks of `size` rows; returns the number queued"""
+        indexes = [i for (i,) in self.conn.execute(
+            "SELECT row_index FROM rows WHERE run_id = ? AND completed IS NULL ORDER BY row_index", (run_id,))]
+        chunks = [(run_id, n, chunk[0], chunk[-1] + 1, "pending") for n, chunk in enumerate(_chunked(indexes, size))]
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE run_id = ?", (run_id,))
+            self.conn.executemany(
+                "INSERT INTO chunks (run_id, chunk_id, start_row, end_row, status) VALUES (?, ?, ?, ?, ?)", chunks)
+            self.conn.execute("UPDATE runs SET status = 'queued' WHERE run_id = ?", (run_id,))
+        return len(chunks)
+
+    def claim_chunk(self, worker: str, lease_seconds: float, run_id: Optional[str] = None,
+                    exclude: tuple = ()) -> Optional[Dict]:
+        """Lease the next pending (or abandoned) chunk to `worker`, or None when there is nothing to claim
+
+        Runs listed in `exclude` are skipped.
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        exclude = tuple(exclude)
+        with self.conn:
+            self.conn.execute(
+                "UPDATE chunks SET status = 'leased', worker = ?, lease = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE rowid = (SELECT c.rowid FROM chunks c JOIN runs r ON r.run_id = c.run_id "
+                "  WHERE r.status IN ('queued', 'running') AND (? IS NULL OR c.run_id = ?) AND c.attempts < ? "
+                f"  AND c.run_id NOT IN ({', '.join('?' * len(exclude))}) "
+                "  AND (c.status = 'pending' OR (c.status = 'leased' AND c.lease_expires < ?)) "
+                "  ORDER BY r.created, c.chunk_id LIMIT 1)",
+                (worker, token, now + lease_seconds, run_id, run_id, self.MAX_CHUNK_ATTEMPTS) + exclude + (now,)
+            )
+        row = self.conn.execute(
+            "SELECT run_id, chunk_id, start_row, end_row, attempts FROM chunks WHERE lease = ?", (token,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"run_id": row[0], "chunk_id": row[1], "start": row[2], "end": row[3], "attempts": row[4],
+                "lease": token}
+
+    def renew_lease(self, chunk: Dict, lease_seconds: float) -> bool:
+        """Extend a chunk's lease; False if it expired and was claimed by another worker"""
+        with self.conn:
+            cursor = self.conn.execute("UPDATE chunks SET lease_expires = ? WHERE lease = ? AND status = 'leased'",
+                                       (time.time() + lease_seconds, chunk["lease"]))
+        return cursor.rowcount == 1
+
+    def release_chunk(self, chunk: Dict):
+        """Hand a claimed chunk back untouched, without counting the claim as an attempt"""
+        with self.conn:
+            self.conn.execute("UPDATE chunks SET status = 'pending', worker = NULL, lease_expires = NULL, "
+                              "attempts = attempts - 1 WHERE lease = ? AND status = 'leased'", (chunk["lease"],))
+
+    def finish_chunk(self, chunk: Dict, status: str = "done"):
+        """Mark a leased chunk done, or release it ("pending") for another worker to retry"""
+        with self.conn:
+            self.conn.execute("UPDATE chunks SET status = ?, lease_expires = NULL WHERE lease = ?",
+                              (status, chunk["lease"]))
+
+    def chunk_progress(self, run_id: str) -> Dict[str, int]:
+        """Chunk counts by status (pending, leased, done, failed) for a distributed run
+
+        Chunks that are out of attempts and no longer actively leased count as failed.
+        """
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        now = time.time()
+        for status, attempts, expires in self.conn.execute(
+                "SELECT status, attempts, lease_expires FROM chunks WHERE run_id = ?", (run_id,)):
+            exhausted = attempts >= self.MAX_CHUNK_ATTEMPTS and (status == "pending" or
+                                                                 (status == "leased" and expires < now))
+            counts["failed" if exhausted else status] += 1
+        return counts
+
+    def set_status(self, run_id: str, status: str):
+        """Update the status of a run (running, interrupted, complete)"""
+        with self.conn:
+            self.conn.execute("UPDATE runs SET status = ? WHERE run_id = ?", (status, run_id))
+
+    def iter_results(self, run_id: str, completed_only: bool = True, changed_only: bool = False):
+        """Yield (row_index, doctor_info, results) in row order
+
+        `changed_only` skips rows an incremental run reused from its base run.
+        """
+        query = ("SELECT r.row_index, r.doctor_info, COALESCE(r.results, ("
+                 "  SELECT o.results FROM rows o WHERE o.run_id = r.origin AND o.fingerprint = r.fingerprint"
+                 "  AND o.results IS NOT NULL LIMIT 1)) FROM rows r WHERE r.run_id = ?")
+        if completed_only:
+            query += " AND r.completed IS NOT NULL"
+        if changed_only:
+            query += " AND r.origin IS NULL"
+        cursor = self.conn.execute(query + " ORDER BY r.row_index", (run_id,))
+        for row_index, info, results in cursor:
+            yield row_index, json.loads(info), json.loads(results) if results else None
+
+
+class ModuleRegistry:
+    """Validated, compiled table of link-generation modules
+
+    Each module is a declarative entry (name, result key, platform URL
+    templates, required fields and display text). Templates are parsed once
+    into literal/field parts so rendering every module for a doctor is a
+    single pass of string joins instead of repeated str.format() parsing.
+    """
+
+    # Fields a URL template may reference
+    FIELDS = ("doctor_name", "city", "state", "specialty", "first_name", "last_name")
+
+    def __init__(self, modules: List[Dict]):
+        self.base = [dict(module) for module in modules]
+        self.modules = {}
+        self.compiled = {}
+        self.load(self.base)
+
+    def load(self, modules: List[Dict]) -> int:
+        """Validate and install a module table, returning how many templates were compiled
+
+        Templates whose source text is unchanged since the previous load keep
+        their compiled parts, so reloading a large table only recompiles the
+        entries that actually changed. The table is swapped in only after
+        every entry validates.
+        """
+        new_modules = {}
+        new_compiled = {}
+        compiled_count = 0
+        for module in modules:
+            self.validate(module)
+            name = module["name"]
+            if name in new_modules:
+                raise ValueError(f"Duplicate module name: {name}")
+            previous = {platform: (template, parts) for platform, template, parts in self.compiled.get(name, [])}
+            entries = []
+            for platform, template in module["platforms"].items():
+                cached = previous.get(platform)
+                if cached and cached[0] == template:
+                    parts = cached[1]
+                else:
+                    parts = self.compile_template(template)
+                    compiled_count += 1
+                entries.append((platform, template, parts))
+            new_modules[name] = module
+            new_compiled[name] = entries
+        self.modules = new_modules
+        self.compiled = new_compiled
+        return compiled_count
+
+    def apply_overrides(self, overrides: Dict) -> int:
+        """Merge per-module overrides over the base table and reload it"""
+        return self.load(self.merge(self.base, overrides))
+
+    @staticmethod
+    def merge(base: List[Dict], overrides: Dict) -> List[Dict]:
+        """Merge module overrides keyed by module name over a base table
+
+        An override's fields replace the module's fields, its "platforms" are
+        merged platform by platform (null removes a platform), a null override
+        removes the module, and unknown names are appended as new modules.
+        """
+        merged = []
+        for module in base:
+            name = module["name"]
+            if name not in overrides:
+                merged.append(module)
+                continue
+            override = overrides[name]
+            if override is None:
+                continue
+            platforms = dict(module["platforms"])
+            for platform, template in (override.get("platforms") or {}).items():
+                if template is None:
+                    platforms.pop(platform, None)
+                else:
+                    platforms[platform] = template
+            merged.append({**module, **override, "name": name, "platforms": platforms})
+        base_names = {module["name"] for module in base}
+        for name, override in overrides.items():
+            if name not in base_names and override is not None:
+                merged.append({**override, "name": name})
+        return merged
+
+    @classmethod
+    def from_file(cls, path) -> "ModuleRegistry":
+        """Load a module table from a JSON file (a list, or {"modules": [...]})"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("modules", [])
+        return cls(data)
+
+    @classmethod
+    def validate(cls, module: Dict):
+        """Raise ValueError if a module definition is malformed"""
+        for field in ("name", "key", "title", "platforms"):
+            if not module.get(field):
+                raise ValueError(f"Module is missing '{field}': {module.get('name', module)}")
+        if not isinstance(module["platforms"], dict):
+            raise ValueError(f"Module '{module['name']}' platforms must be a mapping of name to URL template")
+        for field in module.get("required", []):
+            if field not in cls.FIELDS:
+                raise ValueError(f"Module '{module['name']}' requires unknown field '{field}'")
+        for platform, template in module["platforms"].items():
+            if not isinstance(template, str):
+                raise ValueError(f"Module '{module['name']}' platform '{platform}' has no URL template")
+            for _, field, _, _ in string.Formatter().parse(template):
+                if field is not None and field not in cls.FIELDS:
+                    raise ValueError(f"Module '{module['name']}' platform '{platform}' uses unknown field '{{{field}}}'")
+
+    @staticmethod
+    def compile_template(template: str) -> tuple:
+        """Split a URL template into alternating literal strings and field names"""
+        parts = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            parts.append(literal)
+            parts.append(field)
+        return tuple(parts)
+
+    @staticmethod
+    def render_template(parts: tuple, fields: Dict) -> str:
+        """Render compiled template parts with already-quoted field values"""
+        return "".join(part if i % 2 == 0 else fields[part] for i, part in enumerate(parts) if part)
+
+    def names(self) -> List[str]:
+        """Return module names in table order"""
+        return list(self.modules)
+
+    def get(self, name: str) -> Dict:
+        """Return a module definition by name"""
+        return self.modules[name]
+
+    def has_required(self, name: str, fields: Dict) -> bool:
+        """Check that every field a module requires is non-empty"""
+        return all(fields.get(field) for field in self.modules[name].get("required", []))
+
+    def render(self, name: str, fields: Dict, only_field: Optional[str] = None) -> List[List[str]]:
+        """Render one module's platform links as [platform, url] pairs
+
+        With `only_field`, only platforms whose template uses that field are rendered.
+        """
+        return [
+            [platform, self.render_template(parts, fields)]
+            for platform, _, parts in self.compiled.get(name, [])
+            if only_field is None or only_field in parts[1::2]
+        ]
+
+    def render_all(self, fields: Dict) -> Dict[str, List[List[str]]]:
+        """Render every module whose required fields are present, keyed by result key"""
+        return {
+            module["key"]: self.render(name, fields)
+            for name, module in self.modules.items()
+            if self.has_required(name, fields)
+        }
+
+    def render_columns(self, columns: Dict[str, List[str]], size: int) -> Dict[str, List[str]]:
+        """Render every module column-wise from columns of already-quoted field values
+
+        Returns one column per platform, named "<result key>.<platform>".
+        Each URL column is assembled with a single join over zipped
+        literal/field columns rather than per-row formatting. Rows missing a
+        module's required fields get empty strings in that module's columns.
+        """
+        output = {}
+        for name, module in self.modules.items():
+            required = [columns[field] for field in module.get("required", [])]
+            mask = [all(values) for values in zip(*required)] if required else None
+            for platform, _, parts in self.compiled[name]:
+                pieces = [
+                    itertools.repeat(part, size) if i % 2 == 0 else columns[part]
+                    for i, part in enumerate(parts) if part
+                ]
+                column = list(map("".join, zip(*pieces))) if pieces else [""] * size
+                if mask is not None:
+                    column = [url if keep else "" for url, keep in zip(column, mask)]
+                output[f"{module['key']}.{platform}"] = column
+        return output
+
+    def to_table(self) -> List[Dict]:
+        """Return the module table in its declarative (JSON-serializable) form"""
+        return [dict(module) for module in self.modules.values()]
+
+
+class PlatformOverrides:
+    """User overrides for the built-in platform tables, watched by mtime
+
+    The overrides file is a JSON object with optional "medical_boards" and
+    "modules" sections. poll() is cheap enough to call before every lookup:
+    it stats the file at most once per `interval` seconds and only re-reads
+    it when its modification time or size changed.
+    """
+
+    def __init__(self, path: Path, interval: float = 1.0):
+        self.path = Path(path)
+        self.interval = interval
+        self.signature = None
+        self.next_check = 0.0
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def poll(self, force: bool = False) -> Optional[Dict]:
+        """Return the overrides if the file changed since the last poll, else None
+
+        Raises ValueError if the changed file is not valid JSON.
+        """
+        now = time.monotonic()
+        if not force and now < self.next_check:
+            return None
+        self.next_check = now + self.interval
+
+        signature = self._stat()
+        if not force and signature == self.signature:
+            return None
+        self.signature = signature
+        if signature is None:
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        if not isinstance(overrides, dict):
+            raise ValueError("overrides file must contain a JSON object")
+        return overrides
+
+    @staticmethod
+    def merge_boards(base: Dict, overrides: Dict) -> Dict:
+        """Merge medical board overrides keyed by state code (null removes a state)"""
+        boards = dict(base)
+        for code, board in overrides.items():
+            code = code.upper()
+            if board is None:
+                boards.pop(code, None)
+            elif isinstance(board, dict) and (board.get("url") or code in boards):
+                boards[code] = {**boards.get(code, {}), **board}
+            else:
+                raise ValueError(f"Invalid medical board override for {code}")
+        return boards
+
+
+class LinkChecker:
+    """Probes URLs and keeps a per-URL link-health record
+
+    Results are persisted to a JSON file so later sweeps (and rankings that
+    don't probe at all) can use the last known status and latency.
+    Government sites often answer automated requests with 403 even though
+    they work in a browser, so 403 is recorded as "blocked" rather than
+    "broken". With `host_override` ("host:port", e.g. a local stub_server.py)
+    every probe is sent there over plain HTTP with the original Host header.
+
+    Each record keeps the page's ETag/Last-Modified, a similarity fingerprint
+    of its text and where it redirected to. Later sweeps send conditional
+    requests (a 304 means nothing was downloaded), and a page whose text or
+    redirect target changed beyond noise gets a "changed" entry so moved
+    search pages surface on their own.
+    """
+
+    USER_AGENT = "Mozilla/5.0"
+    # Bytes of a page read for its fingerprint
+    MAX_BODY = 512 * 1024
+    # Fingerprint bits that may differ before a page counts as changed
+    CHANGE_THRESHOLD = 14
+    VALIDATORS = (("etag", "ETag", "If-None-Match"), ("last_modified", "Last-Modified", "If-Modified-Since"))
+
+    def __init__(self, health_file: Path, timeout: float = 10, workers: int = 8,
+                 host_override: Optional[str] = None):
+        self.health_file = Path(health_file)
+        self.timeout = timeout
+        self.workers = workers
+        self.host_override = host_override
+        self.lock = threading.Lock()
+        self.health = self._load()
+        self.updated = set()
+        # Some board sites have certificate chain issues; we only read status codes
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.health_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the link-health records to disk
+
+        The file is re-read under a file lock and only the URLs probed here
+        are written over it, so concurrent sweeps keep each other's records.
+        """
+        with locked(self.health_file):
+            saved = self._load()
+            with self.lock:
+                saved.update({url: self.health[url] for url in self.updated})
+                self.health = saved
+                self.updated.clear()
+                atomic_write(self.health_file, json.dumps(saved))
+
+    @staticmethod
+    def classify(status: Optional[int]) -> str:
+        """Map an HTTP status (None for network failure) to a health label"""
+        if status is None:
+            return "down"
+        if status < 400:
+            return "ok"
+        if status in (401, 403, 429):
+            return "blocked"
+        return "broken"
+
+    @staticmethod
+    def fingerprint(body: bytes) -> str:
+        """64-bit simhash of a page's visible text (3-word shingles), as hex
+
+        Unlike a plain hash, small edits (dates, counters, session tokens)
+        only flip a few bits, so the distance between two fingerprints
+        measures how much the page changed.
+        """
+        text = body.decode("utf-8", "replace")
+        text = re.sub(r"(?is)<(script|style)\b.*?</\1\s*>|<[^>]+>", " ", text)
+        words = re.findall(r"\w+", html.unescape(text).lower())
+        shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+        weights = [0] * 64
+        for shingle in shingles:
+            value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for bit in range(64):
+                weights[bit] += 1 if value >> bit & 1 else -1
+        return f"{sum(1 << bit for bit in range(64) if weights[bit] > 0):016x}"
+
+    @staticmethod
+    def distance(a: str, b: str) -> int:
+        """Number of differing bits between two fingerprints"""
+        return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+    @staticmethod
+    def target(url: str) -> str:
+        """A URL without its query or fragment, for comparing redirect targets"""
+        parts = urllib.parse.urlsplit(url)
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+    def _request(self, url: str, method: str, headers: Optional[Dict] = None) -> tuple:
+        """Send one request; returns (status, response headers, body, final URL)"""
+        headers = {'User-Agent': self.USER_AGENT, **(headers or {})}
+        parts = urllib.parse.urlsplit(url)
+        if self.host_override:
+            headers['Host'] = parts.netloc
+            url = urllib.parse.urlunsplit(("http", self.host_override) + tuple(parts[2:]))
+        req = urllib.request.Request(url, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout, context=self.ssl_context) as response:
+                body = response.read(self.MAX_BODY) if method == "GET" else b""
+                status, response_headers, final_url = response.getcode(), response.headers, response.geturl()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, b"", url
+        if self.host_override:
+            # Report redirects within the stub against the original host
+            final = urllib.parse.urlsplit(final_url)
+            if final.netloc == self.host_override:
+                final_url = urllib.parse.urlunsplit((parts.scheme, parts.netloc) + tuple(final[2:]))
+        return status, response_headers, body, final_url
+
+    def check(self, url: str) -> Dict:
+        """Probe one URL with a conditional GET and record its health and any change"""
+        previous = self.get(url) or {}
+        conditions = {header: previous[key] for key, _, header in self.VALIDATORS if previous.get(key)}
+        start = time.monotonic()
+        status, headers, body, final_url, error = None, None, b"", url, None
+        try:
+            status, headers, body, final_url = self._request(url, "GET", conditions)
+            if status in (405, 501):
+                status, headers, body, final_url = self._request(url, "HEAD")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        record = {
+            "status": status,
+            "health": self.classify(status),
+            "latency": round(time.monotonic() - start, 3),
+            "checked": datetime.now().isoformat(),
+            "bytes": len(body),
+        }
+        if error:
+            record["error"] = error
+        if status == 304:
+            # Unchanged since the last sweep: keep what we knew about the page
+            for key in ("etag", "last_modified", "fingerprint", "final_url"):
+                if key in previous:
+                    record[key] = previous[key]
+        elif status is not None and status < 300:
+            for key, header, _ in self.VALIDATORS:
+                if headers.get(header):
+                    record[key] = headers[header]
+            record["final_url"] = final_url
+            if body:
+                record["fingerprint"] = self.fingerprint(body)
+            changed = {}
+            if previous.get("fingerprint") and record.get("fingerprint"):
+                bits = self.distance(previous["fingerprint"], record["fingerprint"])
+                if bits > self.CHANGE_THRESHOLD:
+                    changed["content"] = bits
+            if previous.get("final_url") and self.target(previous["final_url"]) != self.target(final_url):
+                changed["redirect"] = {"from": previous["final_url"], "to": final_url}
+            if changed:
+                record["changed"] = changed
+        with self.lock:
+            self.health[url] = record
+            self.updated.add(url)
+        return record
+
+    def changed(self, urls: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """URLs whose last probe found moved or substantially changed content"""
+        return {url: record["changed"] for url, record in self.health.items()
+                if record.get("changed") and (urls is None or url in urls)}
+
+    def check_many(self, urls: List[str], workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Probe URLs concurrently with a bounded thread pool"""
+        unique = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=max(1, min(workers or self.workers, len(unique) or 1))) as pool:
+            return dict(zip(unique, pool.map(self.check, unique)))
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the last recorded health for a URL, if any"""
+        return self.health.get(url)
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to a single host for one event loop"""
+
+    def __init__(self, host: str, port: int, use_ssl: bool, size: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.idle = []
+
+    async def acquire(self):
+        """Return an idle connection or open a new one"""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl,
+                                    server_hostname=self.host if self.ssl else None),
+            self.timeout
+        )
+
+    def release(self, conn, reusable: bool):
+        """Return a connection to the pool, or close it"""
+        if reusable and len(self.idle) < self.size:
+            self.idle.append(conn)
+        else:
+            conn[1].close()
+
+    async def close(self):
+        """Close every idle connection"""
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+class NPIRegistryClient:
+    """Asynchronous client for the NPPES NPI Registry API
+
+    Lookups run on asyncio over a pool of keep-alive connections with bounded
+    concurrency, retry transient failures with exponential backoff, and are
+    cached in SQLite by normalized query (first name, last name, state) so
+    re-runs of the same roster don't hit the API again. Point `base_url` at a
+    local stub (see stub_server.py) to test without network access.
+    """
+
+    API_URL = "https://npiregistry.cms.hhs.gov/api/"
+    API_VERSION = "2.1"
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: Optional[str] = None, cache_path: Optional[Path] = None,
+                 concurrency: int = 16, retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 15.0, cache_ttl_days: float = 30):
+        parts = urllib.parse.urlsplit(base_url or self.API_URL)
+        self.use_ssl = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.path = parts.path or "/"
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl_days * 86400
+        self.stats = {"requests": 0, "cache_hits": 0, "retries": 0, "errors": 0}
+        self.cache = None
+        if cache_path:
+            self.cache = sqlite3.connect(str(cache_path), timeout=30)
+            self.cache.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, fetched REAL NOT NULL)"
+            )
+            self.cache.commit()
+
+    def close(self):
+        """Close the response cache"""
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+
+    @staticmethod
+    def query_params(doctor_info: Dict) -> Dict:
+        """Build normalized API query parameters for a doctor"""
+        first_name, last_name = DoctorDork.split_name(doctor_info.get("doctor_name", ""))
+        params = {
+            "version": NPIRegistryClient.API_VERSION,
+            "enumeration_type": "NPI-1",
+            "first_name": first_name.strip(".,").lower(),
+            "last_name": last_name.strip(".,").lower(),
+            "limit": "10",
+        }
+        state = doctor_info.get("state", "").strip().upper()
+        if state:
+            params["state"] = state
+        return params
+
+    @classmethod
+    def query_key(cls, doctor_info: Dict) -> str:
+        """Cache key for a doctor's normalized query"""
+        params = cls.query_params(doctor_info)
+        return "|".join((params["first_name"], params["last_name"], params.get("state", "")))
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        if not self.cache:
+            return None
+        row = self.cache.execute("SELECT response, fetched FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] < self.cache_ttl:
+            return json.loads(row[0])
+        return None
+
+    async def _get(self, pool: _ConnectionPool, query: str) -> tuple:
+        """Send one GET over a pooled connection and return (status, body)"""
+        reader, writer = conn = await pool.acquire()
+        reusable = False
+        try:
+            host = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+            writer.write((
+                f"GET {self.path}?{query} HTTP/1.1\r\n"
+                f"Host: {host}\r\n"
+                f"User-Agent: DoctorDork/{DoctorDork.VERSION}\r\n"
+                "Accept: application/json\r\n"
+                "Connection: keep-alive\r\n\r\n"
+            ).encode("ascii"))
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                    if size == 0:
+                        await reader.readline()
+                        break
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readline()
+                body = b"".join(chunks)
+                framed = True
+            elif "content-length" in headers:
+                body = await reader.readexactly(int(headers["content-length"]))
+                framed = True
+            else:
+                body = await reader.read()
+                framed = False
+            reusable = framed and headers.get("connection", "").lower() != "close"
+            return status, body
+        finally:
+            pool.release(conn, reusable)
+
+    async def _fetch(self, pool: _ConnectionPool, params: Dict) -> Dict:
+        """Query the API, retrying transient failures with backoff"""
+        query = urllib.parse.urlencode(params)
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() / 2))
+            try:
+                self.stats["requests"] += 1
+                status, body = await asyncio.wait_for(self._get(pool, query), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if status == 200:
+                return json.loads(body.decode("utf-8"))
+            error = f"HTTP {status}"
+            if status not in self.RETRY_STATUSES:
+                break
+        raise ConnectionError(error)
+
+    async def resolve_async(self, doctors: List[Dict]) -> List[Dict]:
+        """Resolve doctors to API responses, sharing one request per distinct query"""
+        keys = [self.query_key(doctor_info) for doctor_info in doctors]
+        responses = {}
+        pending = {}
+        for key, doctor_info in zip(keys, doctors):
+            if key in responses or key in pending:
+                continue
+            cached = self._cached(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                responses[key] = cached
+            else:
+                pending[key] = self.query_params(doctor_info)
+
+        pool = _ConnectionPool(self.host, self.port, self.use_ssl, self.concurrency, self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(key, params):
+            async with semaphore:
+                try:
+                    return key, await self._fetch(pool, params), None
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    return key, None, str(e)
+
+        try:
+            fetched = await asyncio.gather(*(fetch(key, params) for key, params in pending.items()))
+        finally:
+            await pool.close()
+
+        now = time.time()
+        to_cache = []
+        for key, response, error in fetched:
+            if response is None:
+                responses[key] = {"error": error}
+            else:
+                responses[key] = response
+                to_cache.append((key, json.dumps(response), now))
+        if self.cache and to_cache:
+            with self.cache:
+                self.cache.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", to_cache)
+
+        return [self.summarize(responses[key], doctor_info) for key, doctor_info in zip(keys, doctors)]
+
+    def resolve(self, doctors: List[Dict]) -> List[Dict]:
+        """Synchronous wrapper around resolve_async()"""
+        if not doctors:
+            return []
+        return asyncio.run(self.resolve_async(doctors))
+
+    @staticmethod
+    def summarize(response: Dict, doctor_info: Dict) -> Dict:
+        """Pick the best match from an API response and extract NPI, taxonomy and practice address"""
+        if response.get("error") or response.get("Errors"):
+            return {"error": response.get("error") or "; ".join(
+                str(e.get("description", e)) for e in response.get("Errors", []))}
+        results = response.get("results") or []
+        if not results:
+            return {"matches": 0}
+
+        def practice_address(result):
+            for address in result.get("addresses", []):
+                if address.get("address_purpose") == "LOCATION":
+                    return address
+            return (result.get("addresses") or [{}])[0]
+
+        city = doctor_info.get("city", "").strip().lower()
+        best = results[0]
+        if city:
+            for result in results:
+                if practice_address(result).get("city", "").lower() == city:
+                    best = result
+                    break
+
+        taxonomies = best.get("taxonomies", [])
+        taxonomy = next((t for t in taxonomies if t.get("primary")), taxonomies[0] if taxonomies else {})
+        address = practice_address(best)
+        basic = best.get("basic", {})
+        return {
+            "matches": response.get("result_count", len(results)),
+            "npi": str(best.get("number", "")),
+            "name": " ".join(p for p in (basic.get("first_name"), basic.get("last_name")) if p),
+            "credential": basic.get("credential", ""),
+            "taxonomy_code": taxonomy.get("code", ""),
+            "taxonomy": taxonomy.get("desc", ""),
+            "practice_address": ", ".join(p for p in (
+                address.get("address_1"), address.get("city"),
+                f"{address.get('state', '')} {address.get('postal_code', '')[:5]}".strip()
+            ) if p),
+            "phone": address.get("telephone_number", ""),
+        }
+
+
+def _chunked(iterable, size: int):
+    """Yield lists of up to `size` items from an iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@contextmanager
+def locked(path: Path):
+    """Hold an exclusive lock on `path`.lock across processes for the duration of the block"""
+    lock_path = Path(path).with_name(Path(path).name + ".lock")
+    with open(lock_path, "a+b") as lock:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path: Path, text: str):
+    """Replace a file's contents so readers see either the old or the new file, never a partial one"""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class Snapshot:
+    """Versioned binary snapshot of compiled lookup tables, memory-mapped and decoded lazily
+
+    Each section (module registry, taxonomy index, gazetteer) holds the
+    marshalled attribute state of a built object, tagged with a key derived
+    from its source table and the code that builds it. The file is mapped
+    at startup but a section is only decoded the first time it is asked
+    for, and only while its key still matches; otherwise the object is
+    rebuilt from source. Starting up only ever adds missing sections: a
+    stale one is rebuilt in memory and listed in `stale` until
+    `snapshot --build` (or put()) rewrites it.
+
+    Layout: MAGIC, a 4-byte header length, a JSON header (format version,
+    Python version, {section: {key, offset, length}}), then the sections.
+    """
+
+    MAGIC = b"DDSNAP"
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.sections = {}
+        self.data = None
+        self.stale = set()
+        self.stats = {"loaded": 0, "rebuilt": 0}
+        self._open()
+
+    @classmethod
+    def environment(cls) -> List:
+        """What a snapshot's encoding depends on besides its sections"""
+        return [cls.VERSION, list(sys.version_info[:2]), marshal.version]
+
+    def _open(self):
+        self.close()
+        self.sections = {}
+        try:
+            with open(self.path, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.data[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError("not a snapshot")
+            start = len(self.MAGIC) + 4
+            size = int.from_bytes(self.data[len(self.MAGIC):start], "big")
+            header = json.loads(self.data[start:start + size].decode("utf-8"))
+            if header.get("environment") == self.environment():
+                self.sections = {name: dict(section, offset=section["offset"] + start + size)
+                                 for name, section in header["sections"].items()}
+        except (OSError, ValueError, KeyError):
+            self.close()
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+
+    @classmethod
+    def key(cls, builder: type, *source) -> str:
+        """Section key for objects built by `builder` from `source` (any repr-able description)
+
+        Also covers the bytecode, referenced names and constants of the
+        builder's methods (nested functions included) and its upper-case
+        class constants, so editing the code that builds a table - a
+        literal, a called helper - invalidates its section as well.
+        """
+        digest = hashlib.sha1(cls.stable(source).encode("utf-8"))
+        for name, value in sorted(vars(builder).items()):
+            function = getattr(value, "fget", None) or getattr(value, "__func__", value)
+            code = getattr(function, "__code__", None)
+            if code is not None:
+                digest.update(name.encode("utf-8"))
+                cls.digest_code(digest, code)
+            elif name.isupper():
+                digest.update(f"{name}={cls.stable(value)}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def digest_code(cls, digest, code):
+        """Feed a code object's bytecode, names and constants (recursively) into `digest`"""
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode("utf-8"))
+        for const in code.co_consts:
+            if hasattr(const, "co_code"):
+                cls.digest_code(digest, const)
+            else:
+                digest.update(cls.stable(const).encode("utf-8"))
+
+    @classmethod
+    def stable(cls, value) -> str:
+        """repr() with sets and dicts in a fixed order, so keys don't vary with hash seeds"""
+        if isinstance(value, (set, frozenset)):
+            return "{" + ", ".join(sorted(cls.stable(item) for item in value)) + "}"
+        if isinstance(value, dict):
+            return "{" + ", ".join(f"{cls.stable(k)}: {cls.stable(v)}" for k, v in value.items()) + "}"
+        if isinstance(value, (list, tuple)):
+            return type(value).__name__ + "(" + ", ".join(cls.stable(item) for item in value) + ")"
+        return repr(value)
+
+    def blob(self, name: str) -> Optional[bytes]:
+        section = self.sections.get(name)
+        if section is None or self.data is None:
+            return None
+        return self.data[section["offset"]:section["offset"] + section["length"]]
+
+    def get(self, name: str, key: str, cls: type, build):
+        """The object in section `name` if its key matches, else build() it (storing it if the section is missing)"""
+        if self.sections.get(name, {}).get("key") == key:
+            try:
+                state = marshal.loads(self.blob(name))
+                obj = cls.__new__(cls)
+                if hasattr(obj, "__setstate__"):
+                    obj.__setstate__(state)
+                else:
+                    obj.__dict__.update(state)
+                self.stats["loaded"] += 1
+                return obj
+            except (ValueError, EOFError, TypeError):
+                pass
+        obj = build()
+        self.stats["rebuilt"] += 1
+        if name in self.sections:
+            self.stale.add(name)
+        else:
+            self.put(name, key, obj)
+        return obj
+
+    def put(self, name: str, key: str, obj):
+        """Write `obj` as section `name`"""
+        state = obj.__getstate__() if hasattr(type(obj), "__getstate__") else dict(vars(obj))
+        try:
+            if self.store(name, key, marshal.dumps(state)):
+                self.stale.discard(name)
+        except (OSError, ValueError) as e:
+            # A snapshot that can't be written only costs the next start a rebuild
+            print(f"{Colors.YELLOW}⚠ Could not update snapshot {self.path}: {e}{Colors.RESET}")
+
+    def store(self, name: str, key: str, blob: bytes) -> bool:
+        """Rewrite the snapshot with one section replaced, keeping the others
+
+        Returns False, leaving the file as it was, if it can't be replaced
+        (Windows refuses while another process has it mapped).
+        """
+        with locked(self.path):
+            self._open()  # pick up sections other processes wrote meanwhile
+            blobs = {other: (section["key"], self.blob(other))
+                     for other, section in self.sections.items() if other != name}
+            blobs[name] = (key, blob)
+            sections, offset = {}, 0
+            for section, (section_key, data) in blobs.items():
+                sections[section] = {"key": section_key, "offset": offset, "length": len(data)}
+                offset += len(data)
+            header = json.dumps({"environment": self.environment(), "sections": sections}).encode("utf-8")
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp, 'wb') as f:
+                    f.write(self.MAGIC + len(header).to_bytes(4, "big") + header)
+                    for _, data in blobs.values():
+                        f.write(data)
+                self.close()
+                os.replace(tmp, self.path)
+            except OSError:
+                return False
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+                self._open()
+        return True
+
+    def describe(self) -> Dict[str, Dict]:
+        """{section: {key, bytes}} for the sections in the current file"""
+        return {name: {"key": section["key"], "bytes": section["length"]} for name, section in self.sections.items()}
+
+    def clear(self):
+        """Delete the snapshot file"""
+        self.close()
+        self.sections = {}
+        self.stale = set()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class ShardedOutput:
+    """Streaming text output, optionally compressed and split into rolling shards
+
+    Without shard limits everything goes to `path` (plus the compression
+    suffix). With `shard_rows` or `shard_bytes` (uncompressed), output rolls
+    over to path-00000, path-00001, ... at record boundaries, every shard
+    starts with `header`, and close() writes a <path>.manifest.json listing
+    the shards so loaders can read them in parallel.
+    """
+
+    SUFFIXES = {"": "", "gzip": ".gz", "zstd": ".zst", "lz4": ".lz4"}
+
+    def __init__(self, path: str, compress: str = "", shard_rows: int = 0, shard_bytes: int = 0, header: str = ""):
+        if compress not in self.SUFFIXES:
+            raise ValueError(f"Unknown compression: {compress} (use gzip, zstd or lz4)")
+        if compress == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        if compress == "lz4" and lz4_frame is None:
+            raise ValueError("lz4 compression needs the lz4 package")
+        self.path = Path(path)
+        self.compress = compress
+        self.shard_rows = shard_rows
+        self.shard_bytes = shard_bytes
+        self.header = header
+        self.sharded = bool(shard_rows or shard_bytes)
+        self.shards = []
+        self.stream = None
+        self.rows = 0
+
+    def _open(self, path: Path):
+        if self.compress == "gzip":
+            return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+        if self.compress == "zstd":
+            return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb')),
+                                    encoding='utf-8', newline='')
+        if self.compress == "lz4":
+            return lz4_frame.open(str(path), 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def _roll(self):
+        if self.stream:
+            self.stream.close()
+        suffix = self.SUFFIXES[self.compress]
+        if self.sharded:
+            path = self.path.with_name(f"{self.path.stem}-{len(self.shards):05d}{self.path.suffix}{suffix}")
+        else:
+            path = self.path.with_name(self.path.name + suffix)
+        self.stream = self._open(path)
+        self.shards.append({"file": path.name, "first_row": self.rows, "rows": 0, "bytes": 0})
+        if self.header:
+            self.write(self.header, rows=0)
+
+    def write(self, text: str, rows: int = 1):
+        """Write one record (`rows` rows) of text, starting a new shard first if the current one is full"""
+        shard = self.shards[-1] if self.shards else None
+        if shard is None or (rows and self.sharded and shard["rows"] and (
+                (self.shard_rows and shard["rows"] >= self.shard_rows) or
+                (self.shard_bytes and shard["bytes"] >= self.shard_bytes))):
+            self._roll()
+            shard = self.shards[-1]
+        self.stream.write(text)
+        shard["rows"] += rows
+        shard["bytes"] += len(text.encode('utf-8'))
+        self.rows += rows
+
+    def close(self) -> str:
+        """Finish the output; returns the written file, or the manifest when sharded"""
+        if not self.shards:
+            self._roll()
+        self.stream.close()
+        if not self.sharded:
+            return str(self.path.with_name(self.shards[0]["file"]))
+        manifest = self.path.with_name(self.path.name + ".manifest.json")
+        atomic_write(manifest, json.dumps({
+            "created": datetime.now().isoformat(),
+            "format": self.path.suffix.lstrip("."),
+            "compression": self.compress or None,
+            "rows": self.rows,
+            "shards": self.shards,
+        }, indent=2) + "\n")
+        return str(manifest)
+
+
+class ExportSink:
+    """One batch export format; ExportFanout feeds each sink from its own writer thread
+
+    Subclasses take the output path without extension plus the compression
+    and sharding options, consume (doctor_info, results) pairs in write()
+    and return the written file (or manifest) from close(). SHARDS and
+    COMPRESSES say which options a format honours; the others are refused.
+    """
+
+    FIELDS = ('doctor_name', 'city', 'state', 'specialty')
+    SHARDS = False
+    COMPRESSES = True
+
+    def write(self, doctor_info: Dict, results: Dict):
+        raise NotImplementedError
+
+    def close(self) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def links(results: Dict):
+        """(category, platform, url) for every generated link"""
+        for category, data in results.items():
+            if isinstance(data, list):
+                for platform, url in data:
+                    yield category, platform, url
+            else:
+                yield category, 'Google Search', data
+
+
+class CsvSink(ExportSink):
+    """One row per link, with the doctor's fields repeated"""
+
+    HEADER = "doctor_name,city,state,specialty,category,platform,url\r\n"
+    SHARDS = True
+
+    def __init__(self, base: str, compress: str = "", shard_rows: int = 0, shard_bytes: int = 0):
+        self.out = ShardedOutput(base + ".csv", compress, shard_rows, shard_bytes, header=self.HEADER)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def write(self, doctor_info: Dict, results: Dict):
+        info = [doctor_info.get(k, '') for k in self.FIELDS]
+        self.writer.writerows(info + list(link) for link in self.links(results))
+        self.out.write(self.buffer.getvalue())
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def close(self) -> str:
+        return self.out.close()
+
+
+class JsonlSink(ExportSink):
+    """One compact JSON object per doctor per line"""
+
+    SHARDS = True
+
+    def __init__(self, base: str, compress: str = "", shard_rows: int = 0, shard_bytes: int = 0):
+        self.out = ShardedOutput(base + ".jsonl", compress, shard_rows, shard_bytes)
+
+    def write(self, doctor_info: Dict, results: Dict):
+        self.out.write(json.dumps({**doctor_info, "results": results}, separators=(',', ':')) + "\n")
+
+    def close(self) -> str:
+        return self.out.close()
+
+
+class JsonSink(ExportSink):
+    """A single compact JSON document (never sharded)"""
+
+    def __init__(self, base: str, compress: str = "", **sharding):
+        self.out = ShardedOutput(base + ".json", compress)
+        self.out.write('{"timestamp":' + json.dumps(datetime.now().isoformat()) + ',"doctors":[', rows=0)
+        self.first = True
+
+    def write(self, doctor_info: Dict, results: Dict):
+        self.out.write(("" if self.first else ",") + json.dumps({**doctor_info, "results": results},
+                                                                 separators=(',', ':')))
+        self.first = False
+
+    def close(self) -> str:
+        self.out.write("]}\n", rows=0)
+        return self.out.close()
+
+
+class HtmlSink(ExportSink):
+    """A single HTML report with a section of clickable links per doctor"""
+
+    HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>DoctorDork Batch Results</title>
+<style>
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 20px; color: #333; }
+h1 { color: #667eea; }
+section { border-bottom: 1px solid #ddd; padding: 8px 0; }
+h2 { margin: 0; font-size: 1.1em; }
+.meta { color: #666; margin: 2px 0 6px; }
+.category { font-weight: bold; margin-right: 6px; }
+a { color: #764ba2; margin-right: 10px; }
+</style>
+</head>
+<body>
+"""
+
+    def __init__(self, base: str, compress: str = "", **sharding):
+        self.out = ShardedOutput(base + ".html", compress)
+        self.out.write(self.HEAD + f"<h1>DoctorDork Batch Results</h1>\n<p>Generated {datetime.now():%Y-%m-%d %H:%M}</p>\n",
+                       rows=0)
+
+    def write(self, doctor_info: Dict, results: Dict):
+        meta = " · ".join(html.escape(doctor_info.get(k) or '') for k in ('city', 'state', 'specialty')
+                          if doctor_info.get(k))
+        parts = [f"<section>\n<h2>{html.escape(doctor_info.get('doctor_name') or '')}</h2>\n"
+                 f"<div class=\"meta\">{meta}</div>\n"]
+        categories = {}
+        for category, platform, url in self.links(results):
+            categories.setdefault(category, []).append(
+                f'<a href="{html.escape(str(url))}" target="_blank">{html.escape(str(platform))}</a>')
+        for category, anchors in categories.items():
+            label = html.escape(category.replace('_', ' ').title())
+            parts.append(f"<div><span class=\"category\">{label}</span>{''.join(anchors)}</div>\n")
+        parts.append("</section>\n")
+        self.out.write("".join(parts))
+
+    def close(self) -> str:
+        self.out.write("</body>\n</html>\n", rows=0)
+        return self.out.close()
+
+
+class ColumnarSink(ExportSink):
+    """One file per column (doctor fields, then category.platform) with one line per doctor
+
+    Columns can be loaded independently; a columns.json manifest names the
+    file of each column (names that sanitize to the same file name get a
+    numbered suffix). Rows lacking a column get an empty line. Values are
+    buffered and appended a block of FLUSH_ROWS rows at a time, so only one
+    file is open at once however many columns there are.
+    """
+
+    COMPRESSES = False
+    FLUSH_ROWS = 4096
+
+    def __init__(self, base: str, **options):
+        self.dir = Path(base + ".columns")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.columns = {}
+        self.files = set()
+        self.pending = {}
+        self.backfill = {}
+        self.rows = 0
+        self.block_start = 0
+
+    def write(self, doctor_info: Dict, results: Dict):
+        values = {field: doctor_info.get(field) or '' for field in self.FIELDS}
+        for category, platform, url in self.links(results):
+            values[category if platform == 'Google Search' else f"{category}.{platform}"] = url
+        for name in values:
+            if name not in self.columns:
+                stem = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+                filename, n = stem + ".txt", 1
+                while filename.lower() in self.files:
+                    n += 1
+                    filename = f"{stem}-{n}.txt"
+                self.files.add(filename.lower())
+                open(self.dir / filename, 'w').close()
+                self.columns[name] = filename
+                self.backfill[name] = self.block_start
+                self.pending[name] = [''] * (self.rows - self.block_start)
+        for name, column in self.pending.items():
+            column.append(str(values.get(name, '')).replace("\n", " "))
+        self.rows += 1
+        if self.rows - self.block_start >= self.FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered block to every column file"""
+        for name, column in self.pending.items():
+            with open(self.dir / self.columns[name], 'a', encoding='utf-8', newline='\n') as stream:
+                stream.write("\n" * self.backfill.pop(name, 0))
+                if column:
+                    stream.write("\n".join(column) + "\n")
+            column.clear()
+        self.block_start = self.rows
+
+    def close(self) -> str:
+        self.flush()
+        manifest = self.dir / "columns.json"
+        atomic_write(manifest, json.dumps({
+            "created": datetime.now().isoformat(),
+            "rows": self.rows,
+            "columns": [{"name": name, "file": filename} for name, filename in self.columns.items()],
+        }, indent=2) + "\n")
+        return str(manifest)
+
+
+# Batch export formats and their sinks
+EXPORT_SINKS = {"csv": CsvSink, "json": JsonSink, "jsonl": JsonlSink, "html": HtmlSink, "columnar": ColumnarSink}
+
+
+class ExportFanout:
+    """Walks export rows once, handing them to every sink on its own writer thread
+
+    Rows are passed in small batches through a bounded queue per sink, so a
+    slow sink (e.g. a compressed one) buffers a little and then throttles
+    the reader instead of holding the whole export in memory.
+    """
+
+    BATCH = 64
+    QUEUE_SIZE = 32
+
+    def __init__(self, sinks: List[ExportSink]):
+        self.sinks = sinks
+        self.queues = [queue.Queue(self.QUEUE_SIZE) for _ in sinks]
+        self.paths = [None] * len(sinks)
+        self.errors = [None] * len(sinks)
+
+    def _drain(self, n: int):
+        sink, pending = self.sinks[n], self.queues[n]
+        while True:
+            batch = pending.get()
+            if batch is None:
+                break
+            if self.errors[n] is not None:
+                continue  # keep draining so the reader never blocks on a failed sink
+            try:
+                for doctor_info, results in batch:
+                    sink.write(doctor_info, results)
+            except Exception as e:
+                self.errors[n] = e
+        try:
+            self.paths[n] = sink.close()
+        except Exception as e:
+            self.errors[n] = self.errors[n] or e
+
+    def run(self, rows) -> List[str]:
+        """Export every (doctor_info, results) row to all sinks; returns the written paths"""
+        threads = [threading.Thread(target=self._drain, args=(n,), daemon=True) for n in range(len(self.sinks))]
+        for thread in threads:
+            thread.start()
+        try:
+            for batch in _chunked(rows, self.BATCH):
+                for pending in self.queues:
+                    pending.put(batch)
+        finally:
+            for pending in self.queues:
+                pending.put(None)
+            for thread in threads:
+                thread.join()
+        for error in self.errors:
+            if error is not None:
+                raise error
+        return self.paths
+
+
+def roster_columns(doctors: List[Dict]) -> Dict[str, List[str]]:
+    """Convert roster rows into parallel columns for bulk generation"""
+    return {
+        field: [doctor_info.get(field, "") for doctor_info in doctors]
+        for field in ("doctor_name", "city", "state", "specialty", "taxonomy_name", "taxonomy_code")
+    }
+
+
+def write_columns_csv(columns: Dict[str, List[str]], filename: str):
+    """Write columnar output as a CSV with one column per field or link"""
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(columns))
+        writer.writerows(zip(*columns.values()))
+
+
+def iter_roster(path):
+    """Stream roster rows (Name, City, State, Specialty) from a CSV with or without a header row
+
+    With a header, any extra columns (npi, zip, id, ...) are kept on each row.
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = None
+        first = True
+        for parts in reader:
+            parts = [p.strip() for p in parts]
+            if not any(parts):
+                continue
+            if first and parts[0].lower() in ("doctor_name", "name", "doctor"):
+                header = [p.lower() for p in parts]
+                first = False
+                continue
+            first = False
+            if header:
+                row = dict(zip(header, parts))
+                doctor_info = {
+                    "doctor_name": row.pop("doctor_name", None) or row.pop("name", None) or row.pop("doctor", ""),
+                    "city": row.pop("city", ""),
+                    "state": row.pop("state", "").upper(),
+                    "specialty": row.pop("specialty", ""),
+                }
+                doctor_info.update((key, value) for key, value in row.items() if key not in ("name", "doctor"))
+            elif len(parts) >= 3:
+                doctor_info = {
+                    "doctor_name": parts[0],
+                    "city": parts[1],
+                    "state": parts[2].upper(),
+                    "specialty": parts[3] if len(parts) > 3 else ""
+                }
+            else:
+                continue
+            yield doctor_info
+
+
+def read_roster(path) -> List[Dict]:
+    """Read a whole roster CSV into a list of doctor_info rows"""
+    return list(iter_roster(path))
+
+
+# Name tokens ignored when normalizing people's names for index lookups
+NAME_NOISE = {"DR", "MD", "DO", "JR", "SR", "II", "III", "IV", "PHD", "NP", "PA", "RN", "DDS", "DPM"}
+
+
+def normalize_name_token(value: str) -> str:
+    """Uppercase a name token and drop everything but letters"""
+    return "".join(ch for ch in value.upper() if ch.isalpha())
+
+
+def doctor_name_key(doctor_name: str) -> Optional[tuple]:
+    """Normalize a free-text doctor name to (LAST, FIRST), handling "Last, First" order
+
+    A comma followed only by credentials ("Jane Doe, MD") doesn't count as "Last, First".
+    """
+    def name_tokens(text):
+        tokens = (normalize_name_token(t) for t in text.split())
+        return [t for t in tokens if t and t not in NAME_NOISE]
+
+    tokens = name_tokens(doctor_name.replace(",", " "))
+    if not tokens:
+        return None
+    head, _, tail = doctor_name.partition(",")
+    if name_tokens(tail) and name_tokens(head):
+        return tokens[0], tokens[1] if len(tokens) > 1 else ""
+    return tokens[-1], tokens[0] if len(tokens) > 1 else ""
+
+
+class ExclusionIndex:
+    """Hashed index over the OIG List of Excluded Individuals/Entities (LEIE)
+
+    Records are indexed by NPI, by normalized last+first name+state and by
+    normalized name alone, so screening a roster row is a few dict lookups.
+    The compiled index is saved as compact JSON and rebuilt in memory on load.
+    """
+
+    # Columns kept from the LEIE CSV (UPDATED.csv), in storage order
+    FIELDS = ("LASTNAME", "FIRSTNAME", "MIDNAME", "BUSNAME", "SPECIALTY", "NPI",
+              "CITY", "STATE", "EXCLTYPE", "EXCLDATE", "REINDATE")
+
+    def __init__(self, records: List[list], source: str = "", imported: str = ""):
+        self.records = records
+        self.source = source
+        self.imported = imported
+        self.by_npi = {}
+        self.by_name_state = {}
+        self.by_name = {}
+        fields = {name: i for i, name in enumerate(self.FIELDS)}
+        last, first, npi, state = fields["LASTNAME"], fields["FIRSTNAME"], fields["NPI"], fields["STATE"]
+        for i, record in enumerate(records):
+            if record[npi].strip("0"):
+                self.by_npi.setdefault(record[npi], []).append(i)
+            if record[last]:
+                key = self.name_key(record[first], record[last])
+                self.by_name.setdefault(key, []).append(i)
+                self.by_name_state.setdefault(f"{key}|{record[state]}", []).append(i)
+
+    @staticmethod
+    def name_key(first: str, last: str) -> str:
+        """Normalized LAST|FIRST key"""
+        return f"{normalize_name_token(last)}|{normalize_name_token(first)}"
+
+    @classmethod
+    def from_csv(cls, path) -> "ExclusionIndex":
+        """Import the LEIE CSV, streaming it row by row"""
+        records = []
+        with open(path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.DictReader(f)
+            missing = [field for field in ("LASTNAME", "FIRSTNAME", "NPI", "STATE") if field not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Not an LEIE file (missing columns: {', '.join(missing)})")
+            for row in reader:
+                records.append([(row.get(field) or "").strip().upper() for field in cls.FIELDS])
+        return cls(records, source=str(path), imported=datetime.now().isoformat())
+
+    def save(self, path: Path):
+        """Write the compiled index to disk"""
+        with locked(path):
+            atomic_write(path, json.dumps({"fields": self.FIELDS, "source": self.source, "imported": self.imported,
+                                           "records": self.records}, separators=(",", ":")))
+
+    @classmethod
+    def load(cls, path: Path) -> "ExclusionIndex":
+        """Load a compiled index written by save()"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if tuple(data.get("fields", ())) != cls.FIELDS:
+            raise ValueError("exclusion index was built by an incompatible version; re-import the LEIE file")
+        return cls(data["records"], data.get("source", ""), data.get("imported", ""))
+
+    def screen(self, doctor_info: Dict) -> List[Dict]:
+        """Return LEIE matches for a doctor, strongest first
+
+        Match strength is "npi" (same NPI), "name+state" or "name" (same
+        normalized first and last name in another state).
+        """
+        matches = {}
+        npi = (doctor_info.get("npi") or "").strip()
+        if npi:
+            for i in self.by_npi.get(npi, ()):
+                matches.setdefault(i, "npi")
+        name = doctor_name_key(doctor_info.get("doctor_name", ""))
+        if name:
+            key = "|".join(name)
+            state = doctor_info.get("state", "").upper()
+            for i in self.by_name_state.get(f"{key}|{state}", ()):
+                matches.setdefault(i, "name+state")
+            for i in self.by_name.get(key, ()):
+                matches.setdefault(i, "name")
+        return [{"match": level, **dict(zip(self.FIELDS, self.records[i]))} for i, level in matches.items()]
+
+    def screen_stream(self, rows):
+        """Yield (doctor_info, matches) for each row of an iterable roster"""
+        for doctor_info in rows:
+            yield doctor_info, self.screen(doctor_info)
+
+
+def _ingest_pubmed_file(path: str, pmid_limit: int):
+    """Count articles per author key in one PubMed baseline file (runs in a worker process)
+
+    Returns (path, articles, [(key, count, "pmid pmid ..."), ...]).
+    """
+    counts = {}
+    articles = 0
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag != "PubmedArticle":
+                continue
+            articles += 1
+            pmid = elem.findtext("MedlineCitation/PMID", "")
+            keys = set()
+            for author in elem.iterfind("MedlineCitation/Article/AuthorList/Author"):
+                last = normalize_name_token(author.findtext("LastName") or "")
+                if not last:
+                    continue  # CollectiveName entries
+                fore = (author.findtext("ForeName") or "").split()
+                first = normalize_name_token(fore[0]) if fore else ""
+                initial = normalize_name_token(author.findtext("Initials") or "")[:1] or first[:1]
+                if first:
+                    keys.add(f"{last}|{first}")
+                if initial:
+                    keys.add(f"{last}|{initial}")
+            for key in keys:
+                entry = counts.get(key)
+                if entry is None:
+                    counts[key] = [1, [pmid]]
+                else:
+                    entry[0] += 1
+                    if len(entry[1]) < pmid_limit:
+                        entry[1].append(pmid)
+            # Drop the parsed article (and its emptied shell under the root) to keep memory flat
+            elem.clear()
+            root.clear()
+    return path, articles, [(key, count, " ".join(pmids)) for key, (count, pmids) in counts.items()]
+
+
+class PubMedIndex:
+    """Author-name -> publication count index built from a local PubMed baseline mirror
+
+    Keys are LAST|FIRST and LAST|INITIAL; each baseline file is merged in its own
+    transaction and recorded, so an interrupted ingest resumes where it stopped.
+    """
+
+    # PMIDs kept per author key
+    PMID_LIMIT = 20
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS authors (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                pmids TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                articles INTEGER NOT NULL,
+                ingested TEXT NOT NULL
+            );
+        """)
+
+    @staticmethod
+    def baseline_files(paths: List[str]) -> List[str]:
+        """Expand directories to the .xml/.xml.gz baseline files they contain"""
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(sorted(str(p) for p in path.iterdir() if p.name.endswith((".xml", ".xml.gz"))))
+            else:
+                files.append(str(path))
+        return files
+
+    def ingested(self) -> set:
+        return {name for (name,) in self.conn.execute("SELECT name FROM files")}
+
+    def ingest(self, paths: List[str], workers: Optional[int] = None, progress=None) -> Dict:
+        """Parse baseline files in parallel and merge their author counts
+
+        Files already ingested (by file name) are skipped. progress(name, articles)
+        is called after each file is merged.
+        """
+        done = self.ingested()
+        files = [p for p in self.baseline_files(paths) if Path(p).name not in done]
+        stats = {"files": 0, "articles": 0, "skipped": len(self.baseline_files(paths)) - len(files)}
+        if not files:
+            return stats
+        if workers == 1 or len(files) == 1:
+            results = (_ingest_pubmed_file(p, self.PMID_LIMIT) for p in files)
+            self._merge_all(results, stats, progress)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_ingest_pubmed_file, p, self.PMID_LIMIT) for p in files]
+                self._merge_all((future.result() for future in as_completed(futures)), stats, progress)
+        return stats
+
+    def _merge_all(self, results, stats: Dict, progress=None):
+        for path, articles, counts in results:
+            self.merge(Path(path).name, articles, counts)
+            stats["files"] += 1
+            stats["articles"] += articles
+            if progress:
+                progress(Path(path).name, articles)
+
+    def merge(self, name: str, articles: int, counts: List[tuple]):
+        """Add one file's (key, count, pmids) rows to the index"""
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO authors VALUES (?, 0, '')", ((key,) for key, _, _ in counts))
+            # PMIDs are a bounded sample: stop appending once the column holds about PMID_LIMIT of them
+            self.conn.executemany(
+                "UPDATE authors SET count = count + ?, pmids = CASE "
+                "WHEN pmids = '' THEN ? WHEN length(pmids) >= ? THEN pmids ELSE pmids || ' ' || ? END "
+                "WHERE key = ?",
+                ((count, pmids, self.PMID_LIMIT * 9, pmids, key) for key, count, pmids in counts))
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                              (name, articles, datetime.now().isoformat(timespec="seconds")))
+
+    def lookup(self, doctor_name: str) -> Optional[Dict]:
+        """Publication count for a doctor, falling back to the LAST|INITIAL key"""
+        name = doctor_name_key(doctor_name)
+        if not name:
+            return None
+        last, first = name
+        if not first:
+            return None
+        for key, match in ((f"{last}|{first}", "full name"), (f"{last}|{first[0]}", "initial")):
+            row = self.conn.execute("SELECT count, pmids FROM authors WHERE key = ?", (key,)).fetchone()
+            if row:
+                return {"count": row[0], "pmids": row[1].split()[:self.PMID_LIMIT], "match": match}
+        return {"count": 0, "pmids": [], "match": None}
+
+    def stats(self) -> Dict:
+        files, articles = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(articles), 0) FROM files").fetchone()
+        authors = self.conn.execute("SELECT COUNT(*) FROM authors").fetchone()[0]
+        return {"files": files, "articles": articles, "author_keys": authors}
+
+    def close(self):
+        self.conn.close()
+
+
+class HospitalIndex:
+    """Index of CMS Hospital General Information and clinician facility affiliations
+
+    Hospitals are keyed by CMS Certification Number (CCN) and indexed by
+    state/city; affiliations are indexed by NPI and by LAST|FIRST name.
+    """
+
+    # Accepted header spellings for each field, across CMS file vintages
+    HOSPITAL_COLUMNS = {
+        "ccn": ("facility id", "provider id", "ccn"),
+        "name": ("facility name", "hospital name"),
+        "address": ("address",),
+        "city": ("city/town", "city"),
+        "state": ("state",),
+        "zip": ("zip code", "zip"),
+        "phone": ("telephone number", "phone number"),
+        "type": ("hospital type",),
+        "emergency": ("emergency services",),
+        "rating": ("hospital overall rating",),
+    }
+    AFFILIATION_COLUMNS = {
+        "npi": ("npi",),
+        "last": ("provider last name", "lst_nm"),
+        "first": ("provider first name", "frst_nm"),
+        "ccn": ("facility affiliations certification number", "hosp_afl_1"),
+        "facility_type": ("facility_type", "facility type"),
+    }
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hospitals (
+                ccn TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                address TEXT, city TEXT, state TEXT, zip TEXT, phone TEXT,
+                type TEXT, emergency TEXT, rating TEXT
+            );
+            CREATE INDEX IF NOT EXISTS hospitals_location ON hospitals (state, city);
+            CREATE TABLE IF NOT EXISTS affiliations (
+                npi TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                ccn TEXT NOT NULL,
+                facility_type TEXT,
+                PRIMARY KEY (npi, ccn)
+            );
+            CREATE INDEX IF NOT EXISTS affiliations_name ON affiliations (name_key);
+        """)
+
+    @staticmethod
+    def _columns(header: List[str], wanted: Dict[str, tuple], path) -> Dict[str, int]:
+        """Map field names to column positions, raising ValueError if a required one is missing"""
+        header = [h.strip().lower() for h in header]
+        found = {}
+        for field, names in wanted.items():
+            for name in names:
+                if name in header:
+                    found[field] = header.index(name)
+                    break
+        missing = [f for f in ("ccn", "name", "state", "npi") if f in wanted and f not in found]
+        if missing:
+            raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+        return found
+
+    def _import(self, path, wanted: Dict[str, tuple], table: str, make_row) -> int:
+        with open(path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.reader(f)
+            columns = self._columns(next(reader, []), wanted, path)
+            rows = (make_row({field: (parts[i].strip() if i < len(parts) else "")
+                              for field, i in columns.items()}) for parts in reader)
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {table}")
+                count = 0
+                for chunk in _chunked((row for row in rows if row), 5000):
+                    placeholders = ", ".join("?" * len(chunk[0]))
+                    self.conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", chunk)
+                    count += len(chunk)
+        return count
+
+    def import_hospitals(self, path) -> int:
+        """Replace the hospital table from a Hospital General Information CSV"""
+        def make_row(row):
+            if not row["ccn"]:
+                return None
+            return (row["ccn"].zfill(6), row["name"], row.get("address", ""), row.get("city", "").upper(),
+                    row["state"].upper(), row.get("zip", ""), row.get("phone", ""), row.get("type", ""),
+                    row.get("emergency", ""), row.get("rating", ""))
+        return self._import(path, self.HOSPITAL_COLUMNS, "hospitals", make_row)
+
+    def import_affiliations(self, path) -> int:
+        """Replace the affiliation table from a Doctors and Clinicians Facility Affiliation CSV"""
+        def make_row(row):
+            if not row["npi"] or not row.get("ccn"):
+                return None
+            name_key = f"{normalize_name_token(row.get('last', ''))}|{normalize_name_token(row.get('first', ''))}"
+            return row["npi"], name_key, row["ccn"].zfill(6), row.get("facility_type", "")
+        return self._import(path, self.AFFILIATION_COLUMNS, "affiliations", make_row)
+
+    def hospitals_in(self, state: str, city: str = "", limit: Optional[int] = None) -> List[Dict]:
+        """Hospitals in a state, optionally narrowed to a city"""
+        sql, params = "SELECT * FROM hospitals WHERE state = ?", [state.upper()]
+        if city:
+            sql += " AND city = ?"
+            params.append(city.upper())
+        sql += " ORDER BY name"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def affiliations(self, doctor_info: Dict) -> tuple:
+        """Affiliated hospitals for a doctor as (match, [hospital, ...])
+
+        Uses the roster's npi column when present, otherwise the doctor's name,
+        preferring hospitals in the doctor's state.
+        """
+        select = ("SELECT DISTINCT h.*, a.facility_type FROM affiliations a "
+                  "LEFT JOIN hospitals h ON h.ccn = a.ccn WHERE ")
+        npi = (doctor_info.get("npi") or "").strip()
+        if npi:
+            rows = self.conn.execute(select + "a.npi = ?", (npi,)).fetchall()
+            if rows:
+                return "npi", [dict(row) for row in rows if row["ccn"]]
+        name = doctor_name_key(doctor_info.get("doctor_name", ""))
+        if not name or not name[1]:
+            return None, []
+        rows = [dict(row) for row in self.conn.execute(select + "a.name_key = ?", ("|".join(name),)) if row["ccn"]]
+        state = (doctor_info.get("state") or "").upper()
+        in_state = [row for row in rows if row["state"] == state]
+        if in_state:
+            return "name+state", in_state
+        return ("name", rows) if rows else (None, [])
+
+    def stats(self) -> Dict:
+        return {
+            "hospitals": self.conn.execute("SELECT COUNT(*) FROM hospitals").fetchone()[0],
+            "affiliations": self.conn.execute("SELECT COUNT(*) FROM affiliations").fetchone()[0],
+            "clinicians": self.conn.execute("SELECT COUNT(DISTINCT npi) FROM affiliations").fetchone()[0],
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+# Bundled subset of the NUCC Health Care Provider Taxonomy (nucc.org):
+# (code, classification, specialization, search name, extra aliases)
+NUCC_TAXONOMY = [
+    ("207K00000X", "Allergy & Immunology", "", "Allergy and Immunology", ["allergist", "allergy", "immunology"]),
+    ("207L00000X", "Anesthesiology", "", "Anesthesiology", ["anesthesia", "anesthesiologist", "anaesthesiology"]),
+    ("207LP2900X", "Anesthesiology", "Pain Medicine", "Pain Medicine", ["pain management", "pain"]),
+    ("207N00000X", "Dermatology", "", "Dermatology", ["derm", "skin"]),
+    ("207P00000X", "Emergency Medicine", "", "Emergency Medicine", ["er", "ed", "emergency"]),
+    ("207Q00000X", "Family Medicine", "", "Family Medicine", ["family practice", "fp", "family doctor"]),
+    ("207QS0010X", "Family Medicine", "Sports Medicine", "Sports Medicine", ["sports"]),
+    ("207R00000X", "Internal Medicine", "", "Internal Medicine", ["im", "internist", "general internal medicine"]),
+    ("207RA0401X", "Internal Medicine", "Addiction Medicine", "Addiction Medicine", ["addiction"]),
+    ("207RC0000X", "Internal Medicine", "Cardiovascular Disease", "Cardiology",
+     ["cardio", "cardiologist", "heart", "cardiac", "cardiovascular"]),
+    ("207RC0001X", "Internal Medicine", "Clinical Cardiac Electrophysiology", "Cardiac Electrophysiology",
+     ["electrophysiology", "ep"]),
+    ("207RC0200X", "Internal Medicine", "Critical Care Medicine", "Critical Care Medicine",
+     ["critical care", "intensivist", "icu"]),
+    ("207RE0101X", "Internal Medicine", "Endocrinology, Diabetes & Metabolism", "Endocrinology",
+     ["endo", "endocrine", "diabetes"]),
+    ("207RG0100X", "Internal Medicine", "Gastroenterology", "Gastroenterology", ["gi", "gastro"]),
+    ("207RG0300X", "Internal Medicine", "Geriatric Medicine", "Geriatric Medicine", ["geriatrics", "geriatrician"]),
+    ("207RH0003X", "Internal Medicine", "Hematology & Oncology", "Hematology Oncology", ["hem onc", "hematology"]),
+    ("207RI0011X", "Internal Medicine", "Interventional Cardiology", "Interventional Cardiology", []),
+    ("207RI0200X", "Internal Medicine", "Infectious Disease", "Infectious Disease", ["id", "infectious"]),
+    ("207RN0300X", "Internal Medicine", "Nephrology", "Nephrology", ["kidney", "renal"]),
+    ("207RP1001X", "Internal Medicine", "Pulmonary Disease", "Pulmonology", ["pulmonary", "lung", "pulm"]),
+    ("207RR0500X", "Internal Medicine", "Rheumatology", "Rheumatology", ["rheum"]),
+    ("207RS0012X", "Internal Medicine", "Sleep Medicine", "Sleep Medicine", ["sleep"]),
+    ("207RT0003X", "Internal Medicine", "Transplant Hepatology", "Hepatology", ["liver", "transplant hepatology"]),
+    ("207RX0202X", "Internal Medicine", "Medical Oncology", "Oncology", ["onc", "cancer", "medical oncology"]),
+    ("207T00000X", "Neurological Surgery", "", "Neurosurgery", ["neurosurgery", "neurosurgeon", "brain surgery"]),
+    ("207U00000X", "Nuclear Medicine", "", "Nuclear Medicine", ["nuclear"]),
+    ("207V00000X", "Obstetrics & Gynecology", "", "Obstetrics and Gynecology", ["obgyn", "ob gyn", "ob", "obstetrics"]),
+    ("207VG0400X", "Obstetrics & Gynecology", "Gynecology", "Gynecology", ["gyn", "gynecologist"]),
+    ("207VM0101X", "Obstetrics & Gynecology", "Maternal & Fetal Medicine", "Maternal Fetal Medicine",
+     ["mfm", "perinatology", "high risk pregnancy"]),
+    ("207VE0102X", "Obstetrics & Gynecology", "Reproductive Endocrinology", "Reproductive Endocrinology",
+     ["fertility", "infertility", "ivf", "rei"]),
+    ("207VX0201X", "Obstetrics & Gynecology", "Gynecologic Oncology", "Gynecologic Oncology", ["gyn onc"]),
+    ("207W00000X", "Ophthalmology", "", "Ophthalmology", ["eye", "ophthalmologist", "eye surgeon"]),
+    ("207X00000X", "Orthopaedic Surgery", "", "Orthopedic Surgery",
+     ["ortho", "orthopedics", "orthopedic", "orthopaedics", "bone"]),
+    ("207XX0005X", "Orthopaedic Surgery", "Sports Medicine", "Orthopedic Sports Medicine", []),
+    ("207Y00000X", "Otolaryngology", "", "Otolaryngology", ["ent", "ear nose and throat", "ear nose throat"]),
+    ("207ZP0102X", "Pathology", "Anatomic Pathology & Clinical Pathology", "Pathology", ["pathologist"]),
+    ("208000000X", "Pediatrics", "", "Pediatrics", ["peds", "pediatric", "paediatrics", "children"]),
+    ("2080N0001X", "Pediatrics", "Neonatal-Perinatal Medicine", "Neonatology", ["neonatal", "nicu"]),
+    ("2080P0204X", "Pediatrics", "Pediatric Cardiology", "Pediatric Cardiology", ["peds cardiology"]),
+    ("208100000X", "Physical Medicine & Rehabilitation", "", "Physical Medicine and Rehabilitation",
+     ["pm r", "pmr", "physiatry", "rehab", "rehabilitation"]),
+    ("208200000X", "Plastic Surgery", "", "Plastic Surgery", ["plastics", "cosmetic surgery"]),
+    ("2084N0400X", "Psychiatry & Neurology", "Neurology", "Neurology", ["neuro"]),
+    ("2084P0800X", "Psychiatry & Neurology", "Psychiatry", "Psychiatry", ["psych", "mental health"]),
+    ("2084P0804X", "Psychiatry & Neurology", "Child & Adolescent Psychiatry", "Child and Adolescent Psychiatry",
+     ["child psychiatry"]),
+    ("2084P0805X", "Psychiatry & Neurology", "Geriatric Psychiatry", "Geriatric Psychiatry", []),
+    ("2085R0001X", "Radiology", "Radiation Oncology", "Radiation Oncology", ["rad onc", "radiation"]),
+    ("2085R0202X", "Radiology", "Diagnostic Radiology", "Radiology", ["radiologist", "imaging", "diagnostic radiology"]),
+    ("2085R0204X", "Radiology", "Vascular & Interventional Radiology", "Interventional Radiology", ["ir"]),
+    ("208600000X", "Surgery", "", "General Surgery", ["surgery", "surgeon", "general surgeon"]),
+    ("2086S0129X", "Surgery", "Vascular Surgery", "Vascular Surgery", ["vascular"]),
+    ("2086X0206X", "Surgery", "Surgical Oncology", "Surgical Oncology", []),
+    ("208G00000X", "Thoracic Surgery (Cardiothoracic Vascular Surgery)", "", "Cardiothoracic Surgery",
+     ["thoracic surgery", "heart surgery", "ct surgery", "cardiothoracic"]),
+    ("208800000X", "Urology", "", "Urology", ["uro"]),
+    ("208D00000X", "General Practice", "", "General Practice", ["gp", "general practitioner", "primary care"]),
+    ("208M00000X", "Hospitalist", "", "Hospitalist", ["hospital medicine"]),
+    ("363L00000X", "Nurse Practitioner", "", "Nurse Practitioner", ["np", "arnp", "aprn"]),
+    ("363A00000X", "Physician Assistant", "", "Physician Assistant", ["pa", "pa c"]),
+    ("152W00000X", "Optometrist", "", "Optometry", ["optometrist", "od", "eye doctor"]),
+    ("213E00000X", "Podiatrist", "", "Podiatry", ["podiatrist", "foot", "dpm"]),
+    ("122300000X", "Dentist", "", "Dentistry", ["dentist", "dental", "dds", "dmd"]),
+    ("1223S0112X", "Dentist", "Oral and Maxillofacial Surgery", "Oral and Maxillofacial Surgery",
+     ["oral surgery", "oral surgeon", "maxillofacial"]),
+    ("111N00000X", "Chiropractor", "", "Chiropractic", ["chiropractor", "chiro"]),
+    ("103T00000X", "Psychologist", "", "Psychology", ["psychologist"]),
+    ("225100000X", "Physical Therapist", "", "Physical Therapy", ["physical therapist", "pt", "physio"]),
+]
+
+
+class TaxonomyIndex:
+    """Maps free-text specialties to NUCC taxonomy codes
+
+    Exact phrases (labels, search names, aliases, codes) resolve through a
+    dict; anything else is matched word by word against a character prefix
+    trie, so lookup cost grows with the length of the input, not the table.
+    """
+
+    # Words that carry no specialty information
+    STOPWORDS = {"and", "of", "the", "dr", "doctor", "physician", "specialist", "md", "do"}
+
+    # Suffixes stripped before prefix matching ("cardiologist" -> "cardiolog")
+    SUFFIXES = ("ologist", "ician", "ist", "eon", "ics", "ic")
+
+    # Words shorter than this only match whole words, not prefixes
+    MIN_PREFIX = 4
+
+    def __init__(self, entries: List[tuple]):
+        self.entries = {}
+        self.phrases = {}
+        self.trie = {}
+        self._memo = {}
+        for code, classification, specialization, name, aliases in entries:
+            label = f"{classification}, {specialization}" if specialization else classification
+            self.entries[code] = {"code": code, "name": name, "label": label}
+            for term in [code, name, label, specialization or classification] + aliases:
+                self.phrases.setdefault(self.phrase(term), code)
+            # Words of the search name and aliases outweigh words that only appear in the NUCC label
+            for weight, terms in ((1, [label]), (2, [name] + aliases)):
+                for word in (w for term in terms for w in self.words(term)):
+                    self._insert(word, code, weight)
+
+    @classmethod
+    def phrase(cls, text: str) -> str:
+        """Lowercase, '&' -> 'and', punctuation collapsed to single spaces"""
+        text = text.lower().replace("&", " and ")
+        return " ".join("".join(ch if ch.isalnum() else " " for ch in text).split())
+
+    @classmethod
+    def words(cls, text: str) -> List[str]:
+        """Content words of a phrase with agent-noun suffixes stripped"""
+        words = []
+        for word in cls.phrase(text).split():
+            if word in cls.STOPWORDS:
+                continue
+            for suffix in cls.SUFFIXES:
+                if word.endswith(suffix) and len(word) - len(suffix) >= cls.MIN_PREFIX:
+                    word = word[:-len(suffix)]
+                    break
+            words.append(word)
+        return words
+
+    def __getstate__(self) -> Dict:
+        return {key: value for key, value in vars(self).items() if key != "_memo"}
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._memo = {}
+
+    def _insert(self, word: str, code: str, weight: int):
+        node = self.trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+            prefixed = node.setdefault(None, {})
+            prefixed[code] = max(prefixed.get(code, 0), weight)
+        whole = node.setdefault(True, {})
+        whole[code] = max(whole.get(code, 0), weight)
+
+    def _match(self, word: str) -> Dict[str, int]:
+        """{code: weight} for terms containing `word` (as a prefix once it is long enough)"""
+        node = self.trie
+        for ch in word:
+            node = node.get(ch)
+            if node is None:
+                return {}
+        return node.get(None if len(word) >= self.MIN_PREFIX else True, {})
+
+    def normalize(self, text: str) -> Optional[Dict]:
+        """{code, name, label} for a free-text specialty, or None if nothing matches"""
+        if text in self._memo:
+            return self._memo[text]
+        if not text or not text.strip():
+            return None
+        key = self.phrase(text)
+        code = self.phrases.get(key)
+        if not code:
+            scores, hits, matched = {}, {}, 0
+            for word in self.words(text):
+                found = self._match(word)
+                matched += bool(found)
+                for match, weight in found.items():
+                    scores[match] = scores.get(match, 0) + weight
+                    hits[match] = hits.get(match, 0) + 1
+            # Every recognised word must match; ties go to the most general (shortest) name
+            candidates = [c for c in scores if hits[c] == matched]
+            if candidates:
+                code = min(candidates, key=lambda c: (-scores[c], len(self.entries[c]["name"]), c))
+        found = self.entries.get(code) if code else None
+        if len(self._memo) < 10000:
+            self._memo[text] = found
+        return found
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in miles"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 7917.6 * math.asin(math.sqrt(a))
+
+
+class Gazetteer:
+    """ZIP centroid gazetteer with a city index and a lat/lon grid for radius searches
+
+    Built from the GeoNames US postal code file (US.txt, tab-separated).
+    """
+
+    # Grid cell size in degrees (about 35 miles of latitude)
+    CELL = 0.5
+
+    # Abbreviations expanded when normalizing city names
+    CITY_ABBREVIATIONS = {"ST": "SAINT", "STE": "SAINTE", "FT": "FORT", "MT": "MOUNT", "PT": "POINT"}
+
+    def __init__(self, zips: List[list], source: str = "", imported: str = ""):
+        self.zips = zips
+        self.source = source
+        self.imported = imported
+        self.by_zip = {}
+        self.by_city = {}
+        self.grid = {}
+        for i, (zip_code, city, state, lat, lon) in enumerate(zips):
+            self.by_zip[zip_code] = i
+            self.by_city.setdefault(f"{self.city_key(city)}|{state}", []).append(i)
+            self.grid.setdefault(self.cell(lat, lon), []).append(i)
+
+    @classmethod
+    def city_key(cls, city: str) -> str:
+        """Uppercase a city name, strip punctuation and expand ST/FT/MT abbreviations"""
+        words = "".join(ch if ch.isalnum() else " " for ch in city.upper()).split()
+        return " ".join(cls.CITY_ABBREVIATIONS.get(w, w) if i == 0 else w for i, w in enumerate(words))
+
+    @classmethod
+    def cell(cls, lat: float, lon: float) -> tuple:
+        return int(math.floor(lat / cls.CELL)), int(math.floor(lon / cls.CELL))
+
+    @classmethod
+    def from_geonames(cls, path) -> "Gazetteer":
+        """Import a GeoNames postal code dump (country, zip, place, state name, state code, ..., lat, lon)"""
+        zips = []
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) < 11 or not parts[9]:
+                    continue
+                try:
+                    zips.append([parts[1], parts[2], parts[4].upper(), float(parts[9]), float(parts[10])])
+                except ValueError:
+                    continue
+        if not zips:
+            raise ValueError(f"{path} has no GeoNames postal code rows")
+        return cls(zips, source=str(path), imported=datetime.now().isoformat())
+
+    def save(self, path: Path):
+        """Write the gazetteer to disk"""
+        with locked(path):
+            atomic_write(path, json.dumps({"source": self.source, "imported": self.imported, "zips": self.zips},
+                                          separators=(",", ":")))
+
+    @classmethod
+    def load(cls, path: Path) -> "Gazetteer":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["zips"], data.get("source", ""), data.get("imported", ""))
+
+    def lookup_zip(self, zip_code: str) -> Optional[list]:
+        """[zip, city, state, lat, lon] for a ZIP (ZIP+4 accepted)"""
+        i = self.by_zip.get(zip_code.strip()[:5].zfill(5)) if zip_code.strip() else None
+        return self.zips[i] if i is not None else None
+
+    def city_zips(self, city: str, state: str) -> List[list]:
+        return [self.zips[i] for i in self.by_city.get(f"{self.city_key(city)}|{state.upper()}", ())]
+
+    def normalize(self, doctor_info: Dict) -> tuple:
+        """Validate a row's city/state/zip, returning (status, corrected fields)
+
+        status is "ok", "corrected" (spelling/case fixed or filled from the ZIP)
+        or "unknown" (not in the gazetteer).
+        """
+        city, state = doctor_info.get("city", ""), doctor_info.get("state", "").upper()
+        zip_entry = self.lookup_zip(doctor_info.get("zip", ""))
+        if zip_entry and not city:
+            return "corrected", {"city": zip_entry[1], "state": zip_entry[2]}
+        matches = self.city_zips(city, state) if city else []
+        if not matches:
+            return ("ok", {}) if not city and state else ("unknown", {})
+        canonical = matches[0][1]
+        return ("ok", {}) if canonical == city else ("corrected", {"city": canonical})
+
+    def near(self, lat: float, lon: float, miles: float) -> List[tuple]:
+        """(distance, zip entry) pairs within `miles` of a point, nearest first"""
+        lat_span = miles / 69.0
+        lon_span = miles / max(69.0 * math.cos(math.radians(lat)), 1.0)
+        low, high = self.cell(lat - lat_span, lon - lon_span), self.cell(lat + lat_span, lon + lon_span)
+        found = []
+        for row in range(low[0], high[0] + 1):
+            for col in range(low[1], high[1] + 1):
+                for i in self.grid.get((row, col), ()):
+                    entry = self.zips[i]
+                    distance = haversine_miles(lat, lon, entry[3], entry[4])
+                    if distance <= miles:
+                        found.append((distance, entry))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+class ProviderIndex:
+    """Local provider table built from the NPPES full replacement file, indexed by ZIP"""
+
+    # NPPES column names for each stored field
+    NPPES_COLUMNS = {
+        "npi": "NPI",
+        "entity": "Entity Type Code",
+        "last": "Provider Last Name (Legal Name)",
+        "first": "Provider First Name",
+        "credential": "Provider Credential Text",
+        "address": "Provider First Line Business Practice Location Address",
+        "city": "Provider Business Practice Location Address City Name",
+        "state": "Provider Business Practice Location Address State Name",
+        "zip": "Provider Business Practice Location Address Postal Code",
+        "phone": "Provider Business Practice Location Address Telephone Number",
+        "deactivated": "NPI Deactivation Date",
+        "reactivated": "NPI Reactivation Date",
+    }
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS providers (
+                npi TEXT PRIMARY KEY,
+                last TEXT, first TEXT, credential TEXT, taxonomy TEXT,
+                address TEXT, city TEXT, state TEXT, zip5 TEXT, phone TEXT
+            );
+            CREATE INDEX IF NOT EXISTS providers_zip ON providers (zip5);
+        """)
+        # Indexes from before updates were keyed by time kept one row per name; upgrade them in place
+        if [info[1] for info in self.conn.execute("PRAGMA table_info(updates)") if info[5]] == ["name"]:
+            with self.conn:
+                self.conn.execute("ALTER TABLE updates RENAME TO updates_by_name")
+                self.create_updates()
+                self.conn.execute("INSERT INTO updates SELECT * FROM updates_by_name")
+                self.conn.execute("DROP TABLE updates_by_name")
+        self.create_updates()
+
+    def create_updates(self):
+        """The log of applied weekly files, one row per application"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS updates (
+                name TEXT NOT NULL,
+                applied TEXT NOT NULL,
+                upserted INTEGER NOT NULL,
+                removed INTEGER NOT NULL,
+                PRIMARY KEY (name, applied)
+            )
+        """)
+
+    @classmethod
+    def columns(cls, header: List[str]) -> Dict:
+        """Column positions of the stored fields and of the 15 taxonomy/primary-switch pairs"""
+        position = {name: i for i, name in enumerate(header)}
+        missing = [name for name in cls.NPPES_COLUMNS.values() if name not in position]
+        if missing:
+            raise ValueError(f"Not an NPPES file (missing columns: {', '.join(missing[:3])})")
+        taxonomies = [(position[f"Healthcare Provider Taxonomy Code_{n}"],
+                       position[f"Healthcare Provider Primary Taxonomy Switch_{n}"])
+                      for n in range(1, 16) if f"Healthcare Provider Taxonomy Code_{n}" in position]
+        return {"fields": {field: position[name] for field, name in cls.NPPES_COLUMNS.items()},
+                "taxonomies": taxonomies}
+
+    @staticmethod
+    def parse_row(parts: List[str], columns: Dict) -> Optional[tuple]:
+        """Provider table row for an NPPES record, or None for organizations and deactivated NPIs"""
+        get = {field: parts[i] for field, i in columns["fields"].items()}
+        if get["entity"] != "1" or (get["deactivated"] and not get["reactivated"]):
+            return None
+        codes = [(parts[code], parts[switch]) for code, switch in columns["taxonomies"] if parts[code]]
+        taxonomy = next((code for code, switch in codes if switch == "Y"), codes[0][0] if codes else "")
+        return (get["npi"], get["last"], get["first"], get["credential"], taxonomy, get["address"],
+                get["city"], get["state"], get["zip"][:5], get["phone"])
+
+    def import_nppes(self, path, progress=None) -> int:
+        """Replace the provider table from an NPPES npidata_pfile CSV, streaming it"""
+        count = 0
+        with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.reader(f)
+            columns = self.columns(next(reader, []))
+            rows = (self.parse_row(parts, columns) for parts in reader)
+            with self.conn:
+                self.conn.execute("DELETE FROM providers")
+                self.conn.execute("DELETE FROM updates")
+                for chunk in _chunked((row for row in rows if row), 10000):
+                    self.conn.executemany("INSERT OR REPLACE INTO providers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", chunk)
+                    count += len(chunk)
+                    if progress:
+                        progress(count)
+        return count
+
+    @staticmethod
+    def read_deactivations(path) -> List[str]:
+        """NPIs from a deactivation report saved as CSV/text (NPI in the first column)"""
+        with open(path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            return [parts[0].strip() for parts in csv.reader(f)
+                    if parts and parts[0].strip().isdigit() and len(parts[0].strip()) == 10]
+
+    def apply_update(self, path=None, deactivations: Optional[List[str]] = None) -> Dict[str, int]:
+        """Apply a weekly NPPES incremental file and/or deactivated NPIs in one transaction
+
+        Rows in the weekly file replace the stored provider; rows that are now
+        deactivated or not individuals remove it. Nothing is written if any
+        part of the file fails to parse.
+        """
+        stats = {"upserted": 0, "removed": 0}
+        with self.conn:
+            if path:
+                with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+                    reader = csv.reader(f)
+                    columns = self.columns(next(reader, []))
+                    npi_column = columns["fields"]["npi"]
+                    for chunk in _chunked(reader, 10000):
+                        upserts, removals = [], []
+                        for parts in chunk:
+                            row = self.parse_row(parts, columns)
+                            if row:
+                                upserts.append(row)
+                            else:
+                                removals.append((parts[npi_column],))
+                        self.conn.executemany("INSERT OR REPLACE INTO providers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                              upserts)
+                        removed = self.conn.executemany("DELETE FROM providers WHERE npi = ?", removals).rowcount
+                        stats["upserted"] += len(upserts)
+                        stats["removed"] += max(removed, 0)
+            if deactivations:
+                removed = self.conn.executemany("DELETE FROM providers WHERE npi = ?",
+                                                ((npi,) for npi in deactivations)).rowcount
+                stats["removed"] += max(removed, 0)
+            # Every application is kept; a clash can only mean the same update recorded twice at once
+            self.conn.execute("INSERT INTO updates VALUES (?, ?, ?, ?)",
+                              (Path(path).name if path else "deactivations",
+                               datetime.now().isoformat(timespec="microseconds"), stats["upserted"], stats["removed"]))
+        return stats
+
+    def applied_updates(self) -> List[tuple]:
+        """(file name, applied, upserted, removed) for every weekly file applied, newest first"""
+        return self.conn.execute("SELECT * FROM updates ORDER BY applied DESC").fetchall()
+
+    def within(self, gazetteer: Gazetteer, zip_code: str, miles: float, taxonomy: str = "",
+               limit: Optional[int] = None) -> List[Dict]:
+        """Providers practicing within `miles` of a ZIP centroid, nearest first"""
+        origin = gazetteer.lookup_zip(zip_code)
+        if not origin:
+            raise KeyError(f"Unknown ZIP code: {zip_code}")
+        distances = {entry[0]: distance for distance, entry in gazetteer.near(origin[3], origin[4], miles)}
+        found = []
+        for chunk in _chunked(distances, 500):
+            sql = f"SELECT * FROM providers WHERE zip5 IN ({', '.join('?' * len(chunk))})"
+            params = list(chunk)
+            if taxonomy:
+                sql += " AND taxonomy LIKE ?"
+                params.append(taxonomy + "%")
+            for row in self.conn.execute(sql, params):
+                found.append({**dict(row), "miles": round(distances[row["zip5"]], 1)})
+        found.sort(key=lambda provider: (provider["miles"], provider["last"], provider["first"]))
+        return found[:limit] if limit else found
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM providers").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class HistoryIndex:
+    """Queryable SQLite archive of the search history
+
+    The JSONL history file is the append log and is compacted to recent
+    entries; sync() ingests whatever was appended since the last sync, so
+    the archive keeps every search. Doctor names are split into normalized
+    tokens in an inverted index, and state, type and timestamp each have an
+    index ordered by time, so filtered queries stay fast at millions of rows.
+    """
+
+    # Filter keywords accepted by parse_filter()
+    FILTER_KEYS = ("state", "type", "since", "until")
+
+    # A name token matching fewer entries than this drives a query through the inverted index;
+    # for commoner names, limited queries check each row while walking the timestamp order instead
+    DRIVER_LIMIT = 2000
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT, type TEXT, state TEXT, doctor_name TEXT,
+                tokens TEXT NOT NULL,
+                entry TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+            CREATE INDEX IF NOT EXISTS entries_state ON entries (state, timestamp);
+            CREATE INDEX IF NOT EXISTS entries_type ON entries (type, timestamp);
+            CREATE TABLE IF NOT EXISTS tokens (
+                token TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                PRIMARY KEY (token, id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS synced (
+                path TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL
+            );
+        """)
+
+    @staticmethod
+    def tokens(doctor_name: str) -> List[str]:
+        """Normalized name tokens, without titles and suffixes"""
+        tokens = (normalize_name_token(t) for t in (doctor_name or "").replace(",", " ").split())
+        return sorted({t for t in tokens if t and t not in NAME_NOISE})
+
+    @classmethod
+    def parse_filter(cls, text: str) -> Dict:
+        """Split "smith state:TX since:2026-09-01" into query() keyword arguments"""
+        filters, words = {}, []
+        for word in text.split():
+            key, sep, value = word.partition(":")
+            if sep and key.lower() in cls.FILTER_KEYS:
+                filters[key.lower()] = value.upper() if key.lower() == "state" else value
+            else:
+                words.append(word)
+        filters["name"] = " ".join(words)
+        return filters
+
+    def _ingest(self, path: Path, offset: int) -> tuple:
+        """Index complete lines of `path` from byte `offset`; returns (new offset, entries added)"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        row_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+        entries, postings = [], []
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            row_id += 1
+            tokens = self.tokens(entry.get("doctor_name") or "")
+            entries.append((row_id, entry.get("timestamp", ""), entry.get("type", ""),
+                            (entry.get("state") or "").upper(), entry.get("doctor_name", ""),
+                            " " + " ".join(tokens) + " ", line.decode('utf-8')))
+            postings.extend((token, row_id) for token in tokens)
+        self.conn.executemany("INSERT INTO entries (id, timestamp, type, state, doctor_name, tokens, entry) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+        self.conn.executemany("INSERT INTO tokens (token, id) VALUES (?, ?)", postings)
+        return offset + end, len(entries)
+
+    def sync(self, path: Path, keep: Optional[int] = None) -> int:
+        """Index entries appended to the history file since the last sync; returns how many were added
+
+        With `keep`, the file is then compacted to its last `keep` entries in
+        the same transaction, so no other process can index them twice.
+        """
+        key = str(path)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT offset FROM synced WHERE path = ?", (key,)).fetchone()
+            offset = row[0] if row else 0
+            size = path.stat().st_size if path.exists() else 0
+            if size < offset:
+                # Rewritten outside of a compaction (e.g. restored); index it again from the start
+                offset = 0
+            added = 0
+            if size > offset:
+                offset, added = self._ingest(path, offset)
+            if keep is not None and path.exists():
+                lines = [line for line in path.read_bytes().splitlines() if line.strip()]
+                kept = []
+                for line in reversed(lines):
+                    if len(kept) == keep:
+                        break
+                    try:
+                        json.loads(line)
+                    except ValueError:
+                        continue
+                    kept.append(line.decode('utf-8'))
+                text = "".join(line + "\n" for line in reversed(kept))
+                atomic_write(path, text)
+                offset = len(text.encode('utf-8'))
+            self.conn.execute("INSERT OR REPLACE INTO synced (path, offset) VALUES (?, ?)", (key, offset))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def query(self, name: str = "", state: str = "", type: str = "", since: str = "", until: str = "",
+              limit: int = 50) -> List[Dict]:
+        """Newest entries matching every given filter
+
+        Name words match as token prefixes ("smi" finds Smith); `since` and
+        `until` are ISO dates or timestamps, both inclusive.
+        """
+        sql, params = "SELECT entry FROM entries WHERE 1", []
+        tokens = self.tokens(name)
+        if tokens:
+            counts = {token: self.conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM tokens WHERE token >= ? AND token < ? LIMIT ?)",
+                (token, token + "\uffff", self.DRIVER_LIMIT)).fetchone()[0] for token in tokens}
+            driver = min(tokens, key=counts.get)
+            if counts[driver] < self.DRIVER_LIMIT or not limit:
+                sql += " AND id IN (SELECT id FROM tokens WHERE token >= ? AND token < ?)"
+                params += [driver, driver + "\uffff"]
+                tokens.remove(driver)
+        for token in tokens:
+            sql += " AND instr(tokens, ?) > 0"
+            params.append(" " + token)
+        if state:
+            sql += " AND state = ?"
+            params.append(state.upper())
+        if type:
+            sql += " AND type = ?"
+            params.append(type)
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND timestamp < ?"
+            params.append(until + "\uffff")
+        sql += " ORDER BY timestamp DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(entry) for (entry,) in self.conn.execute(sql, params)]
+
+    def clear(self):
+        """Forget every archived entry"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("DELETE FROM tokens")
+        self.conn.execute("DELETE FROM entries")
+        self.conn.execute("DELETE FROM synced")
+        self.conn.execute("COMMIT")
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class PrefixIndex:
+    """Frequency-ranked prefix completion over a sorted array of keys
+
+    Keys are lowercased with a leading "Dr." dropped, so the candidates for a
+    prefix are the slice between two bisects; only that slice is ranked by
+    weight, and rankings of very large slices (short prefixes) are memoized.
+    """
+
+    # Slices longer than this have their ranking cached
+    SCAN_LIMIT = 256
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        merged = {}
+        for value, weight in (weights or {}).items():
+            key = self.key(value)
+            if not key:
+                continue
+            shown, total = merged.get(key, (value, 0))
+            merged[key] = (shown, total + weight)
+        self.keys = sorted(merged)
+        self.values = [merged[key][0] for key in self.keys]
+        self.weights = [merged[key][1] for key in self.keys]
+        self.cache = {}
+
+    @staticmethod
+    def key(text: str) -> str:
+        text = " ".join(text.lower().split())
+        for title in ("dr. ", "dr "):
+            if text.startswith(title):
+                return text[len(title):]
+        return text
+
+    def add(self, value: str, weight: float = 1):
+        """Count another use of `value`, inserting it if new"""
+        key = self.key(value)
+        if not key:
+            return
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            self.weights[i] += weight
+        else:
+            self.keys.insert(i, key)
+            self.values.insert(i, value)
+            self.weights.insert(i, weight)
+        self.cache.clear()
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """The heaviest values starting with `prefix` (case-insensitive)"""
+        key = self.key(prefix)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + "\uffff", lo)
+        if hi - lo > self.SCAN_LIMIT and (key, limit) in self.cache:
+            return self.cache[(key, limit)]
+        ranked = [self.values[i] for i in heapq.nlargest(limit, range(lo, hi), key=self.weights.__getitem__)]
+        if hi - lo > self.SCAN_LIMIT:
+            self.cache[(key, limit)] = ranked
+        return ranked
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
 class DoctorDork:
     """Main application class for DoctorDork"""
 
     VERSION = "2.1.0"
     CONFIG_FILE = Path.home() / ".doctordork_config.json"
-    HISTORY_FILE = Path.home() / ".doctordork_history.json"
+    HISTORY_FILE = Path.home() / ".doctordork_history.jsonl"
+    LEGACY_HISTORY_FILE = Path.home() / ".doctordork_history.json"
+    RESULTS_DB = Path.home() / ".doctordork_results.db"
+    NPI_CACHE_DB = Path.home() / ".doctordork_npi_cache.db"
+    LEIE_INDEX_FILE = Path.home() / ".doctordork_leie.json"
+    PUBMED_INDEX_DB = Path.home() / ".doctordork_pubmed.db"
+    HOSPITALS_DB = Path.home() / ".doctordork_hospitals.db"
+    GAZETTEER_FILE = Path.home() / ".doctordork_gazetteer.json"
+    PROVIDERS_DB = Path.home() / ".doctordork_providers.db"
+    HISTORY_DB = Path.home() / ".doctordork_history.db"
+    PLATFORMS_FILE = Path.home() / ".doctordork_platforms.json"
+    SNAPSHOT_FILE = Path.home() / ".doctordork_snapshot.bin"
+    LINK_HEALTH_FILE = Path.home() / ".doctordork_link_health.json"
+
+    # Rank of each link-health label when ordering sweep results
+    HEALTH_RANK = {"ok": 0, "blocked": 1, None: 2, "broken": 3, "down": 4}
+
+    DEFAULT_CONFIG = {
+        "auto_open_browser": True,
+        "export_format": "html",
+        "save_history": True,
+        "show_progress": True,
+        "npi_lookup": False,
+        "npi_api_url": "",
+        "link_check_host": "",
+    }
+
+    # Enrichment categories and the methods that produce their [label, value] rows
+    ENRICHERS = {
+        "npi_registry": "enrich_npi",
+        "oig_exclusions": "enrich_exclusions",
+        "pubmed_index": "enrich_publications",
+        "cms_affiliations": "enrich_hospitals",
+    }
+
+    # Rows generated between batch checkpoints
+    CHECKPOINT_INTERVAL = 500
+
+    # Rows per work-queue chunk in distributed runs, and how often idle workers/coordinators poll
+    CHUNK_SIZE = 5000
+    WORKER_POLL_INTERVAL = 2.0
+
+    # Searches kept in memory and in the append-only file, which is compacted to this once it
+    # passes the byte limit (older searches stay queryable in the history index)
+    HISTORY_LIMIT = 100
+    HISTORY_COMPACT_BYTES = 1 << 20
+
+    # Weight of a past search relative to one directory entry when ranking completions
+    HISTORY_COMPLETION_WEIGHT = 1000
 
     # Medical board URLs for all 51 US jurisdictions
     MEDICAL_BOARDS = {
@@ -173,72 +3099,352 @@ class DoctorDork:
         "MyChart Epic": "https://www.mychartonline.com/",
     }
 
+    # Built-in module table; replaceable via the "modules_file" setting or --modules
+    MODULES = [
+        {
+            "name": "medicare_participation_lookup",
+            "key": "medicare_lookup",
+            "title": "MEDICARE PARTICIPATION LOOKUP",
+            "description": "Checking Medicare participation",
+            "intro": "Checking Medicare participation for",
+            "platforms": MEDICARE_LOOKUP,
+            "enrichment": "npi_registry",
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "These databases show:",
+            "bullets": ["Medicare enrollment status", "National Provider Identifier (NPI)",
+                        "Practice locations and credentials", "Medicare patient ratings"],
+            "prompt": "Open Medicare lookup sites?",
+        },
+        {
+            "name": "publication_search",
+            "key": "publication_search",
+            "title": "PUBLICATION SEARCH",
+            "description": "Searching publications",
+            "intro": "Searching publications for",
+            "platforms": PUBLICATION_LOOKUP,
+            "enrichment": "pubmed_index",
+            "required": ["doctor_name"],
+            "width": 20,
+            "summary": "Publication databases show:",
+            "bullets": ["Research papers and studies", "Citations and impact metrics",
+                        "Areas of medical expertise", "Academic contributions"],
+            "prompt": "Open publication databases?",
+        },
+        {
+            "name": "specialty_verification",
+            "key": "specialty_verification",
+            "title": "SPECIALTY BOARD VERIFICATION",
+            "description": "Verifying specialty certifications",
+            "intro": "Verifying board certifications for",
+            "platforms": SPECIALTY_VERIFICATION,
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "Board certification databases show:",
+            "bullets": ["ABMS board certifications (24+ specialties)", "AOA osteopathic certifications",
+                        "Certification status and expiration", "Subspecialty certifications"],
+            "note": "Note: Searching for specialty: {specialty}",
+            "prompt": "Open certification databases?",
+        },
+        {
+            "name": "education_training_lookup",
+            "key": "education_lookup",
+            "title": "EDUCATION & TRAINING LOOKUP",
+            "description": "Looking up education & training",
+            "intro": "Looking up education & training for",
+            "platforms": EDUCATION_LOOKUP,
+            "required": ["doctor_name"],
+            "width": 20,
+            "summary": "Education databases show:",
+            "bullets": ["Medical school attended", "Residency and fellowship training",
+                        "Year of graduation", "Professional credentials"],
+            "prompt": "Open education databases?",
+        },
+        {
+            "name": "hospital_affiliations_lookup",
+            "key": "hospital_affiliations",
+            "title": "HOSPITAL AFFILIATIONS LOOKUP",
+            "description": "Checking hospital affiliations",
+            "intro": "Looking up hospital affiliations for",
+            "platforms": HOSPITAL_AFFILIATIONS,
+            "enrichment": "cms_affiliations",
+            "required": ["doctor_name"],
+            "width": 35,
+            "summary": "Hospital affiliation data shows:",
+            "bullets": ["Primary hospital affiliations", "Admitting privileges",
+                        "Practice locations", "Hospital quality ratings"],
+            "prompt": "Open hospital affiliation sites?",
+        },
+        {
+            "name": "insurance_acceptance_lookup",
+            "key": "insurance_acceptance",
+            "title": "INSURANCE ACCEPTANCE LOOKUP",
+            "description": "Looking up insurance acceptance",
+            "intro": "Checking insurance acceptance for",
+            "platforms": INSURANCE_ACCEPTANCE,
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "Insurance information shows:",
+            "bullets": ["Accepted insurance plans", "Medicare/Medicaid participation",
+                        "In-network vs out-of-network", "Payment policies"],
+            "prompt": "Open insurance lookup sites?",
+        },
+        {
+            "name": "language_support_lookup",
+            "key": "language_support",
+            "title": "LANGUAGE SUPPORT LOOKUP",
+            "description": "Checking language support",
+            "intro": "Looking up languages spoken by",
+            "platforms": LANGUAGE_SUPPORT,
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "Language information shows:",
+            "bullets": ["Languages spoken by doctor", "Interpreter services available",
+                        "Multilingual office staff", "Translation services"],
+            "prompt": "Open language lookup sites?",
+        },
+        {
+            "name": "telemedicine_options_lookup",
+            "key": "telemedicine_options",
+            "title": "TELEMEDICINE OPTIONS LOOKUP",
+            "description": "Finding telemedicine options",
+            "intro": "Checking telemedicine options for",
+            "platforms": TELEMEDICINE_OPTIONS,
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "Telemedicine platforms show:",
+            "bullets": ["Virtual visit availability", "Video consultation platforms",
+                        "Online prescription services", "Remote patient monitoring"],
+            "prompt": "Open telemedicine sites?",
+        },
+        {
+            "name": "appointment_booking_links",
+            "key": "appointment_booking",
+            "title": "APPOINTMENT BOOKING LINKS",
+            "description": "Getting appointment booking links",
+            "intro": "Finding appointment booking options for",
+            "platforms": APPOINTMENT_BOOKING,
+            "required": ["doctor_name"],
+            "width": 30,
+            "summary": "Booking platforms provide:",
+            "bullets": ["Online appointment scheduling", "Patient portal access",
+                        "Same-day appointment availability", "Waitlist notifications"],
+            "note": "Note: Real-time availability varies by practice.",
+            "prompt": "Open booking sites?",
+        },
+        {
+            "name": "review_aggregation",
+            "key": "review_aggregation",
+            "title": "REVIEW AGGREGATION",
+            "description": "Aggregating reviews",
+            "intro": "Searching 5 review platforms for",
+            "platforms": REVIEW_PLATFORMS,
+            "required": ["doctor_name"],
+            "width": 15,
+            "prompt": "Open all review sites?",
+        },
+        {
+            "name": "social_media_search",
+            "key": "social_media",
+            "title": "SOCIAL MEDIA SEARCH",
+            "description": "Searching social media",
+            "intro": "Searching 3 social platforms for",
+            "history_type": "social_media_search",
+            "platforms": SOCIAL_PLATFORMS,
+            "required": ["doctor_name"],
+            "width": 15,
+            "prompt": "Open all social media sites?",
+        },
+    ]
+
     def __init__(self):
         """Initialize DoctorDork application"""
+        self.output_lock = threading.Lock()
         self.config = self.load_config()
         self.history = self.load_history()
         self.search_results = {}
+        self.screen = Screen()
+        self.medical_boards = dict(self.MEDICAL_BOARDS)
+        self.snapshot = Snapshot(self.SNAPSHOT_FILE)
+        self.modules = self.load_modules()
+        self.platform_lock = threading.RLock()
+        self.watch_platforms = True
+        self._exclusions = None
+        self._gazetteer = None
+        self._completions = {}
+        self._completions_loading = None
+        self.taxonomy = self.load_taxonomy()
+        self.platform_overrides = PlatformOverrides(self.PLATFORMS_FILE)
+        self.refresh_platforms()
 
     def load_config(self) -> Dict:
         """Load configuration from file"""
-        default_config = {
-            "auto_open_browser": True,
-            "export_format": "html",
-            "save_history": True,
-            "show_progress": True,
-        }
-
         if self.CONFIG_FILE.exists():
             try:
                 with open(self.CONFIG_FILE, 'r') as f:
-                    return {**default_config, **json.load(f)}
-            except:
-                return default_config
-        return default_config
-
-    def save_config(self):
-        """Save configuration to file"""
+                    return {**self.DEFAULT_CONFIG, **json.load(f)}
+            except (OSError, ValueError) as e:
+                self.print_warning(f"Could not read {self.CONFIG_FILE} ({e}); using default settings.")
+                return dict(self.DEFAULT_CONFIG)
+        return dict(self.DEFAULT_CONFIG)
+
+    def load_modules(self, path: Optional[str] = None) -> ModuleRegistry:
+        """Load and compile the module table (built-in unless a modules file is configured)"""
+        path = path or self.config.get("modules_file")
+        if path:
+            path = os.path.expanduser(path)
+            try:
+                st = os.stat(path)
+                key = Snapshot.key(ModuleRegistry, os.path.abspath(path), st.st_mtime_ns, st.st_size)
+                return self.snapshot.get("modules_file", key, ModuleRegistry, lambda: ModuleRegistry.from_file(path))
+            except (OSError, ValueError) as e:
+                self.print_error(f"Could not load modules file {path}: {e}")
+                self.print_warning("Falling back to the built-in module table.")
+        return self.snapshot.get("modules", Snapshot.key(ModuleRegistry, self.MODULES), ModuleRegistry,
+                                 lambda: ModuleRegistry(self.MODULES))
+
+    def load_taxonomy(self) -> TaxonomyIndex:
+        """Load the NUCC taxonomy index from the snapshot, building it if the table changed"""
+        return self.snapshot.get("taxonomy", Snapshot.key(TaxonomyIndex, NUCC_TAXONOMY), TaxonomyIndex,
+                                 lambda: TaxonomyIndex(NUCC_TAXONOMY))
+
+    def refresh_platforms(self, force: bool = False) -> bool:
+        """Merge the platform overrides file over the built-in tables if it changed
+
+        Called before each search; does nothing while watch_platforms is off
+        (server mode reloads from a single timer thread instead) unless forced.
+        """
+        if not (self.watch_platforms or force):
+            return False
+        return self.reload_platforms(force)
+
+    def reload_platforms(self, force: bool = False) -> bool:
+        """Poll the platform overrides file and install its tables, returning True if it reloaded
+
+        Reloads are serialized and the module registry is rebuilt on a copy
+        and swapped in, so searches running meanwhile see the old or the new
+        table, never a mix.
+        """
+        with self.platform_lock:
+            try:
+                overrides = self.platform_overrides.poll(force)
+                if overrides is None:
+                    return False
+                boards = PlatformOverrides.merge_boards(self.MEDICAL_BOARDS, overrides.get("medical_boards") or {})
+                modules = copy.copy(self.modules)
+                compiled = modules.apply_overrides(overrides.get("modules") or {})
+            except (OSError, ValueError) as e:
+                self.print_error(f"Ignoring platform overrides in {self.PLATFORMS_FILE}: {e}")
+                return False
+            self.modules = modules
+            self.medical_boards = boards
+            if overrides:
+                self.print_info(f"Loaded platform overrides ({compiled} template(s) recompiled)")
+            return True
+
+    def save_config(self, *keys: str):
+        """Save configuration to file
+
+        With `keys`, only those settings are written over the file's current
+        contents, so changes saved meanwhile by other instances are kept.
+        """
         try:
-            with open(self.CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            with locked(self.CONFIG_FILE):
+                saved = {}
+                if keys and self.CONFIG_FILE.exists():
+                    try:
+                        with open(self.CONFIG_FILE, 'r') as f:
+                            saved = json.load(f)
+                    except ValueError:
+                        saved = {}
+                saved.update({key: self.config[key] for key in keys} if keys else self.config)
+                atomic_write(self.CONFIG_FILE, json.dumps(saved, indent=4))
+            self.config = {**self.DEFAULT_CONFIG, **saved}
             self.print_success("Configuration saved successfully!")
         except Exception as e:
             self.print_error(f"Error saving configuration: {e}")
 
-    def load_history(self) -> List[Dict]:
-        """Load search history from file"""
+    def read_history_file(self) -> List[Dict]:
+        """Every readable entry of the history file, skipping lines cut short by a crash"""
+        entries, unreadable = [], 0
         if self.HISTORY_FILE.exists():
+            with open(self.HISTORY_FILE, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        unreadable += 1
+        if unreadable:
+            self.print_warning(f"Skipped {unreadable} unreadable line(s) in {self.HISTORY_FILE}")
+        return entries
+
+    def migrate_history(self):
+        """Convert the old single-document history file to the append-only format"""
+        if not self.LEGACY_HISTORY_FILE.exists():
+            return
+        with locked(self.HISTORY_FILE):
+            if not self.LEGACY_HISTORY_FILE.exists():
+                return
             try:
-                with open(self.HISTORY_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                with open(self.LEGACY_HISTORY_FILE, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except (OSError, ValueError) as e:
+                self.print_warning(f"Could not migrate {self.LEGACY_HISTORY_FILE}: {e}")
+                return
+            current = self.HISTORY_FILE.read_text(encoding='utf-8') if self.HISTORY_FILE.exists() else ""
+            atomic_write(self.HISTORY_FILE, "".join(json.dumps(entry) + "\n" for entry in legacy) + current)
+            self.LEGACY_HISTORY_FILE.unlink()
+
+    def load_history(self) -> List[Dict]:
+        """Load search history from file"""
+        try:
+            self.migrate_history()
+            return self.read_history_file()[-self.HISTORY_LIMIT:]
+        except OSError as e:
+            self.print_warning(f"Could not read search history: {e}")
+            return []
 
     def save_history(self, search_data: Dict):
-        """Save search to history"""
+        """Append a search to history
+
+        Each entry is one line appended under a file lock, so concurrent
+        instances never overwrite each other's entries.
+        """
         if not self.config.get("save_history", True):
             return
 
         search_data["timestamp"] = datetime.now().isoformat()
         self.history.append(search_data)
-
-        # Keep only last 100 searches
-        self.history = self.history[-100:]
+        self.history = self.history[-self.HISTORY_LIMIT:]
 
         try:
-            with open(self.HISTORY_FILE, 'w') as f:
-                json.dump(self.history, f, indent=4)
+            with locked(self.HISTORY_FILE):
+                with open(self.HISTORY_FILE, 'a+b') as f:
+                    # Terminate a line left incomplete by a crash so it doesn't swallow this entry
+                    if f.seek(0, os.SEEK_END):
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            f.write(b"\n")
+                    f.write((json.dumps(search_data) + "\n").encode('utf-8'))
+                if self.HISTORY_FILE.stat().st_size > self.HISTORY_COMPACT_BYTES:
+                    # Archive everything in the history index before trimming the file
+                    index = HistoryIndex(self.HISTORY_DB)
+                    try:
+                        index.sync(self.HISTORY_FILE, keep=self.HISTORY_LIMIT)
+                    finally:
+                        index.close()
         except Exception as e:
             self.print_error(f"Error saving history: {e}")
 
-    def clear_screen(self):
-        """Clear terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+    def clear_screen(self, *regions: str):
+        """Start a new screen with `regions` (e.g. the logo); what it prints next is written with them"""
+        self.screen.begin(*regions)
 
-    def print_logo(self):
-        """Display application logo"""
-        logo = f"""{Colors.CYAN}
+    def logo(self) -> str:
+        """Application logo screen region"""
+        return f"""{Colors.CYAN}
 ╔═══════════════════════════════════════════════════════════════════════╗
 ║                                                                       ║
 ║   ____             _             ____             _                   ║
@@ -252,28 +3458,47 @@ class DoctorDork:
 ║          Streamline your doctor research from 30+ to 2 minutes        ║
 ║                                                                       ║
 ╚═══════════════════════════════════════════════════════════════════════╝
-{Colors.RESET}"""
-        print(logo)
+{Colors.RESET}
+"""
+
+    def emit(self, text: str):
+        """Print a line whole, so lines from threads (and relayed worker output) never interleave"""
+        with self.output_lock:
+            sys.stdout.write(text + "\n")
+            sys.stdout.flush()
 
     def print_success(self, message: str):
         """Print success message"""
-        print(f"{Colors.GREEN}✓ {message}{Colors.RESET}")
+        self.emit(f"{Colors.GREEN}✓ {message}{Colors.RESET}")
 
     def print_error(self, message: str):
         """Print error message"""
-        print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+        self.emit(f"{Colors.RED}✗ {message}{Colors.RESET}")
 
     def print_info(self, message: str):
         """Print info message"""
-        print(f"{Colors.BLUE}ℹ {message}{Colors.RESET}")
+        self.emit(f"{Colors.BLUE}ℹ {message}{Colors.RESET}")
 
     def print_warning(self, message: str):
         """Print warning message"""
-        print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+        self.emit(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+    def spawn_worker(self, command: List[str]) -> tuple:
+        """Start a worker process whose output is relayed line by line through emit(); returns (process, relay thread)"""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   env={**os.environ, "PYTHONUNBUFFERED": "1"})
+
+        def relay():
+            for line in process.stdout:
+                self.emit(line.decode("utf-8", "replace").rstrip("\r\n"))
 
-    def print_menu(self):
-        """Display main menu"""
-        menu = f"""
+        thread = threading.Thread(target=relay, daemon=True)
+        thread.start()
+        return process, thread
+
+    def menu(self) -> str:
+        """Main menu screen region"""
+        return f"""
 {Colors.YELLOW}╔════════════════════════════════════════════════════════════════╗
 ║                         MAIN MENU                              ║
 ╠════════════════════════════════════════════════════════════════╣
@@ -287,53 +3512,236 @@ class DoctorDork:
 ║  8. Settings                 - Configure preferences           ║
 ║  9. Exit                     - Close application               ║
 ╚════════════════════════════════════════════════════════════════╝{Colors.RESET}
+
 """
-        print(menu)
 
     def get_doctor_info(self) -> Dict:
         """Get doctor information from user"""
         print(f"\n{Colors.CYAN}Enter Doctor Information:{Colors.RESET}")
 
-        doctor_name = input(f"{Colors.WHITE}Doctor's name: {Colors.RESET}").strip()
-        city = input(f"{Colors.WHITE}City: {Colors.RESET}").strip()
+        doctor_name = self.ask("doctor_name", f"{Colors.WHITE}Doctor's name: {Colors.RESET}").strip()
+        city = self.ask("city", f"{Colors.WHITE}City: {Colors.RESET}").strip()
         state = input(f"{Colors.WHITE}State (2-letter code): {Colors.RESET}").strip().upper()
-        specialty = input(f"{Colors.WHITE}Specialty (optional): {Colors.RESET}").strip()
+        specialty = self.ask("specialty", f"{Colors.WHITE}Specialty (optional): {Colors.RESET}").strip()
 
-        return {
+        for field, value in (("doctor_name", doctor_name), ("city", city), ("specialty", specialty)):
+            if field in self._completions:
+                self._completions[field].add(value, self.HISTORY_COMPLETION_WEIGHT)
+
+        return self.normalize_specialty({
             "doctor_name": doctor_name,
             "city": city,
             "state": state,
             "specialty": specialty
-        }
-
-    def contact_search(self, doctor_info: Optional[Dict] = None):
-        """Search for doctors with contact forms"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== DOCTOR CONTACT SEARCH ==={Colors.RESET}\n")
+        })
+
+    def completion_weights(self, full: bool) -> Dict[str, Dict[str, float]]:
+        """Suggestion weights per prompt field from history, the taxonomy and (when `full`) the local indexes
+
+        Values the user has searched before outrank directory entries.
+        """
+        weights = {"doctor_name": {}, "city": {}, "specialty": {}}
+
+        def count(field, value, weight):
+            if value:
+                weights[field][value] = weights[field].get(value, 0) + weight
+
+        for code, classification, specialization, name, aliases in NUCC_TAXONOMY:
+            for value in [name] + aliases:
+                count("specialty", value.title() if value.islower() else value, 1)
+        for entry in self.history:
+            for field in weights:
+                count(field, entry.get(field), self.HISTORY_COMPLETION_WEIGHT)
+        if not full:
+            return weights
+        if self.HISTORY_DB.exists():
+            index = HistoryIndex(self.HISTORY_DB)
+            try:
+                for name, n in index.conn.execute(
+                        "SELECT doctor_name, COUNT(*) FROM entries WHERE doctor_name != '' GROUP BY doctor_name"):
+                    count("doctor_name", name, n * self.HISTORY_COMPLETION_WEIGHT)
+            finally:
+                index.close()
+        if self.PROVIDERS_DB.exists():
+            index = ProviderIndex(self.PROVIDERS_DB)
+            try:
+                for first, last, n in index.conn.execute(
+                        "SELECT first, last, COUNT(*) FROM providers GROUP BY last, first"):
+                    count("doctor_name", f"{first} {last}".strip().title(), n)
+                for city, n in index.conn.execute("SELECT city, COUNT(*) FROM providers GROUP BY city"):
+                    count("city", city.title(), n)
+            finally:
+                index.close()
+        return weights
+
+    def load_completions(self):
+        """Build the prompt completions: history and taxonomy at once, the local indexes in the background"""
+        if self._completions_loading is not None:
+            return
+        self._completions = {field: PrefixIndex(w) for field, w in self.completion_weights(False).items()}
 
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
+        def load_full():
+            try:
+                self._completions = {field: PrefixIndex(w) for field, w in self.completion_weights(True).items()}
+            except (OSError, sqlite3.Error):
+                pass  # keep the history-only suggestions
+
+        self._completions_loading = threading.Thread(target=load_full, daemon=True)
+        self._completions_loading.start()
+
+    def ask(self, field: str, prompt: str) -> str:
+        """input() with Tab completion of `field` values when readline is available"""
+        if readline is None or not sys.stdin.isatty():
+            return input(prompt)
+        self.load_completions()
+        matches = []
+
+        def complete(text, state):
+            if state == 0:
+                index = self._completions.get(field)
+                matches[:] = index.suggest(text) if index is not None else []
+            return matches[state] if state < len(matches) else None
+
+        readline.set_completer_delims("")
+        readline.parse_and_bind("bind ^I rl_complete" if "libedit" in (readline.__doc__ or "") else "tab: complete")
+        readline.set_completer(complete)
+        try:
+            # Mark color codes as zero-width so readline measures the prompt correctly
+            return input(re.sub(r"(\033\[[0-9;]*m)", "\001\\1\002", prompt))
+        finally:
+            readline.set_completer(None)
+
+    def normalize_specialty(self, doctor_info: Dict) -> Dict:
+        """Add the canonical NUCC name and taxonomy code for a free-text specialty
+
+        The specialty itself is kept as typed for display and export; the
+        generated searches use the canonical name (see search_specialty).
+        """
+        entry = self.taxonomy.normalize(doctor_info.get("specialty", ""))
+        if entry:
+            doctor_info["taxonomy_name"] = entry["name"]
+            doctor_info["taxonomy_code"] = entry["code"]
+        return doctor_info
+
+    @staticmethod
+    def split_name(doctor_name: str) -> tuple:
+        """Split a doctor's name into (first_name, last_name)"""
+        name_parts = doctor_name.replace("Dr.", "").replace("Dr", "").strip().split()
+        first_name = name_parts[0] if len(name_parts) > 0 else ""
+        last_name = name_parts[-1] if len(name_parts) > 1 else name_parts[0] if len(name_parts) > 0 else ""
+        return first_name, last_name
 
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
-        specialty = doctor_info["specialty"]
+    @staticmethod
+    def search_specialty(doctor_info: Dict, default: str = "") -> str:
+        """The specialty searches are built from: the canonical NUCC name when one resolved, else as typed"""
+        return doctor_info.get("taxonomy_name") or doctor_info.get("specialty", default)
 
-        # Build Google dork query
+    def build_contact_query(self, doctor_info: Dict) -> tuple:
+        """Build the Google dork query and search URL for a doctor"""
         query_parts = [
             '(group:doctor OR group:physician)',
             '(inurl:contact OR inurl:contact-us OR inurl:"contact us")',
-            f'"{doctor_name}"',
-            f'"{city}"',
-            f'"{state}"'
+            f'"{doctor_info["doctor_name"]}"',
+            f'"{doctor_info["city"]}"',
+            f'"{doctor_info["state"]}"'
         ]
 
+        specialty = self.search_specialty(doctor_info)
         if specialty:
             query_parts.append(f'"{specialty}"')
 
         query = " ".join(query_parts)
-        url = f"https://www.google.com/search?q={urllib.parse.quote(query)}"
+        return query, f"https://www.google.com/search?q={urllib.parse.quote(query)}"
+
+    def link_fields(self, doctor_info: Dict) -> Dict:
+        """Return the URL-quoted template fields for a doctor"""
+        first_name, last_name = self.split_name(doctor_info["doctor_name"])
+        return {
+            "doctor_name": urllib.parse.quote(doctor_info["doctor_name"]),
+            "city": urllib.parse.quote(doctor_info.get("city", "")),
+            "state": urllib.parse.quote(doctor_info.get("state", "")),
+            "specialty": urllib.parse.quote(self.search_specialty(doctor_info, "physician")),
+            "first_name": urllib.parse.quote(first_name),
+            "last_name": urllib.parse.quote(last_name),
+        }
+
+    def generate_links(self, doctor_info: Dict) -> Dict:
+        """Build every search link for a doctor without prompting or opening a browser"""
+        self.refresh_platforms()
+        results = {"contact_search": self.build_contact_query(doctor_info)[1]}
+
+        board_info = self.medical_boards.get(doctor_info.get("state", "").upper())
+        if board_info:
+            results["medical_board"] = [[board_info['name'], board_info['url']]]
+
+        results.update(self.modules.render_all(self.link_fields(doctor_info)))
+        return results
+
+    @staticmethod
+    def quote_column(values: List[str]) -> List[str]:
+        """URL-quote a column, quoting each distinct value only once"""
+        memo = {value: urllib.parse.quote(value) for value in set(values)}
+        return [memo[value] for value in values]
+
+    def bulk_generate(self, columns: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Generate every link for a roster given as columns
+
+        `columns` holds parallel lists under "doctor_name", "city", "state"
+        and optionally "specialty" (where a "taxonomy_name" column has a value,
+        the links use it instead). Returns the input columns followed by one
+        URL column per link ("contact_search", "medical_board" and
+        "<result key>.<platform>"), matching generate_links() row for row.
+        """
+        self.refresh_platforms()
+        names = columns["doctor_name"]
+        size = len(names)
+        cities = columns.get("city") or [""] * size
+        states = columns.get("state") or [""] * size
+        specialties = columns.get("specialty")
+        if specialties is not None and columns.get("taxonomy_name") is not None:
+            specialties = [name or typed for typed, name in zip(specialties, columns["taxonomy_name"])]
+
+        split = {name: self.split_name(name) for name in set(names)}
+        quoted = {
+            "doctor_name": self.quote_column(names),
+            "city": self.quote_column(cities),
+            "state": self.quote_column(states),
+            "specialty": self.quote_column(specialties) if specialties is not None
+                         else [urllib.parse.quote("physician")] * size,
+            "first_name": self.quote_column([split[name][0] for name in names]),
+            "last_name": self.quote_column([split[name][1] for name in names]),
+        }
+
+        # quote() works character by character, so the dork query can be
+        # assembled from quoted pieces instead of quoting each full query
+        q = urllib.parse.quote
+        prefix = ("https://www.google.com/search?q="
+                  + q('(group:doctor OR group:physician) (inurl:contact OR inurl:contact-us OR inurl:"contact us") "'))
+        sep, close = q('" "'), q('"')
+        specialty_suffix = {value: q(f' "{value}"') if value else "" for value in set(specialties or [])}
+        contact = [
+            prefix + name + sep + city + sep + state + close
+            for name, city, state in zip(quoted["doctor_name"], quoted["city"], quoted["state"])
+        ]
+        if specialties is not None:
+            contact = [url + specialty_suffix[value] for url, value in zip(contact, specialties)]
+
+        boards = {code: info["url"] for code, info in self.medical_boards.items()}
+        output = {key: list(values) for key, values in columns.items()}
+        output["contact_search"] = contact
+        output["medical_board"] = [boards.get(state.upper(), "") for state in states]
+        output.update(self.modules.render_columns(quoted, size))
+        return output
+
+    def contact_search(self, doctor_info: Optional[Dict] = None):
+        """Search for doctors with contact forms"""
+        self.clear_screen(self.logo())
+        print(f"\n{Colors.BOLD}{Colors.GREEN}=== DOCTOR CONTACT SEARCH ==={Colors.RESET}\n")
+
+        if not doctor_info:
+            doctor_info = self.get_doctor_info()
+
+        query, url = self.build_contact_query(doctor_info)
 
         self.search_results["contact_search"] = url
 
@@ -357,8 +3765,8 @@ class DoctorDork:
 
     def medical_board_lookup(self, doctor_info: Optional[Dict] = None):
         """Look up medical board verification"""
-        self.clear_screen()
-        self.print_logo()
+        self.refresh_platforms()
+        self.clear_screen(self.logo())
         print(f"\n{Colors.BOLD}{Colors.GREEN}=== MEDICAL BOARD LOOKUP ==={Colors.RESET}\n")
 
         if not doctor_info:
@@ -366,456 +3774,162 @@ class DoctorDork:
         else:
             state = doctor_info.get("state", "").upper()
 
-        if state == "ALL" or not state:
+        doctor_name = ""
+        if state == "ALL" and not doctor_info:
+            doctor_name = input(f"{Colors.WHITE}Doctor's name for an all-states sweep (leave blank to list boards): {Colors.RESET}").strip()
+
+        if doctor_name:
+            probe = input(f"{Colors.WHITE}Probe board websites now? (y/n): {Colors.RESET}").strip().lower() == 'y'
+            home_state = input(f"{Colors.WHITE}Home state to rank first (optional): {Colors.RESET}").strip().upper()
+            sweep_info = {"doctor_name": doctor_name, "city": "", "state": home_state, "specialty": ""}
+            self.print_sweep(self.sweep_all_states(sweep_info, probe=probe))
+        elif state == "ALL" or not state:
             print(f"\n{Colors.CYAN}Medical Board Lookup URLs for All 51 Jurisdictions:{Colors.RESET}\n")
-            for code, info in sorted(self.MEDICAL_BOARDS.items()):
+            for code, info in sorted(self.medical_boards.items()):
                 print(f"{Colors.YELLOW}{code} - {info['name']:<20}{Colors.RESET} {info['url']}")
 
-            print(f"\n{Colors.INFO}Total: 51 jurisdictions{Colors.RESET}")
-        elif state in self.MEDICAL_BOARDS:
-            board_info = self.MEDICAL_BOARDS[state]
-            print(f"\n{Colors.GREEN}Medical Board: {board_info['name']}{Colors.RESET}")
-            print(f"{Colors.WHITE}URL: {board_info['url']}{Colors.RESET}\n")
-
-            if self.config.get("auto_open_browser", True):
-                self.print_info("Opening medical board website...")
-                try:
-                    webbrowser.open(board_info['url'])
-                    self.print_success("Browser opened successfully!")
-                except Exception as e:
-                    self.print_error(f"Could not open browser: {e}")
-
-            self.save_history({"type": "medical_board_lookup", "state": state, "url": board_info['url']})
-        else:
-            self.print_error(f"Invalid state code: {state}")
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def review_aggregation(self, doctor_info: Optional[Dict] = None):
-        """Search multiple review platforms"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== REVIEW AGGREGATION ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
-
-        print(f"\n{Colors.CYAN}Searching 5 review platforms for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.REVIEW_PLATFORMS.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<15}{Colors.RESET} {url}")
-
-        self.search_results["review_aggregation"] = urls
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open all review sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "review_aggregation", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def ethics_violation_report(self, doctor_info: Optional[Dict] = None):
-        """File ethics violation report"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== ETHICS VIOLATION REPORTING ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            state = input(f"{Colors.WHITE}Enter state (2-letter code): {Colors.RESET}").strip().upper()
-        else:
-            state = doctor_info.get("state", "").upper()
-
-        if state in self.MEDICAL_BOARDS:
-            board_info = self.MEDICAL_BOARDS[state]
-            print(f"\n{Colors.YELLOW}File a complaint with: {board_info['name']} Medical Board{Colors.RESET}")
-            print(f"{Colors.WHITE}Board URL: {board_info['url']}{Colors.RESET}\n")
-
-            self.print_warning("IMPORTANT: This will direct you to the medical board's website.")
-            self.print_warning("Look for 'File a Complaint' or 'Report Misconduct' section.")
-
-            proceed = input(f"\n{Colors.WHITE}Open medical board website? (y/n): {Colors.RESET}").strip().lower()
-            if proceed == 'y':
-                try:
-                    webbrowser.open(board_info['url'])
-                    self.print_success("Browser opened successfully!")
-                except Exception as e:
-                    self.print_error(f"Could not open browser: {e}")
-
-                self.save_history({"type": "ethics_report", "state": state, "url": board_info['url']})
-        else:
-            self.print_error(f"Invalid state code: {state}")
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def social_media_search(self, doctor_info: Optional[Dict] = None):
-        """Search social media platforms"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== SOCIAL MEDIA SEARCH ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        specialty = doctor_info.get("specialty", "physician")
-
-        print(f"\n{Colors.CYAN}Searching 3 social platforms for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.SOCIAL_PLATFORMS.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                specialty=urllib.parse.quote(specialty)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<15}{Colors.RESET} {url}")
-
-        self.search_results["social_media"] = urls
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open all social media sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "social_media_search", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def medicare_participation_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up Medicare participation and NPI information"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== MEDICARE PARTICIPATION LOOKUP ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        state = doctor_info.get("state", "")
-
-        # Parse name into first and last for NPI Registry
-        name_parts = doctor_name.replace("Dr.", "").replace("Dr", "").strip().split()
-        first_name = name_parts[0] if len(name_parts) > 0 else ""
-        last_name = name_parts[-1] if len(name_parts) > 1 else name_parts[0] if len(name_parts) > 0 else ""
-
-        print(f"\n{Colors.CYAN}Checking Medicare participation for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.MEDICARE_LOOKUP.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                first_name=urllib.parse.quote(first_name),
-                last_name=urllib.parse.quote(last_name),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
-
-        self.search_results["medicare_lookup"] = urls
-
-        print(f"\n{Colors.INFO}ℹ These databases show:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Medicare enrollment status{Colors.RESET}")
-        print(f"  • {Colors.WHITE}National Provider Identifier (NPI){Colors.RESET}")
-        print(f"  • {Colors.WHITE}Practice locations and credentials{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Medicare patient ratings{Colors.RESET}")
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open Medicare lookup sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "medicare_lookup", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def publication_search(self, doctor_info: Optional[Dict] = None):
-        """Search for doctor's publications and research"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== PUBLICATION SEARCH ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-
-        print(f"\n{Colors.CYAN}Searching publications for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.PUBLICATION_LOOKUP.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<20}{Colors.RESET} {url}")
-
-        self.search_results["publication_search"] = urls
-
-        print(f"\n{Colors.INFO}ℹ Publication databases show:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Research papers and studies{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Citations and impact metrics{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Areas of medical expertise{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Academic contributions{Colors.RESET}")
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open publication databases? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "publication_search", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def specialty_verification(self, doctor_info: Optional[Dict] = None):
-        """Verify board certifications and specialties"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== SPECIALTY BOARD VERIFICATION ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        specialty = doctor_info.get("specialty", "")
-
-        print(f"\n{Colors.CYAN}Verifying board certifications for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.SPECIALTY_VERIFICATION.items():
-            url = url_template
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
-
-        self.search_results["specialty_verification"] = urls
-
-        print(f"\n{Colors.INFO}ℹ Board certification databases show:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}ABMS board certifications (24+ specialties){Colors.RESET}")
-        print(f"  • {Colors.WHITE}AOA osteopathic certifications{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Certification status and expiration{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Subspecialty certifications{Colors.RESET}")
-
-        if specialty:
-            print(f"\n{Colors.CYAN}Note: Searching for specialty: {specialty}{Colors.RESET}")
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open certification databases? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "specialty_verification", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def education_training_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up education and training background"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== EDUCATION & TRAINING LOOKUP ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-
-        print(f"\n{Colors.CYAN}Looking up education & training for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.EDUCATION_LOOKUP.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<20}{Colors.RESET} {url}")
-
-        self.search_results["education_lookup"] = urls
-
-        print(f"\n{Colors.INFO}ℹ Education databases show:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Medical school attended{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Residency and fellowship training{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Year of graduation{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Professional credentials{Colors.RESET}")
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open education databases? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "education_lookup", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def hospital_affiliations_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up hospital affiliations"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== HOSPITAL AFFILIATIONS LOOKUP ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
-
-        print(f"\n{Colors.CYAN}Looking up hospital affiliations for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.HOSPITAL_AFFILIATIONS.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<35}{Colors.RESET} {url}")
-
-        self.search_results["hospital_affiliations"] = urls
-
-        print(f"\n{Colors.INFO}ℹ Hospital affiliation data shows:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Primary hospital affiliations{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Admitting privileges{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Practice locations{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Hospital quality ratings{Colors.RESET}")
-
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open hospital affiliation sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
-
-        self.save_history({"type": "hospital_affiliations", **doctor_info, "urls": dict(urls)})
-
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-
-    def insurance_acceptance_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up accepted insurance providers"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== INSURANCE ACCEPTANCE LOOKUP ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
-
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
-
-        print(f"\n{Colors.CYAN}Checking insurance acceptance for: {doctor_name}{Colors.RESET}\n")
-
-        urls = []
-        for platform, url_template in self.INSURANCE_ACCEPTANCE.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
+            print(f"\n{Colors.INFO}Total: {len(self.medical_boards)} jurisdictions{Colors.RESET}")
+        elif state in self.medical_boards:
+            board_info = self.medical_boards[state]
+            print(f"\n{Colors.GREEN}Medical Board: {board_info['name']}{Colors.RESET}")
+            print(f"{Colors.WHITE}URL: {board_info['url']}{Colors.RESET}\n")
 
-        self.search_results["insurance_acceptance"] = urls
+            if self.config.get("auto_open_browser", True):
+                self.print_info("Opening medical board website...")
+                try:
+                    webbrowser.open(board_info['url'])
+                    self.print_success("Browser opened successfully!")
+                except Exception as e:
+                    self.print_error(f"Could not open browser: {e}")
 
-        print(f"\n{Colors.INFO}ℹ Insurance information shows:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Accepted insurance plans{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Medicare/Medicaid participation{Colors.RESET}")
-        print(f"  • {Colors.WHITE}In-network vs out-of-network{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Payment policies{Colors.RESET}")
+            self.save_history({"type": "medical_board_lookup", "state": state, "url": board_info['url']})
+        else:
+            self.print_error(f"Invalid state code: {state}")
 
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open insurance lookup sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
+        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
 
-        self.save_history({"type": "insurance_acceptance", **doctor_info, "urls": dict(urls)})
+    def sweep_all_states(self, doctor_info: Dict, probe: bool = False,
+                         workers: Optional[int] = None) -> List[Dict]:
+        """Build board and state-specific registry links for every jurisdiction
+
+        Returns one entry per state, ranked with the doctor's own state first,
+        then by last known link health and latency. With `probe`, every board
+        URL is checked concurrently (bounded by `workers`) before ranking.
+        """
+        self.refresh_platforms()
+        fields = self.link_fields(doctor_info)
+        home_state = doctor_info.get("state", "").upper()
+
+        sweep = []
+        for code, board_info in self.medical_boards.items():
+            state_fields = {**fields, "state": urllib.parse.quote(code)}
+            sweep.append({
+                "state": code,
+                "name": board_info["name"],
+                "board_url": board_info["url"],
+                "registry_links": self.modules.render("medicare_participation_lookup", state_fields, only_field="state"),
+            })
+
+        checker = LinkChecker(self.LINK_HEALTH_FILE, host_override=self.config.get("link_check_host") or None)
+        if probe:
+            board_urls = [entry["board_url"] for entry in sweep]
+            checker.check_many(board_urls, workers)
+            checker.save()
+            changed = checker.changed(board_urls)
+            if changed:
+                self.print_warning(f"{len(changed)} board page(s) changed or moved since the last probe")
+
+        for entry in sweep:
+            entry["health"] = checker.get(entry["board_url"])
+
+        def rank(entry):
+            health = entry["health"] or {}
+            return (
+                entry["state"] != home_state,
+                self.HEALTH_RANK.get(health.get("health"), 2),
+                health.get("latency", float("inf")),
+                entry["state"],
+            )
 
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+        sweep.sort(key=rank)
+        for position, entry in enumerate(sweep, 1):
+            entry["rank"] = position
 
-    def language_support_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up languages spoken by doctor"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== LANGUAGE SUPPORT LOOKUP ==={Colors.RESET}\n")
+        self.search_results["all_states_sweep"] = [
+            [f"{entry['state']} {label}", url]
+            for entry in sweep
+            for label, url in [("Medical Board", entry["board_url"])] + entry["registry_links"]
+        ]
+        self.save_history({"type": "all_states_sweep", **doctor_info, "probed": probe})
+        return sweep
+
+    def print_sweep(self, sweep: List[Dict]):
+        """Display ranked all-states sweep results"""
+        colors = {"ok": Colors.GREEN, "blocked": Colors.YELLOW, "broken": Colors.RED, "down": Colors.RED}
+        print(f"\n{Colors.CYAN}All-States Sweep ({len(sweep)} jurisdictions, best first):{Colors.RESET}\n")
+        for entry in sweep:
+            health = entry["health"] or {}
+            label = health.get("health", "unchecked")
+            status = f"{colors.get(label, Colors.WHITE)}{label:<9}{Colors.RESET}"
+            print(f"{entry['rank']:>2}. {Colors.YELLOW}{entry['state']} - {entry['name']:<20}{Colors.RESET} {status} {entry['board_url']}")
+            changed = health.get("changed") or {}
+            if "redirect" in changed:
+                print(f"    {Colors.RED}Moved: now redirects to {changed['redirect']['to']}{Colors.RESET}")
+            elif "content" in changed:
+                print(f"    {Colors.RED}Page content changed since the last probe{Colors.RESET}")
+            for platform, url in entry["registry_links"]:
+                print(f"    {platform}: {url}")
+
+    def run_module(self, name: str, doctor_info: Optional[Dict] = None):
+        """Run a link-generation module from the module table interactively"""
+        self.refresh_platforms()
+        module = self.modules.get(name)
+        self.clear_screen(self.logo())
+        print(f"\n{Colors.BOLD}{Colors.GREEN}=== {module['title']} ==={Colors.RESET}\n")
 
         if not doctor_info:
             doctor_info = self.get_doctor_info()
 
         doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
+        intro = module.get("intro", f"Searching {module['title'].title()} for")
+        print(f"\n{Colors.CYAN}{intro}: {doctor_name}{Colors.RESET}\n")
+
+        fields = self.link_fields(doctor_info)
+        if not self.modules.has_required(name, fields):
+            missing = [f for f in module.get("required", []) if not fields.get(f)]
+            self.print_error(f"Missing required information: {', '.join(missing)}")
+            input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+            return
 
-        print(f"\n{Colors.CYAN}Looking up languages spoken by: {doctor_name}{Colors.RESET}\n")
+        urls = self.modules.render(name, fields)
+        width = module.get("width", 30)
+        for platform, url in urls:
+            print(f"{Colors.YELLOW}{platform:<{width}}{Colors.RESET} {url}")
 
-        urls = []
-        for platform, url_template in self.LANGUAGE_SUPPORT.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
+        self.search_results[module["key"]] = urls
+
+        category = module.get("enrichment")
+        if category and self.enrichment_enabled(category):
+            self.print_info("Fetching registry data...")
+            data = self.enrich([doctor_info], (category,))[0].get(category, [])
+            self.search_results[category] = data
+            for label, value in data:
+                print(f"{Colors.GREEN}{label:<{width}}{Colors.RESET} {value}")
 
-        self.search_results["language_support"] = urls
+        if module.get("summary"):
+            print(f"\n{Colors.INFO}ℹ {module['summary']}{Colors.RESET}")
+            for bullet in module.get("bullets", []):
+                print(f"  • {Colors.WHITE}{bullet}{Colors.RESET}")
 
-        print(f"\n{Colors.INFO}ℹ Language information shows:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Languages spoken by doctor{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Interpreter services available{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Multilingual office staff{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Translation services{Colors.RESET}")
+        # Notes that reference a field are only shown when that field is filled in
+        note = module.get("note")
+        if note and all(doctor_info.get(field) for _, field, _, _ in string.Formatter().parse(note) if field):
+            note = note.format(**{**doctor_info, "specialty": self.search_specialty(doctor_info)})
+            print(f"\n{Colors.YELLOW}{note}{Colors.RESET}")
 
         if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open language lookup sites? (y/n): {Colors.RESET}").strip().lower()
+            prompt = module.get("prompt", "Open all sites?")
+            open_choice = input(f"\n{Colors.WHITE}{prompt} (y/n): {Colors.RESET}").strip().lower()
             if open_choice == 'y':
                 for platform, url in urls:
                     try:
@@ -824,110 +3938,103 @@ class DoctorDork:
                     except Exception as e:
                         self.print_error(f"Could not open {platform}: {e}")
 
-        self.save_history({"type": "language_support", **doctor_info, "urls": dict(urls)})
+        self.save_history({"type": module.get("history_type", module["key"]), **doctor_info, "urls": dict(urls)})
 
         input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
 
-    def telemedicine_options_lookup(self, doctor_info: Optional[Dict] = None):
-        """Look up telemedicine/virtual visit options"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== TELEMEDICINE OPTIONS LOOKUP ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
+    def review_aggregation(self, doctor_info: Optional[Dict] = None):
+        """Search multiple review platforms"""
+        self.run_module("review_aggregation", doctor_info)
 
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
+    def ethics_violation_report(self, doctor_info: Optional[Dict] = None):
+        """File ethics violation report"""
+        self.refresh_platforms()
+        self.clear_screen(self.logo())
+        print(f"\n{Colors.BOLD}{Colors.GREEN}=== ETHICS VIOLATION REPORTING ==={Colors.RESET}\n")
 
-        print(f"\n{Colors.CYAN}Checking telemedicine options for: {doctor_name}{Colors.RESET}\n")
+        if not doctor_info:
+            state = input(f"{Colors.WHITE}Enter state (2-letter code): {Colors.RESET}").strip().upper()
+        else:
+            state = doctor_info.get("state", "").upper()
 
-        urls = []
-        for platform, url_template in self.TELEMEDICINE_OPTIONS.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
+        if state in self.medical_boards:
+            board_info = self.medical_boards[state]
+            print(f"\n{Colors.YELLOW}File a complaint with: {board_info['name']} Medical Board{Colors.RESET}")
+            print(f"{Colors.WHITE}Board URL: {board_info['url']}{Colors.RESET}\n")
 
-        self.search_results["telemedicine_options"] = urls
+            if self.enrichment_enabled("oig_exclusions"):
+                doctor_name = (doctor_info or {}).get("doctor_name") or input(
+                    f"{Colors.WHITE}Doctor's name to screen against the OIG exclusion list (optional): {Colors.RESET}").strip()
+                if doctor_name:
+                    screen_info = {**(doctor_info or {}), "doctor_name": doctor_name, "state": state}
+                    data = self.enrich([screen_info], ("oig_exclusions",))[0].get("oig_exclusions", [])
+                    self.search_results["oig_exclusions"] = data
+                    print(f"\n{Colors.CYAN}OIG Exclusion Screening (LEIE):{Colors.RESET}")
+                    for label, value in data:
+                        color = Colors.RED if value.startswith("POSSIBLE") else Colors.WHITE
+                        print(f"  {label:<20} {color}{value}{Colors.RESET}")
+                    print()
 
-        print(f"\n{Colors.INFO}ℹ Telemedicine platforms show:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Virtual visit availability{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Video consultation platforms{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Online prescription services{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Remote patient monitoring{Colors.RESET}")
+            self.print_warning("IMPORTANT: This will direct you to the medical board's website.")
+            self.print_warning("Look for 'File a Complaint' or 'Report Misconduct' section.")
 
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open telemedicine sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
+            proceed = input(f"\n{Colors.WHITE}Open medical board website? (y/n): {Colors.RESET}").strip().lower()
+            if proceed == 'y':
+                try:
+                    webbrowser.open(board_info['url'])
+                    self.print_success("Browser opened successfully!")
+                except Exception as e:
+                    self.print_error(f"Could not open browser: {e}")
 
-        self.save_history({"type": "telemedicine_options", **doctor_info, "urls": dict(urls)})
+                self.save_history({"type": "ethics_report", "state": state, "url": board_info['url']})
+        else:
+            self.print_error(f"Invalid state code: {state}")
 
         input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
 
-    def appointment_booking_links(self, doctor_info: Optional[Dict] = None):
-        """Get appointment booking links"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== APPOINTMENT BOOKING LINKS ==={Colors.RESET}\n")
-
-        if not doctor_info:
-            doctor_info = self.get_doctor_info()
+    def social_media_search(self, doctor_info: Optional[Dict] = None):
+        """Search social media platforms"""
+        self.run_module("social_media_search", doctor_info)
 
-        doctor_name = doctor_info["doctor_name"]
-        city = doctor_info["city"]
-        state = doctor_info["state"]
+    def medicare_participation_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up Medicare participation and NPI information"""
+        self.run_module("medicare_participation_lookup", doctor_info)
 
-        print(f"\n{Colors.CYAN}Finding appointment booking options for: {doctor_name}{Colors.RESET}\n")
+    def publication_search(self, doctor_info: Optional[Dict] = None):
+        """Search for doctor's publications and research"""
+        self.run_module("publication_search", doctor_info)
 
-        urls = []
-        for platform, url_template in self.APPOINTMENT_BOOKING.items():
-            url = url_template.format(
-                doctor_name=urllib.parse.quote(doctor_name),
-                city=urllib.parse.quote(city),
-                state=urllib.parse.quote(state)
-            )
-            urls.append((platform, url))
-            print(f"{Colors.YELLOW}{platform:<30}{Colors.RESET} {url}")
+    def specialty_verification(self, doctor_info: Optional[Dict] = None):
+        """Verify board certifications and specialties"""
+        self.run_module("specialty_verification", doctor_info)
 
-        self.search_results["appointment_booking"] = urls
+    def education_training_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up education and training background"""
+        self.run_module("education_training_lookup", doctor_info)
 
-        print(f"\n{Colors.INFO}ℹ Booking platforms provide:{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Online appointment scheduling{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Patient portal access{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Same-day appointment availability{Colors.RESET}")
-        print(f"  • {Colors.WHITE}Waitlist notifications{Colors.RESET}")
+    def hospital_affiliations_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up hospital affiliations"""
+        self.run_module("hospital_affiliations_lookup", doctor_info)
 
-        print(f"\n{Colors.YELLOW}Note: Real-time availability varies by practice.{Colors.RESET}")
+    def insurance_acceptance_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up accepted insurance providers"""
+        self.run_module("insurance_acceptance_lookup", doctor_info)
 
-        if self.config.get("auto_open_browser", True):
-            open_choice = input(f"\n{Colors.WHITE}Open booking sites? (y/n): {Colors.RESET}").strip().lower()
-            if open_choice == 'y':
-                for platform, url in urls:
-                    try:
-                        webbrowser.open(url)
-                        self.print_success(f"Opened {platform}")
-                    except Exception as e:
-                        self.print_error(f"Could not open {platform}: {e}")
+    def language_support_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up languages spoken by doctor"""
+        self.run_module("language_support_lookup", doctor_info)
 
-        self.save_history({"type": "appointment_booking", **doctor_info, "urls": dict(urls)})
+    def telemedicine_options_lookup(self, doctor_info: Optional[Dict] = None):
+        """Look up telemedicine/virtual visit options"""
+        self.run_module("telemedicine_options_lookup", doctor_info)
 
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+    def appointment_booking_links(self, doctor_info: Optional[Dict] = None):
+        """Get appointment booking links"""
+        self.run_module("appointment_booking_links", doctor_info)
 
     def comprehensive_search(self):
         """Run all search features at once"""
-        self.clear_screen()
-        self.print_logo()
+        self.clear_screen(self.logo())
         print(f"\n{Colors.BOLD}{Colors.GREEN}=== COMPREHENSIVE SEARCH ==={Colors.RESET}\n")
 
         doctor_info = self.get_doctor_info()
@@ -939,46 +4046,21 @@ class DoctorDork:
         self.config["auto_open_browser"] = False
 
         # Run all searches
-        self.print_info("1/14 - Running contact search...")
+        modules = self.modules.names()
+        total = len(modules) + 3
+
+        self.print_info(f"1/{total} - Running contact search...")
         self.contact_search(doctor_info)
 
-        self.print_info("2/14 - Looking up medical board...")
+        self.print_info(f"2/{total} - Looking up medical board...")
         self.medical_board_lookup(doctor_info)
 
-        self.print_info("3/14 - Checking Medicare participation...")
-        self.medicare_participation_lookup(doctor_info)
-
-        self.print_info("4/14 - Searching publications...")
-        self.publication_search(doctor_info)
-
-        self.print_info("5/14 - Verifying specialty certifications...")
-        self.specialty_verification(doctor_info)
-
-        self.print_info("6/14 - Looking up education & training...")
-        self.education_training_lookup(doctor_info)
-
-        self.print_info("7/14 - Checking hospital affiliations...")
-        self.hospital_affiliations_lookup(doctor_info)
-
-        self.print_info("8/14 - Looking up insurance acceptance...")
-        self.insurance_acceptance_lookup(doctor_info)
+        for step, name in enumerate(modules, 3):
+            description = self.modules.get(name).get("description", name.replace("_", " ").capitalize())
+            self.print_info(f"{step}/{total} - {description}...")
+            self.run_module(name, doctor_info)
 
-        self.print_info("9/14 - Checking language support...")
-        self.language_support_lookup(doctor_info)
-
-        self.print_info("10/14 - Finding telemedicine options...")
-        self.telemedicine_options_lookup(doctor_info)
-
-        self.print_info("11/14 - Getting appointment booking links...")
-        self.appointment_booking_links(doctor_info)
-
-        self.print_info("12/14 - Aggregating reviews...")
-        self.review_aggregation(doctor_info)
-
-        self.print_info("13/14 - Searching social media...")
-        self.social_media_search(doctor_info)
-
-        self.print_info("14/14 - Complete!")
+        self.print_info(f"{total}/{total} - Complete!")
 
         # Restore original setting
         self.config["auto_open_browser"] = original_setting
@@ -994,159 +4076,377 @@ class DoctorDork:
 
     def batch_processing(self):
         """Process multiple doctors at once"""
-        self.clear_screen()
-        self.print_logo()
+        self.clear_screen(self.logo())
         print(f"\n{Colors.BOLD}{Colors.GREEN}=== BATCH PROCESSING ==={Colors.RESET}\n")
 
-        print(f"{Colors.CYAN}Enter doctors to search (one per line, format: Name, City, State, Specialty){Colors.RESET}")
-        print(f"{Colors.YELLOW}Example: John Smith, Boston, MA, Cardiology{Colors.RESET}")
-        print(f"{Colors.YELLOW}Enter a blank line when done:{Colors.RESET}\n")
+        run_id = input(f"{Colors.WHITE}Resume run ID (leave blank for a new batch): {Colors.RESET}").strip()
 
         doctors = []
-        while True:
-            line = input(f"{Colors.WHITE}Doctor #{len(doctors)+1}: {Colors.RESET}").strip()
-            if not line:
-                break
+        if not run_id:
+            print(f"\n{Colors.CYAN}Enter doctors to search (one per line, format: Name, City, State, Specialty){Colors.RESET}")
+            print(f"{Colors.YELLOW}Example: John Smith, Boston, MA, Cardiology{Colors.RESET}")
+            print(f"{Colors.YELLOW}Enter a blank line when done:{Colors.RESET}\n")
+
+            while True:
+                line = input(f"{Colors.WHITE}Doctor #{len(doctors)+1}: {Colors.RESET}").strip()
+                if not line:
+                    break
+
+                parts = [p.strip() for p in line.split(',')]
+                if len(parts) >= 3:
+                    doctor_info = {
+                        "doctor_name": parts[0],
+                        "city": parts[1],
+                        "state": parts[2].upper(),
+                        "specialty": parts[3] if len(parts) > 3 else ""
+                    }
+                    doctors.append(doctor_info)
+                else:
+                    self.print_error("Invalid format. Use: Name, City, State, Specialty")
 
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) >= 3:
-                doctor_info = {
-                    "doctor_name": parts[0],
-                    "city": parts[1],
-                    "state": parts[2],
-                    "specialty": parts[3] if len(parts) > 3 else ""
-                }
-                doctors.append(doctor_info)
-            else:
-                self.print_error("Invalid format. Use: Name, City, State, Specialty")
+            if not doctors:
+                self.print_warning("No doctors entered.")
+                input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+                return
 
-        if not doctors:
-            self.print_warning("No doctors entered.")
+        try:
+            run_id = self.run_batch(doctors, run_id=run_id or None, source="interactive")
+        except (KeyError, ValueError) as e:
+            self.print_error(str(e))
             input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
             return
 
-        print(f"\n{Colors.GREEN}Processing {len(doctors)} doctor(s)...{Colors.RESET}\n")
-
-        # Temporarily disable auto-open
-        original_setting = self.config.get("auto_open_browser", True)
-        self.config["auto_open_browser"] = False
-
-        for i, doctor_info in enumerate(doctors, 1):
-            print(f"{Colors.CYAN}Processing {i}/{len(doctors)}: {doctor_info['doctor_name']}{Colors.RESET}")
-            self.contact_search(doctor_info)
-
-        # Restore original setting
-        self.config["auto_open_browser"] = original_setting
-
-        print(f"\n{Colors.GREEN}Batch processing completed!{Colors.RESET}")
-
         # Offer to export results
         export_choice = input(f"\n{Colors.WHITE}Export results? (y/n): {Colors.RESET}").strip().lower()
         if export_choice == 'y':
-            self.export_batch_results(doctors)
+            self.export_run(run_id)
 
         input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
 
+    def table_version(self, enrich: tuple = ()) -> str:
+        """Short hash of everything besides the row itself that shapes a row's results"""
+        self.refresh_platforms()
+        state = {"app": self.VERSION, "modules": self.modules.to_table(), "boards": self.medical_boards,
+                 "enrich": sorted(enrich)}
+        return hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def start_run(self, store: ResultStore, doctors: List[Dict], source: str, enrich: tuple,
+                  incremental: bool) -> str:
+        """Normalize a roster and register it as a new run, reusing unchanged rows when incremental"""
+        self.normalize_locations(doctors)
+        for doctor_info in doctors:
+            self.normalize_specialty(doctor_info)
+        run_id = store.create_run(doctors, source=source, version=self.table_version(enrich), enrich=enrich)
+        self.print_info(f"Started run {run_id}")
+        if incremental:
+            base_run = store.latest_run(source, exclude=run_id)
+            if base_run:
+                reused = store.reuse(run_id, base_run)
+                self.print_info(f"Reused {reused} unchanged row(s) from run {base_run}")
+            else:
+                self.print_info("No earlier completed run of this roster; processing every row")
+        return run_id
+
+    def run_batch(self, doctors: Optional[List[Dict]] = None, run_id: Optional[str] = None,
+                  source: str = "", enrich: tuple = (), incremental: bool = False) -> str:
+        """Generate links for a roster, checkpointing each row to the result store
+
+        Starts a new run when `run_id` is None, otherwise resumes the given run
+        and only processes rows that have not completed yet. `enrich` names
+        ENRICHERS categories to attach to each row. With `incremental`, rows
+        whose fingerprint matches the last completed run of the same source
+        are copied from it instead of regenerated. Returns the run ID.
+
+        Raises KeyError for an unknown run, and ValueError when resuming a run
+        started with a different module table or platform overrides (its
+        finished rows would be mixed with links from another table).
+        """
+        store = ResultStore(self.RESULTS_DB)
+        try:
+            if run_id:
+                run = store.get_run(run_id)
+                if not run:
+                    raise KeyError(f"Unknown run ID: {run_id}")
+                enrich = enrich or run["enrich"]
+                if run["version"] and run["version"] != self.table_version(enrich):
+                    raise ValueError(f"Run {run_id} was started with a different module table, platform overrides "
+                                     f"or enrichments; not resuming it (check --modules and {self.PLATFORMS_FILE})")
+                self.print_info(f"Resuming run {run_id} ({run['completed']}/{run['total']} rows done)")
+                store.set_status(run_id, "running")
+            else:
+                run_id = self.start_run(store, doctors or [], source, enrich, incremental)
+
+            total = store.get_run(run_id)["total"]
+            done = store.get_run(run_id)["completed"]
+            show_progress = self.config.get("show_progress", True)
+
+            print(f"\n{Colors.GREEN}Processing {total - done} doctor(s)...{Colors.RESET}\n", flush=True)
+
+            try:
+                for chunk in _chunked(store.pending_rows(run_id), self.CHECKPOINT_INTERVAL):
+                    store.record(run_id, self.process_rows(chunk, enrich))
+                    done += len(chunk)
+                    if show_progress:
+                        print(f"{Colors.CYAN}Checkpoint: {done}/{total} rows{Colors.RESET}", flush=True)
+            except KeyboardInterrupt:
+                store.set_status(run_id, "interrupted")
+                print(f"\n{Colors.YELLOW}Run {run_id} interrupted after {done}/{total} rows.{Colors.RESET}")
+                print(f"{Colors.YELLOW}Resume with: python3 DoctorDork.py batch --resume {run_id}{Colors.RESET}")
+                raise
+
+            store.set_status(run_id, "complete")
+        finally:
+            store.close()
+
+        print(f"\n{Colors.GREEN}Batch processing completed! Run ID: {run_id}{Colors.RESET}")
+        self.save_history({"type": "batch_processing", "run_id": run_id, "count": total})
+        return run_id
+
+    def queue_batch(self, doctors: List[Dict], source: str = "", enrich: tuple = (), incremental: bool = False,
+                    chunk_size: Optional[int] = None) -> str:
+        """Create a run and publish its pending rows as chunks for worker processes; returns the run ID"""
+        store = ResultStore(self.RESULTS_DB)
+        try:
+            run_id = self.start_run(store, doctors, source, enrich, incremental)
+            chunks = store.publish_chunks(run_id, chunk_size or self.CHUNK_SIZE)
+        finally:
+            store.close()
+        self.print_info(f"Queued {chunks} chunk(s) of up to {chunk_size or self.CHUNK_SIZE} rows")
+        print(f"{Colors.CYAN}Workers: python3 DoctorDork.py worker --run {run_id}{Colors.RESET}")
+        return run_id
+
+    def work(self, run_id: Optional[str] = None, worker_id: Optional[str] = None,
+             lease: float = 300, wait: bool = False) -> int:
+        """Claim and process queued chunks until none are left (or forever with `wait`)
+
+        Results are checkpointed into the run's rows as in run_batch and the
+        lease is renewed after each checkpoint; a chunk whose lease runs out
+        (crashed or stalled worker) is claimed again by another worker.
+        A run queued against a different module table or platform overrides
+        than this worker's is handed back and skipped, so its rows aren't
+        mixed with links from another table. Returns the number of rows processed.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        store = ResultStore(self.RESULTS_DB)
+        runs = {}
+        skipped = set()
+        processed = 0
+        try:
+            while True:
+                chunk = store.claim_chunk(worker_id, lease, run_id, exclude=tuple(skipped))
+                if not chunk:
+                    if not wait:
+                        break
+                    time.sleep(self.WORKER_POLL_INTERVAL)
+                    continue
+                chunk_run = chunk["run_id"]
+                if chunk_run not in runs:
+                    runs[chunk_run] = store.get_run(chunk_run)
+                run = runs[chunk_run]
+                if run["version"] and run["version"] != self.table_version(run["enrich"]):
+                    store.release_chunk(chunk)
+                    skipped.add(chunk_run)
+                    self.print_error(f"[{worker_id}] run {chunk_run} was queued with a different module table or "
+                                     f"platform overrides; not processing it (check --modules and "
+                                     f"{self.PLATFORMS_FILE})")
+                    if run_id:
+                        break
+                    continue
+                try:
+                    rows = store.pending_rows(chunk_run, chunk["start"], chunk["end"])
+                    for group in _chunked(rows, self.CHECKPOINT_INTERVAL):
+                        store.record(chunk_run, self.process_rows(group, run["enrich"]))
+                        processed += len(group)
+                        if not store.renew_lease(chunk, lease):
+                            self.print_warning(f"[{worker_id}] lost the lease on chunk {chunk['chunk_id']}")
+                            break
+                    else:
+                        store.finish_chunk(chunk)
+                        self.print_info(f"[{worker_id}] run {chunk_run} chunk {chunk['chunk_id']} done "
+                                        f"(rows {chunk['start']}-{chunk['end'] - 1})")
+                except KeyboardInterrupt:
+                    store.finish_chunk(chunk, "pending")
+                    raise
+                except Exception as e:
+                    self.print_error(f"[{worker_id}] chunk {chunk['chunk_id']} failed (attempt "
+                                     f"{chunk['attempts']}/{store.MAX_CHUNK_ATTEMPTS}): {e}")
+                    store.finish_chunk(chunk, "pending")
+        finally:
+            store.close()
+        return processed
+
+    def wait_for_run(self, run_id: str, workers: Optional[List] = None) -> str:
+        """Wait until a distributed run has no pending or leased chunks, then finalize its status
+
+        With local `workers` (Popen objects), stops waiting if they have all
+        exited with work still queued. Returns the final run status.
+        """
+        store = ResultStore(self.RESULTS_DB)
+        try:
+            last = None
+            while True:
+                progress = store.chunk_progress(run_id)
+                if progress != last and self.config.get("show_progress", True):
+                    total = sum(progress.values())
+                    self.emit(f"{Colors.CYAN}Chunks: {progress['done']}/{total} done, {progress['leased']} in progress, "
+                              f"{progress['pending']} queued, {progress['failed']} failed{Colors.RESET}")
+                last = progress
+                if not progress["pending"] and not progress["leased"]:
+                    break
+                if workers is not None and all(worker.poll() is not None for worker in workers):
+                    break
+                time.sleep(self.WORKER_POLL_INTERVAL)
+            status = "complete" if not (progress["pending"] or progress["leased"] or progress["failed"]) \
+                else "interrupted"
+            store.set_status(run_id, status)
+            run = store.get_run(run_id)
+        finally:
+            store.close()
+        if status == "complete":
+            print(f"\n{Colors.GREEN}Batch processing completed! Run ID: {run_id}{Colors.RESET}")
+            self.save_history({"type": "batch_processing", "run_id": run_id, "count": run["total"]})
+        else:
+            self.print_warning(f"Run {run_id} stopped with {run['total'] - run['completed']} row(s) left. "
+                               f"Finish it with: python3 DoctorDork.py batch --resume {run_id}")
+        return status
+
     def settings_menu(self):
         """Configure application settings"""
+        def flag(key):
+            return f"{Colors.GREEN if self.config[key] else Colors.RED}{self.config[key]}{Colors.RESET}"
+
         while True:
-            self.clear_screen()
-            self.print_logo()
-            print(f"\n{Colors.BOLD}{Colors.GREEN}=== SETTINGS ==={Colors.RESET}\n")
-
-            print(f"{Colors.YELLOW}Current Settings:{Colors.RESET}")
-            print(f"  1. Auto-open browser: {Colors.GREEN if self.config['auto_open_browser'] else Colors.RED}{self.config['auto_open_browser']}{Colors.RESET}")
-            print(f"  2. Export format: {Colors.CYAN}{self.config['export_format']}{Colors.RESET}")
-            print(f"  3. Save history: {Colors.GREEN if self.config['save_history'] else Colors.RED}{self.config['save_history']}{Colors.RESET}")
-            print(f"  4. Show progress: {Colors.GREEN if self.config['show_progress'] else Colors.RED}{self.config['show_progress']}{Colors.RESET}")
-            print(f"\n{Colors.YELLOW}Actions:{Colors.RESET}")
-            print(f"  5. View search history")
-            print(f"  6. Clear search history")
-            print(f"  7. Reset to defaults")
-            print(f"  8. Back to main menu")
-
-            choice = input(f"\n{Colors.WHITE}Select option (1-8): {Colors.RESET}").strip()
+            body = "\n".join([
+                f"\n{Colors.BOLD}{Colors.GREEN}=== SETTINGS ==={Colors.RESET}\n",
+                f"{Colors.YELLOW}Current Settings:{Colors.RESET}",
+                f"  1. Auto-open browser: {flag('auto_open_browser')}",
+                f"  2. Export format: {Colors.CYAN}{self.config['export_format']}{Colors.RESET}",
+                f"  3. Save history: {flag('save_history')}",
+                f"  4. Show progress: {flag('show_progress')}",
+                f"  5. NPI Registry lookups: {flag('npi_lookup')}",
+                f"\n{Colors.YELLOW}Actions:{Colors.RESET}",
+                "  6. View search history",
+                "  7. Clear search history",
+                "  8. Reset to defaults",
+                "  9. Back to main menu",
+                "",
+            ])
+            choice = self.screen.draw(self.logo(), body,
+                                      prompt=f"\n{Colors.WHITE}Select option (1-9): {Colors.RESET}").strip()
 
             if choice == '1':
                 self.config['auto_open_browser'] = not self.config['auto_open_browser']
-                self.save_config()
+                self.save_config('auto_open_browser')
             elif choice == '2':
-                print(f"\n{Colors.CYAN}Export formats: csv, json, html{Colors.RESET}")
-                fmt = input(f"{Colors.WHITE}Enter format: {Colors.RESET}").strip().lower()
-                if fmt in ['csv', 'json', 'html']:
-                    self.config['export_format'] = fmt
-                    self.save_config()
+                print(f"\n{Colors.CYAN}Export formats: csv, json, html (batches also: jsonl, columnar){Colors.RESET}")
+                print(f"{Colors.CYAN}Separate several with commas to write them all at once, e.g. csv,html{Colors.RESET}")
+                formats = self.export_formats(input(f"{Colors.WHITE}Enter format(s): {Colors.RESET}"))
+                if formats and all(fmt in EXPORT_SINKS for fmt in formats):
+                    self.config['export_format'] = ",".join(formats)
+                    self.save_config('export_format')
                 else:
                     self.print_error("Invalid format")
                     input(f"{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
             elif choice == '3':
                 self.config['save_history'] = not self.config['save_history']
-                self.save_config()
+                self.save_config('save_history')
             elif choice == '4':
                 self.config['show_progress'] = not self.config['show_progress']
-                self.save_config()
+                self.save_config('show_progress')
             elif choice == '5':
-                self.view_history()
+                self.config['npi_lookup'] = not self.config['npi_lookup']
+                self.save_config('npi_lookup')
             elif choice == '6':
+                self.view_history()
+            elif choice == '7':
                 confirm = input(f"{Colors.RED}Clear all history? (y/n): {Colors.RESET}").strip().lower()
                 if confirm == 'y':
                     self.history = []
                     try:
-                        self.HISTORY_FILE.unlink()
+                        with locked(self.HISTORY_FILE):
+                            for path in (self.HISTORY_FILE, self.LEGACY_HISTORY_FILE):
+                                if path.exists():
+                                    path.unlink()
+                            if self.HISTORY_DB.exists():
+                                index = HistoryIndex(self.HISTORY_DB)
+                                try:
+                                    index.clear()
+                                finally:
+                                    index.close()
                         self.print_success("History cleared!")
-                    except:
-                        pass
+                    except (OSError, sqlite3.Error) as e:
+                        self.print_error(f"Could not clear history: {e}")
                     input(f"{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-            elif choice == '7':
+            elif choice == '8':
                 confirm = input(f"{Colors.RED}Reset all settings? (y/n): {Colors.RESET}").strip().lower()
                 if confirm == 'y':
-                    self.config = {
-                        "auto_open_browser": True,
-                        "export_format": "html",
-                        "save_history": True,
-                        "show_progress": True,
-                    }
+                    self.config = dict(self.DEFAULT_CONFIG)
                     self.save_config()
                     self.print_success("Settings reset to defaults!")
                     input(f"{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
-            elif choice == '8':
+            elif choice == '9':
                 break
 
-    def view_history(self):
-        """View search history"""
-        self.clear_screen()
-        self.print_logo()
-        print(f"\n{Colors.BOLD}{Colors.GREEN}=== SEARCH HISTORY ==={Colors.RESET}\n")
-
-        if not self.history:
-            self.print_info("No search history found.")
-        else:
-            print(f"{Colors.CYAN}Last {min(20, len(self.history))} searches:{Colors.RESET}\n")
-            for i, entry in enumerate(reversed(self.history[-20:]), 1):
-                timestamp = entry.get('timestamp', 'Unknown')
-                search_type = entry.get('type', 'Unknown')
-                doctor_name = entry.get('doctor_name', 'N/A')
-                print(f"{Colors.YELLOW}{i}. {Colors.RESET}{timestamp} - {search_type} - {doctor_name}")
+    def query_history(self, **filters) -> List[Dict]:
+        """Search the full history archive (see HistoryIndex.query for the filters), newest first"""
+        index = HistoryIndex(self.HISTORY_DB)
+        try:
+            index.sync(self.HISTORY_FILE)
+            return index.query(**filters)
+        finally:
+            index.close()
 
-        input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+    def view_history(self):
+        """View and search the search history"""
+        filters = {"limit": 20}
+        while True:
+            self.clear_screen(self.logo())
+            print(f"\n{Colors.BOLD}{Colors.GREEN}=== SEARCH HISTORY ==={Colors.RESET}\n")
+            started = time.perf_counter()
+            try:
+                entries = self.query_history(**filters)
+            except (OSError, sqlite3.Error) as e:
+                self.print_error(f"Could not search history: {e}")
+                entries = []
+            elapsed = (time.perf_counter() - started) * 1000
+            if not entries:
+                self.print_info("No matching searches found." if len(filters) > 1 else "No search history found.")
+            else:
+                title = "Matching searches" if len(filters) > 1 else "Last searches"
+                print(f"{Colors.CYAN}{title} ({len(entries)}, {elapsed:.0f} ms):{Colors.RESET}\n")
+                for i, entry in enumerate(entries, 1):
+                    timestamp = entry.get('timestamp', 'Unknown')
+                    search_type = entry.get('type', 'Unknown')
+                    doctor_name = entry.get('doctor_name', 'N/A')
+                    place = ", ".join(part for part in (entry.get('city'), entry.get('state')) if part)
+                    print(f"{Colors.YELLOW}{i}. {Colors.RESET}{timestamp} - {search_type} - {doctor_name}"
+                          + (f" ({place})" if place else ""))
+
+            print(f"\n{Colors.CYAN}Filter by name words and state:TX type:contact_search "
+                  f"since:2026-01-01 until:2026-01-31{Colors.RESET}")
+            text = input(f"{Colors.WHITE}Search history (Enter to go back): {Colors.RESET}").strip()
+            if not text:
+                break
+            filters = {**HistoryIndex.parse_filter(text), "limit": 50}
 
     def export_results(self, doctor_info: Dict):
-        """Export search results"""
-        export_format = self.config.get('export_format', 'html')
+        """Export search results in every configured format"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"doctordork_results_{timestamp}.{export_format}"
+        for export_format in self.export_formats():
+            filename = f"doctordork_results_{timestamp}.{export_format}"
+            try:
+                if export_format == 'csv':
+                    self.export_csv(filename, doctor_info)
+                elif export_format == 'json':
+                    self.export_json(filename, doctor_info)
+                elif export_format == 'html':
+                    self.export_html(filename, doctor_info)
+                else:
+                    continue
 
-        try:
-            if export_format == 'csv':
-                self.export_csv(filename, doctor_info)
-            elif export_format == 'json':
-                self.export_json(filename, doctor_info)
-            elif export_format == 'html':
-                self.export_html(filename, doctor_info)
-
-            self.print_success(f"Results exported to: {filename}")
-        except Exception as e:
-            self.print_error(f"Export failed: {e}")
+                self.print_success(f"Results exported to: {filename}")
+            except Exception as e:
+                self.print_error(f"Export failed: {e}")
 
     def export_csv(self, filename: str, doctor_info: Dict):
         """Export results to CSV"""
@@ -1403,65 +4703,1187 @@ class DoctorDork:
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(html_content)
 
-    def export_batch_results(self, doctors: List[Dict]):
-        """Export batch processing results"""
-        export_format = self.config.get('export_format', 'html')
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"doctordork_batch_{timestamp}.{export_format}"
+    def process_rows(self, rows: List[tuple], enrich: tuple = ()) -> List[tuple]:
+        """Generate links (and requested enrichments) for (row_index, doctor_info) pairs"""
+        # Rows that are identical once specialties are normalized share one set of links
+        generated = {}
+        results = []
+        for _, doctor_info in rows:
+            key = tuple(doctor_info.get(field, "") for field in ("doctor_name", "city", "state")) + (
+                doctor_info.get("taxonomy_code") or doctor_info.get("specialty", "").strip().lower(),)
+            if key not in generated:
+                generated[key] = self.generate_links(doctor_info)
+            results.append(dict(generated[key]))
+        if enrich:
+            extras = self.enrich([doctor_info for _, doctor_info in rows], enrich)
+            for result, extra in zip(results, extras):
+                result.update(extra)
+        return [(row_index, result) for (row_index, _), result in zip(rows, results)]
+
+    def enrich(self, doctors: List[Dict], categories: tuple) -> List[Dict]:
+        """Run enrichers over a group of doctors, returning {category: [[label, value], ...]} per doctor"""
+        extras = [{} for _ in doctors]
+        for category in categories:
+            values = getattr(self, self.ENRICHERS[category])(doctors)
+            for extra, fields in zip(extras, values):
+                if fields:
+                    extra[category] = [[label, value] for label, value in fields.items() if value not in ("", None)]
+        return extras
+
+    def enrich_columns(self, doctors: List[Dict], categories: tuple) -> Dict[str, List[str]]:
+        """Run enrichers over a roster and return one "<category>.<label>" column per field"""
+        columns = {}
+        for category in categories:
+            values = getattr(self, self.ENRICHERS[category])(doctors)
+            labels = list(dict.fromkeys(label for fields in values for label in fields))
+            for label in labels:
+                columns[f"{category}.{label}"] = [fields.get(label) or "" for fields in values]
+        return columns
+
+    def enrichment_enabled(self, category: str) -> bool:
+        """Whether an enrichment runs automatically in interactive lookups"""
+        if category == "npi_registry":
+            return bool(self.config.get("npi_lookup"))
+        if category == "oig_exclusions":
+            return self.LEIE_INDEX_FILE.exists()
+        if category == "pubmed_index":
+            return self.PUBMED_INDEX_DB.exists()
+        if category == "cms_affiliations":
+            return self.HOSPITALS_DB.exists()
+        return False
+
+    def npi_client(self) -> NPIRegistryClient:
+        """Create an NPI Registry client using the configured API URL and the local cache"""
+        return NPIRegistryClient(self.config.get("npi_api_url") or None, cache_path=self.NPI_CACHE_DB)
+
+    def enrich_npi(self, doctors: List[Dict]) -> List[Dict]:
+        """Resolve NPI, primary taxonomy and practice address from the NPI Registry API"""
+        client = self.npi_client()
+        summaries = []
+        try:
+            for chunk in _chunked(doctors, 5000):
+                summaries.extend(client.resolve(chunk))
+        finally:
+            client.close()
+        return [{
+            "NPI": summary.get("npi"),
+            "Registered Name": summary.get("name"),
+            "Credential": summary.get("credential"),
+            "Taxonomy": " ".join(p for p in (summary.get("taxonomy_code"), summary.get("taxonomy")) if p),
+            "Practice Address": summary.get("practice_address"),
+            "Phone": summary.get("phone"),
+            "Registry Matches": str(summary["matches"]) if "matches" in summary else None,
+            "Error": summary.get("error"),
+        } for summary in summaries]
+
+    def exclusion_index(self) -> Optional[ExclusionIndex]:
+        """Load the imported LEIE exclusion index once, or None if it hasn't been imported"""
+        if self._exclusions is None and self.LEIE_INDEX_FILE.exists():
+            try:
+                self._exclusions = ExclusionIndex.load(self.LEIE_INDEX_FILE)
+            except (OSError, ValueError) as e:
+                self.print_error(f"Could not load exclusion index: {e}")
+        return self._exclusions
+
+    def enrich_exclusions(self, doctors: List[Dict]) -> List[Optional[Dict]]:
+        """Screen doctors against the OIG LEIE exclusion index"""
+        index = self.exclusion_index()
+        if not index:
+            return [None] * len(doctors)
+        screened = []
+        for matches in (index.screen(doctor_info) for doctor_info in doctors):
+            if not matches:
+                screened.append({"Status": "No match"})
+                continue
+            best = matches[0]
+            screened.append({
+                "Status": f"POSSIBLE EXCLUSION ({best['match']} match)",
+                "Excluded Name": " ".join(p for p in (best["FIRSTNAME"], best["MIDNAME"], best["LASTNAME"]) if p),
+                "Excluded NPI": best["NPI"].strip("0") and best["NPI"],
+                "Exclusion Type": best["EXCLTYPE"],
+                "Exclusion Date": best["EXCLDATE"],
+                "Excluded Location": ", ".join(p for p in (best["CITY"], best["STATE"]) if p),
+                "Other Matches": str(len(matches) - 1) if len(matches) > 1 else None,
+            })
+        return screened
+
+    def gazetteer_key(self) -> str:
+        """Snapshot key of the imported gazetteer file"""
+        st = self.GAZETTEER_FILE.stat()
+        return Snapshot.key(Gazetteer, st.st_mtime_ns, st.st_size)
+
+    def gazetteer(self) -> Optional[Gazetteer]:
+        """Load the imported ZIP gazetteer once, or None if it hasn't been imported"""
+        if self._gazetteer is None and self.GAZETTEER_FILE.exists():
+            with self.platform_lock:
+                if self._gazetteer is None:
+                    try:
+                        self._gazetteer = self.snapshot.get("gazetteer", self.gazetteer_key(), Gazetteer,
+                                                            lambda: Gazetteer.load(self.GAZETTEER_FILE))
+                    except (OSError, ValueError, KeyError) as e:
+                        self.print_error(f"Could not load gazetteer: {e}")
+        return self._gazetteer
+
+    def normalize_locations(self, doctors: List[Dict]) -> Dict[str, int]:
+        """Validate and correct roster city/state/zip in place against the gazetteer"""
+        gazetteer = self.gazetteer()
+        counts = {"ok": 0, "corrected": 0, "unknown": 0}
+        if not gazetteer:
+            return counts
+        unknown = []
+        for row, doctor_info in enumerate(doctors, 1):
+            status, fixes = gazetteer.normalize(doctor_info)
+            doctor_info.update(fixes)
+            counts[status] += 1
+            if status == "unknown":
+                unknown.append(f"#{row} {doctor_info.get('city', '')}, {doctor_info.get('state', '')}")
+        if counts["corrected"]:
+            self.print_info(f"Corrected {counts['corrected']} location(s) from the gazetteer")
+        if unknown:
+            self.print_warning(f"{len(unknown)} location(s) not found in the gazetteer: {'; '.join(unknown[:5])}"
+                               + (" ..." if len(unknown) > 5 else ""))
+        return counts
+
+    def enrich_publications(self, doctors: List[Dict]) -> List[Optional[Dict]]:
+        """Attach publication counts from the local PubMed baseline index"""
+        if not self.PUBMED_INDEX_DB.exists():
+            return [None] * len(doctors)
+        index = PubMedIndex(self.PUBMED_INDEX_DB)
+        try:
+            found = [index.lookup(doctor_info.get("doctor_name", "")) for doctor_info in doctors]
+        finally:
+            index.close()
+        return [found_row and {
+            "PubMed Articles": str(found_row["count"]),
+            "Matched On": "first initial only (may include other authors)" if found_row["match"] == "initial"
+                          else found_row["match"],
+            "PMIDs": " ".join(found_row["pmids"]),
+        } for found_row in found]
+
+    def enrich_hospitals(self, doctors: List[Dict]) -> List[Optional[Dict]]:
+        """Attach affiliated hospitals from the local CMS facility affiliation index"""
+        if not self.HOSPITALS_DB.exists():
+            return [None] * len(doctors)
+        index = HospitalIndex(self.HOSPITALS_DB)
+        enriched = []
+        try:
+            for doctor_info in doctors:
+                match, hospitals = index.affiliations(doctor_info)
+                if hospitals:
+                    enriched.append({
+                        "Affiliated Hospitals": "; ".join(
+                            f"{h['name']} ({h['city'].title()}, {h['state']})" for h in hospitals),
+                        "Matched On": match,
+                        "Hospital Phones": "; ".join(h["phone"] for h in hospitals if h["phone"]),
+                    })
+                    continue
+                # No affiliation on file: list hospitals in the doctor's city instead
+                local = index.hospitals_in(doctor_info["state"], doctor_info.get("city", ""), limit=5) \
+                    if doctor_info.get("state") else []
+                enriched.append({
+                    "Affiliated Hospitals": "None on file",
+                    "Hospitals In Area": "; ".join(h["name"] for h in local),
+                })
+        finally:
+            index.close()
+        return enriched
+
+    def export_run(self, run_id: str, filename: Optional[str] = None, changed_only: bool = False,
+                   **options) -> Optional[str]:
+        """Export the completed rows of a batch run (only the regenerated ones with `changed_only`)
+
+        `options` are passed on to export_batch_results (format, compression, sharding).
+        """
+        store = ResultStore(self.RESULTS_DB)
+        try:
+            rows = ((info, results) for _, info, results in store.iter_results(run_id, changed_only=changed_only))
+            return self.export_batch_results(rows, filename, **options)
+        finally:
+            store.close()
+
+    def export_formats(self, export_format: Optional[str] = None) -> List[str]:
+        """Formats from a comma-separated list (default: the export_format setting)"""
+        formats = export_format or self.config.get('export_format', 'html')
+        return [fmt.strip().lower() for fmt in formats.split(',') if fmt.strip()]
+
+    def export_batch_results(self, rows, filename: Optional[str] = None, export_format: Optional[str] = None,
+                             compress: str = "", shard_rows: int = 0, shard_bytes: int = 0) -> Optional[List[str]]:
+        """Export batch processing results from (doctor_info, results) pairs
+
+        `export_format` may list several formats ("csv,jsonl,html"); the rows
+        are read once and streamed to every format at the same time (see
+        ExportFanout). CSV and JSON lines can be compressed and sharded (see
+        ShardedOutput); a doctor's rows always stay in one shard. Options a
+        format can't honour are refused rather than ignored.
+        """
+        formats = self.export_formats(export_format)
+        unknown = [fmt for fmt in formats if fmt not in EXPORT_SINKS]
+        if unknown or not formats:
+            self.print_error(f"Unknown export format: {', '.join(unknown) or '(none)'} "
+                             f"(use {', '.join(EXPORT_SINKS)})")
+            return None
+        if 'json' in formats and (shard_rows or shard_bytes):
+            self.print_warning("A JSON document can't be sharded; writing JSON lines instead.")
+            formats = list(dict.fromkeys('jsonl' if fmt == 'json' else fmt for fmt in formats))
+        refused = [f"{fmt} can't be {option}" for fmt in formats
+                   for option, wanted, honoured in (("compressed", compress, EXPORT_SINKS[fmt].COMPRESSES),
+                                                    ("sharded", shard_rows or shard_bytes, EXPORT_SINKS[fmt].SHARDS))
+                   if wanted and not honoured]
+        if refused:
+            self.print_error(f"Unsupported export options: {'; '.join(refused)}")
+            return None
+        if filename:
+            path = Path(filename)
+            base = str(path.with_suffix('')) if path.suffix.lstrip('.') in EXPORT_SINKS else filename
+        else:
+            base = f"doctordork_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
         try:
-            if export_format == 'csv':
-                with open(filename, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=['doctor_name', 'city', 'state', 'specialty'])
-                    writer.writeheader()
-                    writer.writerows(doctors)
-            elif export_format == 'json':
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump({"timestamp": datetime.now().isoformat(), "doctors": doctors}, f, indent=4)
-
-            self.print_success(f"Batch results exported to: {filename}")
+            sinks = [EXPORT_SINKS[fmt](base, compress=compress, shard_rows=shard_rows, shard_bytes=shard_bytes)
+                     for fmt in formats]
+            written = ExportFanout(sinks).run(rows)
         except Exception as e:
             self.print_error(f"Export failed: {e}")
+            return None
+
+        for fmt, path in zip(formats, written):
+            self.print_success(f"Batch results exported ({fmt}): {path}")
+        return written
 
     def run(self):
         """Main application loop"""
-        while True:
-            self.clear_screen()
-            self.print_logo()
-            self.print_menu()
+        try:
+            message = ""
+            while True:
+                choice = self.screen.draw(self.logo(), self.menu(), message,
+                                          prompt=f"\n{Colors.WHITE}Select an option (1-9): {Colors.RESET}").strip()
+                message = ""
+
+                if choice == '1':
+                    self.contact_search()
+                elif choice == '2':
+                    self.medical_board_lookup()
+                elif choice == '3':
+                    self.review_aggregation()
+                elif choice == '4':
+                    self.ethics_violation_report()
+                elif choice == '5':
+                    self.social_media_search()
+                elif choice == '6':
+                    self.comprehensive_search()
+                elif choice == '7':
+                    self.batch_processing()
+                elif choice == '8':
+                    self.settings_menu()
+                elif choice == '9':
+                    self.clear_screen()
+                    print(f"\n{Colors.CYAN}Thank you for using DoctorDork!{Colors.RESET}")
+                    print(f"{Colors.GREEN}Goodbye!{Colors.RESET}\n")
+                    sys.exit(0)
+                else:
+                    message = f"{Colors.RED}✗ Invalid option. Please select 1-9.{Colors.RESET}\n"
+        finally:
+            # The goodbye, or whatever a screen printed before an interrupt, is still in the last frame
+            self.screen.end()
+
+
+class TTLCache:
+    """Thread-safe LRU cache of at most `max_size` entries that also expire after `ttl` seconds"""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def get(self, key) -> tuple:
+        """(True, value) for a fresh entry, else (False, None)"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self.entries[key]
+                self.expired += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.entries), "max_size": self.max_size, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                    "evictions": self.evictions, "expired": self.expired}
+
+
+class SingleFlight:
+    """Runs one computation per key at a time; concurrent callers with the same key share its result"""
+
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.value = None
+            self.error = None
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.computations = self.coalesced = 0
+
+    def do(self, key, fn):
+        """Return fn()'s result, waiting for an identical in-flight call instead of starting another"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = self.Call()
+                self.computations += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            # Waiters get the leader's failure whatever it is, never a silent None
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"computations": self.computations, "coalesced": self.coalesced, "in_flight": len(self.calls)}
+
+
+class LookupService:
+    """Doctor lookups for server mode: result cache, then single-flight, then generate
+
+    Queries are keyed on their raw fields, except that the specialty is
+    keyed by its NUCC code so "cardio" and "Cardiology" share an entry; a
+    cache hit skips location normalization as well as link generation and
+    enrichment. Identical
+    queries arriving while one is being computed wait for it instead of
+    repeating the work. Platform overrides are polled by one timer thread
+    rather than by every request, and the cache is dropped when they reload.
+    """
+
+    FIELDS = ("doctor_name", "city", "state", "specialty", "zip")
+
+    # Computed chunks a streamed batch may hold while waiting for a slow client
+    STREAM_QUEUE_CHUNKS = 4
+
+    def __init__(self, app: "DoctorDork", cache_size: int = 10000, ttl: float = 300):
+        self.app = app
+        self.cache = TTLCache(cache_size, ttl)
+        self.flights = SingleFlight()
+        self.stats_lock = threading.Lock()
+        self.started = time.time()
+        self.requests = self.errors = 0
+        self.batches = self.batch_rows = 0
+        app.watch_platforms = False
+        app.reload_platforms()
+        app.gazetteer()
+        self.stopping = threading.Event()
+        self.watcher = threading.Thread(target=self.watch_overrides, daemon=True)
+        self.watcher.start()
+
+    def watch_overrides(self):
+        """Reload platform overrides when they change, dropping answers built from the old tables"""
+        while not self.stopping.wait(self.app.platform_overrides.interval):
+            if self.app.reload_platforms():
+                self.cache.clear()
+
+    def close(self):
+        self.stopping.set()
+        self.watcher.join()
+
+    def key(self, doctor_info: Dict, enrich: tuple) -> tuple:
+        """Cache key of a query: its fields, with the specialty as its NUCC code when one resolves"""
+        fields = [" ".join(str(doctor_info.get(field) or "").lower().split()) for field in self.FIELDS]
+        entry = self.app.taxonomy.normalize(fields[3])
+        if entry:
+            fields[3] = entry["code"]
+        return tuple(fields) + (tuple(sorted(enrich)),)
+
+    def normalize(self, doctor_info: Dict) -> Dict:
+        """Query fields with location and specialty normalized (without console output)"""
+        info = {field: str(doctor_info.get(field) or "").strip() for field in self.FIELDS[:4]}
+        if doctor_info.get("zip"):
+            info["zip"] = str(doctor_info["zip"]).strip()
+        gazetteer = self.app.gazetteer()
+        if gazetteer:
+            info.update(gazetteer.normalize(info)[1])
+        return self.app.normalize_specialty(info)
+
+    def compute(self, doctor_info: Dict, enrich: tuple) -> Dict:
+        """Normalize a query and build its links and enrichments"""
+        info = self.normalize(doctor_info)
+        results = self.app.process_rows([(0, info)], enrich)[0][1]
+        return {"doctor_info": info, "results": results}
+
+    def stream_batch(self, doctors: List[Dict], enrich: tuple = (), stop: Optional[threading.Event] = None):
+        """Yield (row_index, doctor_info, results) for a batch as it is computed
+
+        A producer thread runs the batch engine a chunk at a time and hands
+        chunks over through a queue of at most STREAM_QUEUE_CHUNKS, so a
+        slow reader stalls the producer instead of buffering the batch.
+        Setting `stop` (e.g. the client went away) ends the producer.
+        """
+        stop = stop or threading.Event()
+        ready = queue.Queue(self.STREAM_QUEUE_CHUNKS)
+        with self.stats_lock:
+            self.batches += 1
+
+        def hand_over(item) -> bool:
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-            choice = input(f"\n{Colors.WHITE}Select an option (1-9): {Colors.RESET}").strip()
+        def produce():
+            try:
+                for start in range(0, len(doctors), self.app.CHECKPOINT_INTERVAL):
+                    rows = [(i, self.normalize(doctors[i]))
+                            for i in range(start, min(start + self.app.CHECKPOINT_INTERVAL, len(doctors)))]
+                    chunk = [(i, info, results) for (i, info), (_, results)
+                             in zip(rows, self.app.process_rows(rows, enrich))]
+                    if not hand_over(chunk):
+                        return
+                hand_over(None)
+            except Exception as e:
+                hand_over(e)
 
-            if choice == '1':
-                self.contact_search()
-            elif choice == '2':
-                self.medical_board_lookup()
-            elif choice == '3':
-                self.review_aggregation()
-            elif choice == '4':
-                self.ethics_violation_report()
-            elif choice == '5':
-                self.social_media_search()
-            elif choice == '6':
-                self.comprehensive_search()
-            elif choice == '7':
-                self.batch_processing()
-            elif choice == '8':
-                self.settings_menu()
-            elif choice == '9':
-                self.clear_screen()
-                print(f"\n{Colors.CYAN}Thank you for using DoctorDork!{Colors.RESET}")
-                print(f"{Colors.GREEN}Goodbye!{Colors.RESET}\n")
-                sys.exit(0)
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                chunk = ready.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                for row in chunk:
+                    yield row
+                with self.stats_lock:
+                    self.batch_rows += len(chunk)
+        finally:
+            stop.set()
+
+    def lookup(self, doctor_info: Dict, enrich: tuple = ()) -> Dict:
+        with self.stats_lock:
+            self.requests += 1
+        key = self.key(doctor_info, enrich)
+        found, answer = self.cache.get(key)
+        if found:
+            return answer
+
+        def compute():
+            answer = self.compute(doctor_info, enrich)
+            # Don't keep answers with a failed enrichment (e.g. the NPI API was down) around
+            if not any(label == "Error" for category in enrich
+                       for label, _ in answer["results"].get(category, [])):
+                self.cache.put(key, answer)
+            return answer
+
+        try:
+            return self.flights.do(key, compute)
+        except Exception:
+            with self.stats_lock:
+                self.errors += 1
+            raise
+
+    def metrics(self) -> Dict:
+        return {"uptime_seconds": round(time.time() - self.started, 1), "requests": self.requests,
+                "errors": self.errors, "batches": self.batches, "batch_rows": self.batch_rows,
+                "cache": self.cache.stats(), "coalescing": self.flights.stats()}
+
+    @staticmethod
+    def prometheus(metrics: Dict, prefix: str = "doctordork") -> str:
+        """Flatten metrics into Prometheus text exposition format"""
+        lines = []
+        for name, value in metrics.items():
+            if isinstance(value, dict):
+                lines.append(LookupService.prometheus(value, f"{prefix}_{name}").rstrip("\n"))
             else:
-                self.print_error("Invalid option. Please select 1-9.")
-                input(f"\n{Colors.CYAN}Press Enter to continue...{Colors.RESET}")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP API for server mode
+
+    GET /lookup?doctor_name=...&city=...&state=...&specialty=...&enrich=npi_registry,pubmed_index
+    POST /lookup with the same fields as a JSON object ("enrich" may be a list)
+    POST /batch with {"doctors": [...], "enrich": [...]} or one doctor per line (NDJSON);
+        results stream back as NDJSON, or as Server-Sent Events with progress
+        when the client accepts text/event-stream (or passes ?format=sse)
+    GET /metrics (JSON, or Prometheus text with ?format=prometheus)
+    GET /health
+    """
+
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    # Streamed batch rows written per chunk
+    STREAM_FLUSH_ROWS = 50
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        route = parsed.path.rstrip("/")
+        if route == "/lookup":
+            self.answer_lookup(params)
+        elif route == "/metrics":
+            metrics = self.service.metrics()
+            if params.get("format") == "prometheus":
+                self.send_body(200, LookupService.prometheus(metrics).encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                self.send_json(200, metrics)
+        elif route == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        route = parsed.path.rstrip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if route == "/batch" and "ndjson" in (self.headers.get("Content-Type") or ""):
+                body = {"doctors": [json.loads(line) for line in raw.splitlines() if line.strip()]}
+            else:
+                body = json.loads(raw or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "Request body must be JSON"})
+            return
+        if route == "/batch" and isinstance(body, list):
+            body = {"doctors": body}
+        if not isinstance(body, dict):
+            self.send_json(400, {"error": "Expected a JSON object"})
+        elif route == "/lookup":
+            self.answer_lookup(body)
+        elif route == "/batch":
+            self.answer_batch(body, params)
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def read_enrich(self, value) -> Optional[tuple]:
+        """Requested enrichment categories, or None (after answering 400) if any is unknown"""
+        categories = value if isinstance(value, list) else str(value or "").split(",")
+        categories = tuple(dict.fromkeys(c.strip() for c in categories if c and c.strip()))
+        unknown = [c for c in categories if c not in DoctorDork.ENRICHERS]
+        if unknown:
+            self.send_json(400, {"error": f"Unknown enrichment: {', '.join(unknown)}",
+                                 "available": list(DoctorDork.ENRICHERS)})
+            return None
+        return categories
+
+    def answer_lookup(self, query: Dict):
+        if not query.get("doctor_name"):
+            self.send_json(400, {"error": "doctor_name is required"})
+            return
+        enrich = self.read_enrich(query.get("enrich"))
+        if enrich is None:
+            return
+        try:
+            self.send_json(200, self.service.lookup(query, enrich))
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+
+    def answer_batch(self, body: Dict, params: Dict):
+        doctors = body.get("doctors")
+        if not isinstance(doctors, list) or not all(isinstance(d, dict) for d in doctors):
+            self.send_json(400, {"error": "doctors must be a list of objects"})
+            return
+        enrich = self.read_enrich(body.get("enrich", params.get("enrich")))
+        if enrich is None:
+            return
+        sse = params.get("format") == "sse" or "text/event-stream" in (self.headers.get("Accept") or "")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        stop = threading.Event()
+        total, done, lines = len(doctors), 0, []
+        try:
+            for row, info, results in self.service.stream_batch(doctors, enrich, stop):
+                record = json.dumps({"row": row, "doctor_info": info, "results": results})
+                lines.append(f"event: result\ndata: {record}\n\n" if sse else record + "\n")
+                done += 1
+                if done % self.STREAM_FLUSH_ROWS == 0 or done == total:
+                    if sse:
+                        lines.append(f"event: progress\ndata: {json.dumps({'done': done, 'total': total})}\n\n")
+                    self.send_chunk("".join(lines).encode("utf-8"))
+                    lines = []
+            if sse:
+                lines.append(f"event: done\ndata: {json.dumps({'done': done, 'total': total})}\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            stop.set()
+            self.close_connection = True
+            return
+        except Exception as e:
+            error = json.dumps({"error": str(e), "done": done})
+            lines.append(f"event: error\ndata: {error}\n\n" if sse else error + "\n")
+        try:
+            if lines:
+                self.send_chunk("".join(lines).encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def send_chunk(self, data: bytes):
+        """Write one chunk of a chunked (streamed) response"""
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status: int, data):
+        self.send_body(status, json.dumps(data).encode("utf-8"), "application/json")
+
+    def send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser for headless operation"""
+    parser = argparse.ArgumentParser(
+        prog="DoctorDork.py",
+        description="DoctorDork - Medical Professional Research Tool. Run without arguments for the interactive menu."
+    )
+    parser.add_argument("--modules", metavar="FILE", help="Use a JSON module table instead of the built-in one")
+    parser.add_argument("--npi-api", metavar="URL", help="NPI Registry API base URL (e.g. a local stub server)")
+    parser.add_argument("--link-host", metavar="HOST:PORT",
+                        help="Send link checks to this host instead of the real sites (e.g. a local stub server)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="Generate links for a roster CSV (Name, City, State, Specialty)")
+    batch.add_argument("roster", nargs="?", help="Roster CSV file")
+    batch.add_argument("--resume", metavar="RUN_ID", help="Resume an interrupted run")
+    batch.add_argument("--export", action="store_true", help="Export the results when the run completes")
+    batch.add_argument("--incremental", action="store_true",
+                       help="Reuse rows unchanged since the last completed run of the same roster")
+    batch.add_argument("--changed-only", action="store_true", help="Export only rows regenerated by this run")
+    batch.add_argument("--format", metavar="FORMATS",
+                       help="Comma-separated export formats written in one pass: csv, json, jsonl, html, "
+                            "columnar (default: the export_format setting)")
+    batch.add_argument("--compress", choices=["gzip", "zstd", "lz4"], default="",
+                       help="Compress the export (zstd and lz4 need their Python packages)")
+    batch.add_argument("--shard-rows", type=int, default=0, help="Start a new export file every N doctors")
+    batch.add_argument("--shard-size", type=float, default=0,
+                       help="Start a new export file after N MB of uncompressed output")
+    batch.add_argument("--npi", action="store_true", help="Attach NPI, taxonomy and practice address from the NPI Registry")
+    batch.add_argument("--leie", action="store_true", help="Screen each row against the imported LEIE exclusion list")
+    batch.add_argument("--pubmed", action="store_true", help="Attach publication counts from the local PubMed index")
+    batch.add_argument("--hospitals", action="store_true", help="Attach affiliated hospitals from the local CMS index")
+    batch.add_argument("--distributed", action="store_true",
+                       help="Queue the roster in chunks for worker processes and wait for them to finish")
+    batch.add_argument("--chunk-size", type=int, default=DoctorDork.CHUNK_SIZE,
+                       help=f"Rows per queued chunk (default: {DoctorDork.CHUNK_SIZE})")
+    batch.add_argument("--workers", type=int, default=0,
+                       help="Local worker processes to start for a distributed run (default: 0, external workers only)")
+
+    worker = subparsers.add_parser("worker", help="Process queued chunks of distributed batch runs")
+    worker.add_argument("--run", metavar="RUN_ID", help="Only take chunks from this run")
+    worker.add_argument("--id", help="Worker name shown in chunk leases (default: host:pid)")
+    worker.add_argument("--lease", type=float, default=300,
+                        help="Seconds a claimed chunk stays reserved without a checkpoint (default: 300)")
+    worker.add_argument("--wait", action="store_true", help="Keep polling for new chunks instead of exiting when idle")
+
+    subparsers.add_parser("runs", help="List batch runs in the result store")
+
+    results = subparsers.add_parser("results", help="Print the completed rows of a run as JSON lines")
+    results.add_argument("run_id", help="Run ID")
+    results.add_argument("--all", action="store_true", help="Include rows that have not completed yet")
+    results.add_argument("--changed", action="store_true", help="Only rows regenerated by an incremental run")
+
+    bulk = subparsers.add_parser("bulk", help="Generate all links for a large roster column-wise into one CSV")
+    bulk.add_argument("roster", help="Roster CSV file")
+    bulk.add_argument("-o", "--output", help="Output CSV (default: doctordork_bulk_TIMESTAMP.csv)")
+    bulk.add_argument("--npi", action="store_true", help="Add NPI Registry columns")
+    bulk.add_argument("--pubmed", action="store_true", help="Add publication count columns from the local PubMed index")
+    bulk.add_argument("--hospitals", action="store_true", help="Add affiliated hospital columns from the local CMS index")
+
+    leie = subparsers.add_parser("leie", help="Import or inspect the OIG LEIE exclusion list")
+    leie.add_argument("csv_file", nargs="?", help="LEIE CSV (UPDATED.csv) to import")
+
+    pubmed = subparsers.add_parser("pubmed", help="Build or query the local PubMed baseline publication index")
+    pubmed.add_argument("paths", nargs="*", help="Baseline .xml/.xml.gz files or directories to ingest")
+    pubmed.add_argument("--workers", type=int, default=None, help="Parallel parser processes (default: CPU count)")
+    pubmed.add_argument("--lookup", metavar="NAME", help="Print the publication count for a doctor")
+
+    hospitals = subparsers.add_parser("hospitals", help="Import or query the CMS hospital and facility affiliation index")
+    hospitals.add_argument("--general", metavar="CSV", help="Hospital General Information CSV to import")
+    hospitals.add_argument("--affiliations", metavar="CSV", help="Doctors and Clinicians Facility Affiliation CSV to import")
+    hospitals.add_argument("--doctor", metavar="NAME", help="Print a doctor's affiliated hospitals")
+    hospitals.add_argument("--npi", default="", help="Doctor's NPI, used before the name")
+    hospitals.add_argument("--state", default="", help="State (2-letter code) to list hospitals or narrow a name match")
+    hospitals.add_argument("--city", default="", help="City to list hospitals in")
+
+    gazetteer = subparsers.add_parser("gazetteer", help="Import or query the ZIP/city gazetteer (GeoNames US.txt)")
+    gazetteer.add_argument("geonames_file", nargs="?", help="GeoNames US postal code file to import")
+    gazetteer.add_argument("--zip", help="Show a ZIP code's city, state and centroid")
+    gazetteer.add_argument("--city", help="Show the ZIP codes for a city (use with --state)")
+    gazetteer.add_argument("--state", default="", help="State (2-letter code)")
+
+    providers = subparsers.add_parser("providers", help="Import the NPPES file into the local provider index")
+    providers.add_argument("nppes_file", nargs="?", help="NPPES npidata_pfile CSV to import")
+    providers.add_argument("--update", metavar="CSV", action="append", default=[],
+                           help="Apply a weekly NPPES incremental file instead of rebuilding (repeatable)")
+    providers.add_argument("--deactivated", metavar="CSV", help="Deactivated NPI report (NPI in the first column)")
+
+    nearby = subparsers.add_parser("nearby", help="Providers within N miles of a ZIP code")
+    nearby.add_argument("zip", help="ZIP code")
+    nearby.add_argument("--miles", type=float, default=10, help="Search radius in miles (default: 10)")
+    nearby.add_argument("--taxonomy", default="", help="Taxonomy code or code prefix to filter on")
+    nearby.add_argument("--limit", type=int, default=50, help="Maximum providers to list (default: 50, 0 for all)")
+    nearby.add_argument("--json", action="store_true", help="Print the providers as JSON")
+
+    screen = subparsers.add_parser("screen", help="Screen a roster against the imported LEIE exclusion list")
+    screen.add_argument("roster", help="Roster CSV file (an npi column is used when present)")
+    screen.add_argument("-o", "--output", help="Output CSV (default: doctordork_screen_TIMESTAMP.csv)")
+    screen.add_argument("--all", action="store_true", help="Write every row, not just possible exclusions")
+
+    npi = subparsers.add_parser("npi", help="Look up a doctor in the NPI Registry API")
+    npi.add_argument("doctor_name", help="Doctor's name")
+    npi.add_argument("--city", default="", help="City, used to pick the best match")
+    npi.add_argument("--state", default="", help="State (2-letter code)")
+
+    sweep = subparsers.add_parser("sweep", help="Board and NPI links for a doctor across all 51 jurisdictions")
+    sweep.add_argument("doctor_name", help="Doctor's name")
+    sweep.add_argument("--state", default="", help="Home state to rank first")
+    sweep.add_argument("--probe", action="store_true", help="Check every board URL concurrently before ranking")
+    sweep.add_argument("--workers", type=int, default=8, help="Maximum concurrent probes (default: 8)")
+    sweep.add_argument("--json", action="store_true", help="Print the ranked result as JSON")
+
+    history = subparsers.add_parser("history", help="Search the full search history")
+    history.add_argument("name", nargs="*", help="Doctor name words (prefixes match, e.g. smi)")
+    history.add_argument("--state", default="", help="State (2-letter code)")
+    history.add_argument("--type", default="", help="Search type, e.g. contact_search or batch_processing")
+    history.add_argument("--since", default="", help="Earliest date or timestamp (YYYY-MM-DD), inclusive")
+    history.add_argument("--until", default="", help="Latest date or timestamp (YYYY-MM-DD), inclusive")
+    history.add_argument("--limit", type=int, default=50, help="Maximum entries to print (default: 50, 0 for all)")
+    history.add_argument("--json", action="store_true", help="Print the entries as JSON lines")
+
+    taxonomy = subparsers.add_parser("taxonomy", help="Show how specialties map to NUCC taxonomy codes")
+    taxonomy.add_argument("specialty", nargs="*", help="Free-text specialty to normalize (lists the table if omitted)")
+
+    serve = subparsers.add_parser("serve", help="Serve lookups over HTTP with a shared result cache")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    serve.add_argument("--cache-size", type=int, default=10000, help="Cached lookups kept (default: 10000)")
+    serve.add_argument("--ttl", type=float, default=300, help="Seconds a cached lookup stays fresh (default: 300)")
+
+    modules = subparsers.add_parser("modules", help="List, export or validate the link-generation module table")
+    modules.add_argument("--dump", metavar="FILE", help="Write the active module table to a JSON file")
+    modules.add_argument("--check", metavar="FILE", help="Validate a module table file without using it")
+
+    snapshot = subparsers.add_parser("snapshot", help="Build, inspect or remove the compiled table snapshot")
+    snapshot.add_argument("--build", action="store_true", help="Rebuild every section from the source tables now")
+    snapshot.add_argument("--clear", action="store_true", help="Delete the snapshot (rebuilt on the next start)")
+
+    return parser
+
+
+def run_command(app: DoctorDork, args: argparse.Namespace) -> int:
+    """Execute a headless command and return the process exit code"""
+    if args.command == "batch":
+        if not args.roster and not args.resume:
+            app.print_error("A roster file or --resume RUN_ID is required.")
+            return 2
+        app.config["auto_open_browser"] = False
+        doctors = read_roster(args.roster) if args.roster else None
+        enrich = tuple(category for category, wanted in (("npi_registry", args.npi), ("oig_exclusions", args.leie),
+                                                         ("pubmed_index", args.pubmed),
+                                                         ("cms_affiliations", args.hospitals)) if wanted)
+        if (args.distributed or args.workers) and doctors is not None:
+            run_id = app.queue_batch(doctors, source=args.roster, enrich=enrich, incremental=args.incremental,
+                                     chunk_size=args.chunk_size)
+            command = [sys.executable, os.path.abspath(__file__)]
+            if args.modules:
+                command += ["--modules", args.modules]
+            if args.npi_api:
+                command += ["--npi-api", args.npi_api]
+            workers = [app.spawn_worker(command + ["worker", "--run", run_id, "--id", f"local-{n + 1}"])
+                       for n in range(args.workers)]
+            try:
+                status = app.wait_for_run(run_id, [process for process, _ in workers] or None)
+            finally:
+                for process, relay in workers:
+                    process.wait()
+                    relay.join()
+            if status != "complete":
+                return 1
+        else:
+            try:
+                run_id = app.run_batch(doctors, run_id=args.resume, source=args.roster or "", enrich=enrich,
+                                       incremental=args.incremental)
+            except (KeyError, ValueError) as e:
+                app.print_error(str(e.args[0]))
+                return 1
+        if args.export:
+            app.export_run(run_id, changed_only=args.changed_only, export_format=args.format,
+                           compress=args.compress, shard_rows=args.shard_rows,
+                           shard_bytes=int(args.shard_size * (1 << 20)))
+    elif args.command == "bulk":
+        doctors = read_roster(args.roster)
+        for doctor_info in doctors:
+            app.normalize_specialty(doctor_info)
+        columns = app.bulk_generate(roster_columns(doctors))
+        if args.npi:
+            columns.update(app.enrich_columns(doctors, ("npi_registry",)))
+        if args.pubmed:
+            columns.update(app.enrich_columns(doctors, ("pubmed_index",)))
+        if args.hospitals:
+            columns.update(app.enrich_columns(doctors, ("cms_affiliations",)))
+        filename = args.output or f"doctordork_bulk_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        write_columns_csv(columns, filename)
+        app.print_success(f"{len(columns['doctor_name'])} rows written to: {filename}")
+    elif args.command == "leie":
+        if args.csv_file:
+            start = time.monotonic()
+            try:
+                index = ExclusionIndex.from_csv(args.csv_file)
+            except (OSError, ValueError) as e:
+                app.print_error(f"Import failed: {e}")
+                return 1
+            index.save(app.LEIE_INDEX_FILE)
+            app.print_success(f"Imported {len(index.records)} exclusion records in {time.monotonic() - start:.1f}s")
+        index = app.exclusion_index()
+        if not index:
+            app.print_warning("No exclusion list imported. Download UPDATED.csv from oig.hhs.gov and run: leie UPDATED.csv")
+            return 1
+        print(f"Source: {index.source}\nImported: {index.imported}\nRecords: {len(index.records)} "
+              f"({len(index.by_npi)} with NPI)")
+    elif args.command == "pubmed":
+        if not args.paths and not app.PUBMED_INDEX_DB.exists():
+            app.print_warning("No PubMed index built. Mirror the baseline from ftp.ncbi.nlm.nih.gov/pubmed/baseline "
+                              "and run: pubmed /path/to/baseline")
+            return 1
+        index = PubMedIndex(app.PUBMED_INDEX_DB)
+        try:
+            if args.paths:
+                start = time.monotonic()
+                stats = index.ingest(args.paths, workers=args.workers,
+                                     progress=lambda name, articles: app.print_info(f"{name}: {articles} articles"))
+                app.print_success(f"Ingested {stats['articles']} articles from {stats['files']} file(s) in "
+                                  f"{time.monotonic() - start:.1f}s ({stats['skipped']} already ingested)")
+            if args.lookup:
+                print(json.dumps(index.lookup(args.lookup), indent=4))
+            else:
+                stats = index.stats()
+                print(f"Files: {stats['files']}\nArticles: {stats['articles']}\nAuthor keys: {stats['author_keys']}")
+        finally:
+            index.close()
+    elif args.command == "hospitals":
+        if not (args.general or args.affiliations) and not app.HOSPITALS_DB.exists():
+            app.print_warning("No hospital index built. Download the CMS Hospital General Information and Facility "
+                              "Affiliation CSVs and run: hospitals --general FILE --affiliations FILE")
+            return 1
+        index = HospitalIndex(app.HOSPITALS_DB)
+        try:
+            for path, load in ((args.general, index.import_hospitals), (args.affiliations, index.import_affiliations)):
+                if path:
+                    start = time.monotonic()
+                    try:
+                        count = load(path)
+                    except (OSError, ValueError) as e:
+                        app.print_error(f"Import failed: {e}")
+                        return 1
+                    app.print_success(f"Imported {count} rows from {path} in {time.monotonic() - start:.1f}s")
+            if args.doctor or args.npi:
+                doctor_info = {"doctor_name": args.doctor or "", "state": args.state.upper(), "npi": args.npi}
+                match, found = index.affiliations(doctor_info)
+                print(json.dumps({"match": match, "hospitals": found}, indent=4))
+            elif args.state:
+                for hospital in index.hospitals_in(args.state, args.city):
+                    print(f"{hospital['ccn']}  {hospital['name']:<50} {hospital['city'].title()}, {hospital['state']}")
+            else:
+                stats = index.stats()
+                print(f"Hospitals: {stats['hospitals']}\nAffiliations: {stats['affiliations']} "
+                      f"({stats['clinicians']} clinicians)")
+        finally:
+            index.close()
+    elif args.command == "gazetteer":
+        if args.geonames_file:
+            try:
+                imported = Gazetteer.from_geonames(args.geonames_file)
+            except (OSError, ValueError) as e:
+                app.print_error(f"Import failed: {e}")
+                return 1
+            imported.save(app.GAZETTEER_FILE)
+            app.snapshot.put("gazetteer", app.gazetteer_key(), imported)
+            app._gazetteer = imported
+            app.print_success(f"Imported {len(imported.zips)} ZIP codes")
+        gazetteer = app.gazetteer()
+        if not gazetteer:
+            app.print_warning("No gazetteer imported. Download US.zip from download.geonames.org/export/zip "
+                              "and run: gazetteer US.txt")
+            return 1
+        if args.zip:
+            entry = gazetteer.lookup_zip(args.zip)
+            if not entry:
+                app.print_error(f"Unknown ZIP code: {args.zip}")
+                return 1
+            print(f"{entry[0]}  {entry[1]}, {entry[2]}  ({entry[3]}, {entry[4]})")
+        elif args.city:
+            entries = gazetteer.city_zips(args.city, args.state)
+            if not entries:
+                app.print_error(f"Unknown city: {args.city}, {args.state.upper()}")
+                return 1
+            print(f"{entries[0][1]}, {entries[0][2]}: {' '.join(entry[0] for entry in entries)}")
+        else:
+            print(f"Source: {gazetteer.source}\nImported: {gazetteer.imported}\nZIP codes: {len(gazetteer.zips)} "
+                  f"({len(gazetteer.by_city)} cities, {len(gazetteer.grid)} grid cells)")
+    elif args.command == "providers":
+        index = ProviderIndex(app.PROVIDERS_DB)
+        try:
+            if args.nppes_file:
+                def report(count):
+                    if count % 500000 == 0:
+                        app.print_info(f"{count} providers...")
+                start = time.monotonic()
+                try:
+                    count = index.import_nppes(args.nppes_file, progress=report)
+                except (OSError, ValueError) as e:
+                    app.print_error(f"Import failed: {e}")
+                    return 1
+                app.print_success(f"Imported {count} providers in {time.monotonic() - start:.1f}s")
+            if (args.update or args.deactivated) and not index.count():
+                app.print_error("Import a full NPPES file before applying weekly updates.")
+                return 1
+            try:
+                deactivations = ProviderIndex.read_deactivations(args.deactivated) if args.deactivated else None
+            except OSError as e:
+                app.print_error(f"Could not read {args.deactivated}: {e}")
+                return 1
+            for update in args.update or ([None] if deactivations else []):
+                start = time.monotonic()
+                try:
+                    stats = index.apply_update(update, deactivations)
+                except (OSError, ValueError, IndexError) as e:
+                    app.print_error(f"Update {update or args.deactivated} failed and was rolled back: {e}")
+                    return 1
+                deactivations = None
+                app.print_success(f"{update or args.deactivated}: {stats['upserted']} upserted, {stats['removed']} "
+                                  f"removed in {time.monotonic() - start:.1f}s")
+            print(f"Providers: {index.count()}")
+            for name, applied, upserted, removed in index.applied_updates()[:5]:
+                print(f"  {applied[:19]}  {name}  +{upserted} -{removed}")
+        finally:
+            index.close()
+    elif args.command == "nearby":
+        gazetteer = app.gazetteer()
+        if not gazetteer or not app.PROVIDERS_DB.exists():
+            app.print_error("Nearby searches need a gazetteer and provider index. Run: gazetteer US.txt, "
+                            "then providers npidata_pfile.csv")
+            return 1
+        index = ProviderIndex(app.PROVIDERS_DB)
+        try:
+            start = time.monotonic()
+            found = index.within(gazetteer, args.zip, args.miles, args.taxonomy, args.limit or None)
+            elapsed = (time.monotonic() - start) * 1000
+        except KeyError as e:
+            app.print_error(str(e.args[0]))
+            return 1
+        finally:
+            index.close()
+        if args.json:
+            print(json.dumps(found, indent=4))
+        else:
+            for provider in found:
+                name = " ".join(p for p in (provider["first"], provider["last"], provider["credential"]) if p)
+                print(f"{provider['miles']:>6.1f} mi  {provider['npi']}  {name:<40} {provider['taxonomy']:<11} "
+                      f"{provider['city'].title()}, {provider['state']} {provider['zip5']}")
+            app.print_info(f"{len(found)} provider(s) within {args.miles:g} miles of {args.zip} ({elapsed:.0f} ms)")
+    elif args.command == "screen":
+        index = app.exclusion_index()
+        if not index:
+            app.print_error("No exclusion list imported. Run: python3 DoctorDork.py leie UPDATED.csv")
+            return 1
+        filename = args.output or f"doctordork_screen_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        start = time.monotonic()
+        rows = flagged = 0
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['doctor_name', 'city', 'state', 'npi', 'match', 'excluded_name', 'excluded_npi',
+                             'exclusion_type', 'exclusion_date', 'excluded_state'])
+            for doctor_info, matches in index.screen_stream(iter_roster(args.roster)):
+                rows += 1
+                info = [doctor_info.get(k, '') for k in ('doctor_name', 'city', 'state', 'npi')]
+                if matches:
+                    flagged += 1
+                    for match in matches:
+                        name = " ".join(p for p in (match["FIRSTNAME"], match["MIDNAME"], match["LASTNAME"]) if p)
+                        writer.writerow(info + [match["match"], name, match["NPI"], match["EXCLTYPE"],
+                                                match["EXCLDATE"], match["STATE"]])
+                elif args.all:
+                    writer.writerow(info + [''] * 6)
+        app.print_success(f"Screened {rows} rows in {time.monotonic() - start:.1f}s: "
+                          f"{flagged} possible exclusion(s) written to {filename}")
+    elif args.command == "npi":
+        doctor_info = {"doctor_name": args.doctor_name, "city": args.city, "state": args.state.upper(), "specialty": ""}
+        print(json.dumps(app.enrich_npi([doctor_info])[0], indent=4))
+    elif args.command == "sweep":
+        doctor_info = {"doctor_name": args.doctor_name, "city": "", "state": args.state.upper(), "specialty": ""}
+        sweep = app.sweep_all_states(doctor_info, probe=args.probe, workers=args.workers)
+        if args.json:
+            print(json.dumps(sweep, indent=4))
+        else:
+            app.print_sweep(sweep)
+    elif args.command == "history":
+        started = time.perf_counter()
+        entries = app.query_history(name=" ".join(args.name), state=args.state, type=args.type,
+                                    since=args.since, until=args.until, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+        for entry in entries:
+            if args.json:
+                print(json.dumps(entry))
+            else:
+                place = ", ".join(part for part in (entry.get("city"), entry.get("state")) if part)
+                print(f"{entry.get('timestamp', '')}  {entry.get('type', ''):<20} {entry.get('doctor_name', '')}"
+                      + (f" ({place})" if place else ""))
+        if not args.json:
+            app.print_info(f"{len(entries)} match(es) in {elapsed:.1f} ms")
+    elif args.command == "serve":
+        app.config["auto_open_browser"] = False
+        ServiceHandler.service = LookupService(app, cache_size=args.cache_size, ttl=args.ttl)
+        server = ThreadingHTTPServer((args.host, args.port), ServiceHandler)
+        server.daemon_threads = True
+        app.print_info(f"Serving lookups on http://{args.host}:{args.port}/lookup (metrics at /metrics)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            ServiceHandler.service.close()
+    elif args.command == "taxonomy":
+        if args.specialty:
+            text = " ".join(args.specialty)
+            entry = app.taxonomy.normalize(text)
+            if not entry:
+                app.print_warning(f"No taxonomy match for: {text}")
+                return 1
+            print(f"{entry['code']}  {entry['name']}  ({entry['label']})")
+        else:
+            for entry in app.taxonomy.entries.values():
+                print(f"{entry['code']}  {entry['name']:<36} {entry['label']}")
+    elif args.command == "modules":
+        if args.check:
+            try:
+                registry = ModuleRegistry.from_file(args.check)
+            except (OSError, ValueError) as e:
+                app.print_error(f"Invalid module table: {e}")
+                return 1
+            app.print_success(f"{args.check}: {len(registry.names())} modules OK")
+        elif args.dump:
+            with open(args.dump, 'w', encoding='utf-8') as f:
+                json.dump({"modules": app.modules.to_table()}, f, indent=4)
+            app.print_success(f"Module table written to: {args.dump}")
+        else:
+            for name in app.modules.names():
+                module = app.modules.get(name)
+                print(f"{name:<32} {len(module['platforms'])} platforms  -> {module['key']}")
+    elif args.command == "snapshot":
+        if args.clear:
+            app.snapshot.clear()
+            app.print_success(f"Removed {app.SNAPSHOT_FILE}")
+            return 0
+        if args.build:
+            started, rebuilt = time.perf_counter(), app.snapshot.stats["rebuilt"]
+            app.snapshot.clear()
+            app.modules = app.load_modules()
+            app.refresh_platforms(force=True)
+            app.taxonomy = app.load_taxonomy()
+            app._gazetteer = None
+            app.gazetteer()
+            app.print_success(f"Built {app.snapshot.stats['rebuilt'] - rebuilt} section(s) in "
+                              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        app.gazetteer()
+        sections = app.snapshot.describe()
+        if not sections:
+            app.print_info("No snapshot yet; it is written the first time the tables are built")
+        for name, section in sections.items():
+            print(f"{name:<14} {section['bytes']:>12,} bytes  key {section['key'][:12]}"
+                  + ("  (stale)" if name in app.snapshot.stale else ""))
+        if app.snapshot.stale:
+            app.print_warning("Stale sections are rebuilt on every start; run `snapshot --build` to refresh them.")
+    elif args.command == "worker":
+        app.config["auto_open_browser"] = False
+        processed = app.work(run_id=args.run, worker_id=args.id, lease=args.lease, wait=args.wait)
+        app.print_info(f"No queued chunks left; processed {processed} row(s)")
+    elif args.command == "runs":
+        store = ResultStore(app.RESULTS_DB)
+        try:
+            for run in store.list_runs():
+                print(f"{run['run_id']}  {run['status']:<12} {run['completed']}/{run['total']}  {run['source']}")
+        finally:
+            store.close()
+    elif args.command == "results":
+        store = ResultStore(app.RESULTS_DB)
+        try:
+            if not store.get_run(args.run_id):
+                app.print_error(f"Unknown run ID: {args.run_id}")
+                return 1
+            for row_index, doctor_info, results in store.iter_results(args.run_id, completed_only=not args.all,
+                                                                                changed_only=args.changed):
+                print(json.dumps({"row": row_index, "doctor_info": doctor_info, "results": results}))
+        finally:
+            store.close()
+    return 0
 
 
 def main():
     """Entry point for DoctorDork application"""
+    args = build_parser().parse_args()
     try:
         app = DoctorDork()
+        if args.npi_api:
+            app.config["npi_api_url"] = args.npi_api
+        if args.link_host:
+            app.config["link_check_host"] = args.link_host
+        if args.modules:
+            app.modules = app.load_modules(args.modules)
+            app.refresh_platforms(force=True)
+        if args.command:
+            sys.exit(run_command(app, args))
         app.run()
     except KeyboardInterrupt:
         print(f"\n\n{Colors.YELLOW}Application interrupted by user.{Colors.RESET}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Load generator for DoctorDork's network paths, reporting throughput and tail latency
+
+Scenarios:
+  links  probe board and platform URLs with LinkChecker (against stub_server.py via --stub)
+  npi    resolve synthetic doctors with NPIRegistryClient (against stub_server.py via --stub)
+  serve  send /lookup requests to a running `DoctorDork.py serve`
+
+Usage:
+    python3 stub_server.py --port 8765 --latency 0.02 --jitter 0.1 --blocked-rate 0.05
+    python3 load_test.py links --stub 127.0.0.1:8765 [--requests 2000] [--concurrency 16]
+    python3 load_test.py npi --stub 127.0.0.1:8765 [--requests 2000] [--concurrency 16]
+    python3 load_test.py serve --url http://127.0.0.1:8080 [--requests 2000] [--distinct 200] [--enrich npi_registry]
+"""
+
+import argparse
+import http.client
+import json
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from pathlib import Path
+
+from DoctorDork import DoctorDork, LinkChecker, NPIRegistryClient
+
+FIRST_NAMES = ["John", "Jane", "Maria", "David", "Aisha", "Wei", "Carlos", "Emily", "Omar", "Grace"]
+LAST_NAMES = ["Smith", "Johnson", "Garcia", "Nguyen", "Patel", "Brown", "Lee", "Martinez", "Khan", "Davis"]
+LOCATIONS = [("Boston", "MA"), ("Austin", "TX"), ("Seattle", "WA"), ("Denver", "CO"), ("Miami", "FL")]
+SPECIALTIES = ["cardiology", "family medicine", "pediatrics", "internal medicine", "orthopedics"]
+
+
+def synthetic_doctor(n):
+    """A distinct, deterministic roster entry for index n"""
+    city, state = LOCATIONS[n % len(LOCATIONS)]
+    return {
+        "doctor_name": f"{FIRST_NAMES[n % 10]} {LAST_NAMES[n // 10 % 10]}{n // 100 or ''}",
+        "city": city,
+        "state": state,
+        "specialty": SPECIALTIES[n // 3 % len(SPECIALTIES)],
+    }
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def report(name, latencies, elapsed, outcomes):
+    latencies = sorted(latencies)
+    print(f"\n{name}: {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)")
+    print("  latency ms   p50 {:8.1f}   p95 {:8.1f}   p99 {:8.1f}   max {:8.1f}".format(
+        *(percentile(latencies, f) * 1000 for f in (0.5, 0.95, 0.99, 1.0))))
+    print("  outcomes     " + ", ".join(f"{label}: {count}" for label, count in outcomes.most_common()))
+
+
+def platform_urls(app, count):
+    """At least `count` distinct board and platform URLs, as a roster sweep would produce"""
+    urls = dict.fromkeys(board["url"] for board in app.medical_boards.values())
+    n = 0
+    while len(urls) < count:
+        doctors = [(i, synthetic_doctor(i)) for i in range(n, n + 100)]
+        for _, results in app.process_rows(doctors, ()):
+            for links in results.values():
+                if isinstance(links, str):
+                    urls[links] = None
+                else:
+                    urls.update(dict.fromkeys(url for _, url in links))
+        n += 100
+    return list(urls)[:count]
+
+
+def run_links(args):
+    app = DoctorDork()
+    urls = platform_urls(app, args.requests)
+    with tempfile.TemporaryDirectory() as scratch:
+        checker = LinkChecker(Path(scratch) / "health.json", timeout=args.timeout,
+                              workers=args.concurrency, host_override=args.stub)
+        start = time.monotonic()
+        records = checker.check_many(urls)
+        elapsed = time.monotonic() - start
+    hosts = len({urllib.parse.urlsplit(url).netloc for url in urls})
+    report(f"LinkChecker ({hosts} hosts, {args.concurrency} workers)", [r["latency"] for r in records.values()],
+           elapsed, Counter(r["health"] for r in records.values()))
+
+
+class TimedNPIClient(NPIRegistryClient):
+    """NPIRegistryClient that records the latency of every API call (including retries)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    async def _fetch(self, pool, params):
+        start = time.monotonic()
+        try:
+            return await super()._fetch(pool, params)
+        finally:
+            self.latencies.append(time.monotonic() - start)
+
+
+def run_npi(args):
+    client = TimedNPIClient(f"http://{args.stub}/api/", concurrency=args.concurrency, timeout=args.timeout)
+    doctors = [synthetic_doctor(i) for i in range(args.requests)]
+    start = time.monotonic()
+    summaries = client.resolve(doctors)
+    elapsed = time.monotonic() - start
+    outcomes = Counter("error" if s.get("error") else ("match" if s.get("npi") else "no match") for s in summaries)
+    report(f"NPIRegistryClient ({args.concurrency} concurrent)", client.latencies, elapsed, outcomes)
+    print(f"  client       {client.stats}")
+
+
+def run_serve(args):
+    base = urllib.parse.urlsplit(args.url)
+    queries = []
+    for i in range(args.requests):
+        query = synthetic_doctor(i % args.distinct)
+        if args.enrich:
+            query["enrich"] = args.enrich
+        queries.append("/lookup?" + urllib.parse.urlencode(query))
+
+    latencies, outcomes = [], Counter()
+    lock = threading.Lock()
+    cursor = iter(queries)
+
+    def client():
+        conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=args.timeout)
+        while True:
+            with lock:
+                path = next(cursor, None)
+            if path is None:
+                break
+            started = time.monotonic()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                outcome = f"HTTP {response.status}"
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                outcome = type(e).__name__
+            with lock:
+                latencies.append(time.monotonic() - started)
+                outcomes[outcome] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    report(f"Server /lookup ({args.concurrency} clients, {args.distinct} distinct doctors)",
+           latencies, elapsed, outcomes)
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=args.timeout)
+    conn.request("GET", "/metrics")
+    metrics = json.loads(conn.getresponse().read())
+    print(f"  server cache {metrics['cache']}")
+    print(f"  coalescing   {metrics['coalescing']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test DoctorDork's network paths")
+    parser.add_argument("scenario", choices=["links", "npi", "serve"])
+    parser.add_argument("--stub", default="127.0.0.1:8765", help="stub_server.py HOST:PORT (links, npi)")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server mode base URL (serve)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests to send (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests (default: 16)")
+    parser.add_argument("--distinct", type=int, default=200, help="Distinct doctors among the lookups (serve)")
+    parser.add_argument("--enrich", default="", help="Enrichment categories for each lookup (serve)")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    {"links": run_links, "npi": run_npi, "serve": run_serve}[args.scenario](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark applying a weekly NPPES update against rebuilding the provider index
+
+Generates a synthetic full NPPES file, a weekly incremental file and the
+following full file in a scratch directory, then times:
+  - a full rebuild from the next full file (ProviderIndex.import_nppes)
+  - applying the weekly file to the existing index (ProviderIndex.apply_update)
+and checks both produce the same providers.
+
+Usage:
+    python3 nppes_benchmark.py [--providers 1000000] [--changes 20000] [--dir /tmp/nppes_bench]
+"""
+
+import argparse
+import csv
+import random
+import shutil
+import time
+from pathlib import Path
+
+from DoctorDork import ProviderIndex
+
+TAXONOMIES = ["207RC0000X", "207Q00000X", "207R00000X", "208000000X", "207X00000X", "363L00000X"]
+
+
+def header():
+    columns = list(ProviderIndex.NPPES_COLUMNS.values())
+    for n in range(1, 16):
+        columns += [f"Healthcare Provider Taxonomy Code_{n}", f"Healthcare Provider Primary Taxonomy Switch_{n}"]
+    return columns
+
+
+def record(npi, rng, deactivated=False):
+    """One NPPES row in header() order"""
+    taxonomies = [""] * 30
+    taxonomies[0], taxonomies[1] = rng.choice(TAXONOMIES), "Y"
+    return [str(npi), "1" if npi % 10 else "2", f"LAST{npi}", "FIRST", "MD", f"{rng.randint(1, 9999)} MAIN ST",
+            "ANYTOWN", rng.choice(["MA", "TX", "CA", "NY"]), f"{rng.randint(1000, 99999):05d}0000", "5555550100",
+            "01/01/2024" if deactivated else "", ""] + taxonomies
+
+
+def write(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(header())
+        writer.writerows(rows)
+
+
+def generate(directory, providers, changes, seed=7):
+    """Write full.csv, weekly.csv and next_full.csv; returns their paths"""
+    rng = random.Random(seed)
+    base = {npi: record(npi, rng) for npi in range(1000000000, 1000000000 + providers)}
+    weekly = {}
+    for npi in rng.sample(sorted(base), changes):
+        # Mostly address/taxonomy changes, some deactivations
+        weekly[npi] = record(npi, rng, deactivated=rng.random() < 0.1)
+    for npi in range(1000000000 + providers, 1000000000 + providers + changes // 4):
+        weekly[npi] = record(npi, rng)
+    paths = [directory / "full.csv", directory / "weekly.csv", directory / "next_full.csv"]
+    write(paths[0], base.values())
+    write(paths[1], weekly.values())
+    base.update(weekly)
+    write(paths[2], base.values())
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weekly NPPES update vs. full rebuild benchmark")
+    parser.add_argument("--providers", type=int, default=1000000, help="Rows in the full file")
+    parser.add_argument("--changes", type=int, default=20000, help="Changed rows in the weekly file")
+    parser.add_argument("--dir", default="/tmp/nppes_bench", help="Scratch directory (removed afterwards)")
+    args = parser.parse_args()
+
+    directory = Path(args.dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        print(f"Generating {args.providers} providers and a weekly file with {args.changes} changes...")
+        full, weekly, next_full = generate(directory, args.providers, args.changes)
+
+        rebuilt = ProviderIndex(directory / "rebuilt.db")
+        start = time.monotonic()
+        rebuilt.import_nppes(next_full)
+        rebuild_time = time.monotonic() - start
+
+        updated = ProviderIndex(directory / "updated.db")
+        updated.import_nppes(full)
+        start = time.monotonic()
+        stats = updated.apply_update(weekly)
+        update_time = time.monotonic() - start
+
+        same = (rebuilt.conn.execute("SELECT * FROM providers ORDER BY npi").fetchall()
+                == updated.conn.execute("SELECT * FROM providers ORDER BY npi").fetchall())
+        print(f"Full rebuild:     {rebuild_time:8.2f}s  ({rebuilt.count()} providers)")
+        print(f"Weekly update:    {update_time:8.2f}s  ({stats['upserted']} upserted, {stats['removed']} removed)")
+        print(f"Speedup:          {rebuild_time / update_time:8.1f}x")
+        print(f"Indexes identical: {same}")
+        rebuilt.close()
+        updated.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
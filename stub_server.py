@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Local stub of the NPI Registry API and the board/platform sites for testing without network access
+
+/api/ answers like the NPI Registry API. Any other path is answered as a page
+of the site named in the Host header, so with LinkChecker's host override
+every host in MEDICAL_BOARDS and the platform tables is served from here.
+Government sites often answer automated requests with 403; --blocked-rate
+and --status reproduce that.
+
+Usage:
+    python3 stub_server.py --port 8765 [--latency 0.05] [--jitter 0.2] [--error-rate 0.1]
+                           [--blocked-rate 0.05] [--status www.tmb.state.tx.us=403 --status twitter.com=429]
+    python3 DoctorDork.py --npi-api http://127.0.0.1:8765/api/ npi "John Smith" --state MA
+    python3 DoctorDork.py --link-host 127.0.0.1:8765 sweep "John Smith" --probe
+    python3 stub_server.py --revision 1 --redirect profile.tmb.state.tx.us=/Search.aspx   # simulate moved/edited pages
+    python3 load_test.py links --stub 127.0.0.1:8765
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TAXONOMIES = [
+    ("207RC0000X", "Cardiovascular Disease"),
+    ("207Q00000X", "Family Medicine"),
+    ("207R00000X", "Internal Medicine"),
+    ("208000000X", "Pediatrics"),
+    ("207X00000X", "Orthopaedic Surgery"),
+]
+
+CITIES = ["Boston", "Austin", "Seattle", "Denver", "Miami"]
+
+
+def parse_statuses(rules):
+    """Map "host=code" rules to {host: code}; "*" matches every host"""
+    statuses = {}
+    for rule in rules:
+        host, _, code = rule.partition("=")
+        statuses[host.strip().lower()] = int(code)
+    return statuses
+
+
+def fake_page(host, path, revision=0):
+    """A small deterministic HTML page for a platform host; a new revision rewrites its text"""
+    words = ["license", "search", "physician", "verify", "board", "lookup", "status", "name", "city", "record"]
+    rng = random.Random(f"{host}|{path}|{revision}")
+    text = " ".join(rng.choice(words) for _ in range(120))
+    return (f"<!DOCTYPE html><html><head><title>{host}</title></head>"
+            f"<body><h1>{host}</h1><p>Stub page for {path}</p><p>{text}</p></body></html>").encode("utf-8")
+
+
+def fake_npi_response(params):
+    """Build a deterministic NPI Registry style response for a query"""
+    first = params.get("first_name", "").title()
+    last = params.get("last_name", "").title()
+    state = params.get("state", "").upper() or "MA"
+    seed = int(hashlib.sha1(f"{first}|{last}|{state}".encode()).hexdigest()[:8], 16)
+
+    # Roughly one in ten queries has no match, like real rosters
+    count = 0 if seed % 10 == 0 else 1 + seed % 3
+    results = []
+    for i in range(count):
+        code, desc = TAXONOMIES[(seed + i) % len(TAXONOMIES)]
+        results.append({
+            "number": str(1000000000 + (seed + i) % 899999999),
+            "enumeration_type": "NPI-1",
+            "basic": {"first_name": first.upper(), "last_name": last.upper(), "credential": "M.D.", "status": "A"},
+            "taxonomies": [{"code": code, "desc": desc, "primary": True, "state": state}],
+            "addresses": [
+                {"address_purpose": "MAILING", "address_1": "PO BOX 1", "city": "ANYTOWN", "state": state,
+                 "postal_code": "000000000"},
+                {"address_purpose": "LOCATION", "address_1": f"{100 + (seed + i) % 900} MAIN ST",
+                 "city": CITIES[(seed + i) % len(CITIES)].upper(), "state": state,
+                 "postal_code": f"{(seed + i) % 99999:05d}0000", "telephone_number": "555-0100"},
+            ],
+        })
+    return {"result_count": count, "results": results}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /api/ like the NPI Registry API and every other path as a platform page"""
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    blocked_rate = 0.0
+    statuses = {}
+    redirects = {}
+    revision = 0
+    started = time.time()
+
+    def do_GET(self):
+        self.answer(head=False)
+
+    def do_HEAD(self):
+        self.answer(head=True)
+
+    def answer(self, head):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        parsed = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parsed.query))
+        host = (self.headers.get("Host") or "").split(":")[0].lower()
+
+        if random.random() < self.error_rate:
+            self.send_json(503, {"Errors": [{"description": "Service temporarily unavailable"}]}, head)
+        elif parsed.path.rstrip("/") == "/api":
+            self.send_json(200, fake_npi_response(params), head)
+        else:
+            status = self.statuses.get(host, self.statuses.get("*", 200))
+            if status == 200 and random.random() < self.blocked_rate:
+                status = 403
+            if status == 200 and host in self.redirects and parsed.path != self.redirects[host]:
+                self.send_response(301)
+                self.send_header("Location", self.redirects[host])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif status == 200:
+                self.send_page(fake_page(host, parsed.path, self.revision), head)
+            else:
+                self.send_body(status, b"<html><body>Access denied</body></html>", "text/html; charset=utf-8", head)
+
+    def send_page(self, body, head):
+        """Answer with validators, or 304 when the client's copy is current"""
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        modified = self.date_time_string(self.started)
+        if self.headers.get("If-None-Match") == etag or (
+                not self.headers.get("If-None-Match") and self.headers.get("If-Modified-Since") == modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", modified)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_json(self, status, data, head=False):
+        self.send_body(status, json.dumps(data).encode("utf-8"), "application/json", head)
+
+    def send_body(self, status, body, content_type, head=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # Load tests open many connections at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NPI Registry API and platform site stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds, chosen at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--blocked-rate", type=float, default=0.0,
+                        help="Fraction of platform page requests answered with 403")
+    parser.add_argument("--status", action="append", default=[], metavar="HOST=CODE",
+                        help="Answer every page of HOST with CODE (repeatable; * for all hosts)")
+    parser.add_argument("--redirect", action="append", default=[], metavar="HOST=PATH",
+                        help="Redirect every other page of HOST to PATH, like a moved search page (repeatable)")
+    parser.add_argument("--revision", type=int, default=0, help="Page text revision; change it to simulate edits")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.jitter = args.jitter
+    StubHandler.error_rate = args.error_rate
+    StubHandler.blocked_rate = args.blocked_rate
+    StubHandler.revision = args.revision
+    StubHandler.redirects = {host.lower(): path for host, _, path in (r.partition("=") for r in args.redirect)}
+    try:
+        StubHandler.statuses = parse_statuses(args.status)
+    except ValueError:
+        parser.error("--status expects HOST=CODE")
+    server = StubServer((args.host, args.port), StubHandler)
+    print(f"NPI Registry stub listening on http://{args.host}:{args.port}/api/")
+    print(f"Platform pages for any Host header on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from DoctorDork import DoctorDork  # noqa: E402
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """Point every DoctorDork data file at a scratch directory and work from it"""
+    for name, value in vars(DoctorDork).items():
+        if isinstance(value, Path):
+            monkeypatch.setattr(DoctorDork, name, tmp_path / value.name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def app(home):
+    app = DoctorDork()
+    app.config["auto_open_browser"] = False
+    app.config["show_progress"] = False
+    return app
+
+
+@pytest.fixture
+def roster():
+    return [
+        {"doctor_name": "John Smith", "city": "Boston", "state": "MA", "specialty": "cardiology"},
+        {"doctor_name": "Jane Doe", "city": "Austin", "state": "TX", "specialty": "pediatrics"},
+        {"doctor_name": "Wei Lee", "city": "Seattle", "state": "WA", "specialty": ""},
+        {"doctor_name": "Maria Garcia", "city": "Miami", "state": "FL", "specialty": "dermatology"},
+        {"doctor_name": "Omar Khan", "city": "Denver", "state": "CO", "specialty": "family medicine"},
+    ]
+
+
+@pytest.fixture
+def stub():
+    """stub_server.py on a free local port; yields (HOST:PORT, handler class to configure)"""
+    import threading
+
+    from stub_server import StubHandler, StubServer
+
+    handler = type("Handler", (StubHandler,), {"statuses": {}, "redirects": {}, "revision": 0})
+    server = StubServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+GEONAMES = [
+    ("02108", "Boston", "MA", 42.3576, -71.0684),
+    ("02139", "Cambridge", "MA", 42.3647, -71.1042),
+    ("01060", "Northampton", "MA", 42.3242, -72.6424),
+    ("78701", "Austin", "TX", 30.2713, -97.7426),
+    ("63101", "Saint Louis", "MO", 38.6341, -90.1910),
+]
+
+
+@pytest.fixture
+def geonames(tmp_path):
+    """A small GeoNames US.txt postal code file"""
+    path = tmp_path / "US.txt"
+    path.write_text("".join(f"US\t{zip_code}\t{city}\tState\t{state}\t\t\t\t\t{lat}\t{lon}\t4\n"
+                            for zip_code, city, state, lat, lon in GEONAMES))
+    return path
+
+
+@pytest.fixture
+def service(app):
+    """A LookupService whose override watcher polls every 50 ms"""
+    from DoctorDork import LookupService
+
+    app.platform_overrides.interval = 0.05
+    service = LookupService(app, cache_size=100, ttl=60)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def server(service):
+    """Server mode on a free local port; yields its HOST:PORT"""
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    from DoctorDork import ServiceHandler
+
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,50 @@
+import csv
+
+from DoctorDork import build_parser, iter_roster, roster_columns, run_command
+
+
+def test_generated_links_match_the_bulk_column_path(app, roster):
+    columns = {field: [doctor[field] for doctor in roster] for field in ("doctor_name", "city", "state", "specialty")}
+    bulk = app.bulk_generate(columns)
+    for i, doctor in enumerate(roster):
+        links = app.generate_links(doctor)
+        assert bulk["contact_search"][i] == links["contact_search"]
+        for key, pairs in links.items():
+            if key in ("contact_search", "medical_board"):
+                continue
+            for platform, url in pairs:
+                assert bulk[f"{key}.{platform}"][i] == url
+
+
+def test_bulk_keeps_missing_required_fields_empty(app):
+    bulk = app.bulk_generate({"doctor_name": ["Jane Doe", "Wei Lee"], "city": ["Austin", ""],
+                              "state": ["TX", "ZZ"]})
+    assert bulk["medical_board"] == [app.medical_boards["TX"]["url"], ""]
+    assert len(bulk["contact_search"]) == 2
+    assert all(len(column) == 2 for column in bulk.values())
+
+
+def test_iter_roster_reads_headed_and_bare_csvs(tmp_path):
+    headed = tmp_path / "headed.csv"
+    headed.write_text("Name,City,State,Specialty,NPI\nJane Doe,Austin,tx,pediatrics,123\n\n")
+    bare = tmp_path / "bare.csv"
+    bare.write_text("Jane Doe,Austin,tx\nIncomplete,row\n")
+    assert list(iter_roster(headed)) == [{"doctor_name": "Jane Doe", "city": "Austin", "state": "TX",
+                                          "specialty": "pediatrics", "npi": "123"}]
+    assert list(iter_roster(bare)) == [{"doctor_name": "Jane Doe", "city": "Austin", "state": "TX",
+                                        "specialty": ""}]
+
+
+def test_bulk_command_writes_one_wide_row_per_doctor(app, roster, home):
+    source = home / "roster.csv"
+    with open(source, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["doctor_name", "city", "state", "specialty"])
+        writer.writerows([d["doctor_name"], d["city"], d["state"], d["specialty"]] for d in roster)
+    args = build_parser().parse_args(["bulk", str(source), "-o", str(home / "links.csv")])
+    assert not run_command(app, args)
+    with open(home / "links.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["doctor_name"] for row in rows] == [d["doctor_name"] for d in roster]
+    assert set(roster_columns(roster)) <= set(rows[0])
+    assert rows[0]["contact_search"] == app.generate_links(rows[0])["contact_search"]
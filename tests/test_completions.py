@@ -0,0 +1,55 @@
+from DoctorDork import PrefixIndex
+
+
+def test_suggestions_rank_by_weight_within_the_prefix():
+    index = PrefixIndex({"Cardiology": 5, "Cardiac Surgery": 9, "Carpentry": 1, "Dermatology": 50})
+    assert index.suggest("car") == ["Cardiac Surgery", "Cardiology", "Carpentry"]
+    assert index.suggest("CARD", limit=1) == ["Cardiac Surgery"]
+    assert index.suggest("xyz") == []
+
+
+def test_titles_and_case_share_one_key():
+    index = PrefixIndex({"Dr. Jane Doe": 2, "jane  doe": 3, "Dr John Smith": 1})
+    assert len(index) == 2
+    assert index.suggest("Dr. J") == ["Dr. Jane Doe", "Dr John Smith"]
+    assert index.suggest("john") == ["Dr John Smith"]
+
+
+def test_add_inserts_and_reweights():
+    index = PrefixIndex({"Austin": 3, "Atlanta": 2})
+    index.add("Albany")
+    index.add("Atlanta", 5)
+    assert index.suggest("a") == ["Atlanta", "Austin", "Albany"]
+    index.add("  ")
+    assert len(index) == 3
+
+
+def test_large_slices_are_cached_until_the_index_changes():
+    index = PrefixIndex({f"Name{n:04d}": n for n in range(PrefixIndex.SCAN_LIMIT * 2)})
+    top = index.suggest("name", limit=3)
+    assert top == ["Name0511", "Name0510", "Name0509"]
+    assert index.cache == {("name", 3): top}
+    index.suggest("name00", limit=3)
+    assert len(index.cache) == 1  # small slices are ranked directly
+    index.add("Name0000", 10000)
+    assert index.cache == {}
+    assert index.suggest("name", limit=1) == ["Name0000"]
+
+
+def test_history_outranks_the_taxonomy(app):
+    app.save_history({"type": "contact_search", "doctor_name": "Jane Doe", "city": "Austin",
+                      "specialty": "Cardiac Electrophysiology"})
+    weights = app.completion_weights(False)
+    assert weights["doctor_name"] == {"Jane Doe": app.HISTORY_COMPLETION_WEIGHT}
+    specialty = PrefixIndex(weights["specialty"])
+    assert specialty.suggest("card", limit=1) == ["Cardiac Electrophysiology"]
+    assert "Cardiology" in specialty.suggest("card")
+
+
+def test_full_completions_read_the_history_archive(app):
+    for _ in range(3):
+        app.save_history({"type": "contact_search", "doctor_name": "Omar Khan", "city": "Denver"})
+    app.load_completions()
+    app._completions_loading.join()
+    assert app._completions["doctor_name"].suggest("om") == ["Omar Khan"]
+    assert app._completions["city"].suggest("DEN") == ["Denver"]
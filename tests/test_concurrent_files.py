@@ -0,0 +1,97 @@
+import json
+import multiprocessing
+
+import pytest
+
+from DoctorDork import DoctorDork, ExclusionIndex, Gazetteer, atomic_write, locked
+
+fork = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+
+
+def save_searches(worker, count):
+    app = DoctorDork()
+    for n in range(count):
+        app.save_history({"type": "contact_search", "doctor_name": f"Doctor {worker}-{n}"})
+
+
+def save_setting(key, value):
+    app = DoctorDork()
+    app.config[key] = value
+    app.save_config(key)
+
+
+def save_indexes(path, worker):
+    for n in range(20):
+        Gazetteer([["02108", "Boston", "MA", 42.36, -71.07]] * (worker + 1), source=f"w{worker}").save(path)
+        record = [""] * len(ExclusionIndex.FIELDS)
+        ExclusionIndex([record] * (worker + 1), source=f"w{worker}").save(path.with_suffix(".leie"))
+
+
+@fork
+def test_concurrent_processes_keep_every_history_entry(app):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=save_searches, args=(worker, 25)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    names = {entry["doctor_name"] for entry in app.read_history_file()}
+    assert names == {f"Doctor {worker}-{n}" for worker in range(4) for n in range(25)}
+
+
+@fork
+def test_concurrent_config_saves_keep_each_others_keys(app):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=save_setting, args=(f"key{n}", n)) for n in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    saved = json.loads(app.CONFIG_FILE.read_text())
+    assert {f"key{n}": n for n in range(4)}.items() <= saved.items()
+
+
+@fork
+def test_concurrent_index_saves_leave_one_whole_file(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=save_indexes, args=(path, worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+    gazetteer, exclusions = Gazetteer.load(path), ExclusionIndex.load(path.with_suffix(".leie"))
+    assert len(gazetteer.zips) == int(gazetteer.source[1:]) + 1
+    assert len(exclusions.records) == int(exclusions.source[1:]) + 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_a_line_torn_by_a_crash_is_skipped_and_terminated(app):
+    app.save_history({"type": "contact_search", "doctor_name": "Before"})
+    with open(app.HISTORY_FILE, "a") as f:
+        f.write('{"type": "contact_search", "doctor_na')
+    app.save_history({"type": "contact_search", "doctor_name": "After"})
+    assert [entry["doctor_name"] for entry in app.read_history_file()] == ["Before", "After"]
+
+
+def test_legacy_history_is_migrated_once(home):
+    DoctorDork.LEGACY_HISTORY_FILE.write_text(json.dumps([{"type": "old", "doctor_name": "Legacy"}]))
+    app = DoctorDork()
+    assert not DoctorDork.LEGACY_HISTORY_FILE.exists()
+    assert [entry["doctor_name"] for entry in app.history] == ["Legacy"]
+    assert [entry["doctor_name"] for entry in DoctorDork().history] == ["Legacy"]
+
+
+def test_unreadable_config_falls_back_to_defaults(home):
+    DoctorDork.CONFIG_FILE.write_text("{broken")
+    assert DoctorDork().config == DoctorDork.DEFAULT_CONFIG
+
+
+def test_atomic_write_replaces_the_whole_file(tmp_path):
+    path = tmp_path / "file.json"
+    path.write_text("old contents that are longer")
+    with locked(path):
+        atomic_write(path, "new")
+    assert path.read_text() == "new"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["file.json", "file.json.lock"]
@@ -0,0 +1,123 @@
+import sys
+
+import pytest
+
+from DoctorDork import ResultStore, build_parser, run_command
+
+
+@pytest.fixture
+def store(tmp_path, roster):
+    store = ResultStore(tmp_path / "results.db")
+    store.run_id = store.create_run(roster * 2, version="v1")
+    assert store.publish_chunks(store.run_id, 4) == 3
+    yield store
+    store.close()
+
+
+def test_chunks_are_claimed_in_order_by_one_worker_each(store):
+    first = store.claim_chunk("a", 60)
+    second = store.claim_chunk("b", 60)
+    assert (first["start"], first["end"]) == (0, 4)
+    assert (second["start"], second["end"]) == (4, 8)
+    assert store.chunk_progress(store.run_id) == {"pending": 1, "leased": 2, "done": 0, "failed": 0}
+
+
+def test_expired_leases_are_claimed_again(store):
+    stalled = store.claim_chunk("a", -1)
+    retry = store.claim_chunk("b", 60)
+    assert retry["chunk_id"] == stalled["chunk_id"]
+    assert retry["attempts"] == 2
+    assert not store.renew_lease(stalled, 60)
+    assert store.renew_lease(retry, 60)
+
+
+def test_chunks_out_of_attempts_count_as_failed(store):
+    for _ in range(store.MAX_CHUNK_ATTEMPTS):
+        chunk = store.claim_chunk("a", 60, store.run_id)
+        assert chunk["chunk_id"] == 0
+        store.finish_chunk(chunk, "pending")
+    assert store.claim_chunk("a", 60)["chunk_id"] == 1
+    assert store.chunk_progress(store.run_id)["failed"] == 1
+
+
+def test_released_chunks_keep_their_attempts(store):
+    chunk = store.claim_chunk("a", 60)
+    store.release_chunk(chunk)
+    again = store.claim_chunk("b", 60)
+    assert again["chunk_id"] == chunk["chunk_id"]
+    assert again["attempts"] == 1
+
+
+def test_excluded_runs_are_not_claimed(store, roster):
+    other = store.create_run(roster, version="v1")
+    store.publish_chunks(other, 10)
+    assert store.claim_chunk("a", 60, exclude=(store.run_id,))["run_id"] == other
+
+
+def test_workers_complete_a_queued_run(app, roster):
+    run_id = app.queue_batch(roster * 3, source="roster.csv", chunk_size=4)
+    assert app.work(worker_id="w1") == len(roster) * 3
+    assert app.wait_for_run(run_id) == "complete"
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        assert store.get_run(run_id)["status"] == "complete"
+        assert all(results for _, _, results in store.iter_results(run_id))
+    finally:
+        store.close()
+
+
+def test_workers_skip_runs_queued_against_another_table(app, roster):
+    run_id = app.queue_batch(roster, source="roster.csv", chunk_size=2)
+    app.modules.base[0] = {**app.modules.base[0], "title": "Edited"}
+    app.modules.load(app.modules.base)
+    assert app.work(worker_id="w1", run_id=run_id) == 0
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        assert store.chunk_progress(run_id) == {"pending": 3, "leased": 0, "done": 0, "failed": 0}
+        assert store.conn.execute("SELECT MAX(attempts) FROM chunks").fetchone()[0] == 0
+    finally:
+        store.close()
+
+
+def test_worker_failures_release_the_chunk(app, roster, monkeypatch):
+    run_id = app.queue_batch(roster, source="roster.csv", chunk_size=10)
+
+    def broken(rows, enrich=()):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(app, "process_rows", broken)
+    app.work(worker_id="w1")
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        assert store.chunk_progress(run_id)["failed"] == 1
+    finally:
+        store.close()
+    assert app.wait_for_run(run_id) == "interrupted"
+
+
+def test_worker_output_is_relayed_line_by_line(app, capfd):
+    script = "import time\nfor n in range(50):\n    print('line', n, 'x' * 200)\n"
+    workers = [app.spawn_worker([sys.executable, "-c", script]) for _ in range(4)]
+    for process, relay in workers:
+        process.wait()
+        relay.join()
+    lines = capfd.readouterr().out.splitlines()
+    assert len(lines) == 200
+    assert all(line.startswith("line ") and line.endswith("x" * 200) for line in lines)
+
+
+def test_local_resume_refuses_a_changed_table(app, roster, capsys):
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        run_id = store.create_run(roster, version="another-table")
+    finally:
+        store.close()
+    with pytest.raises(ValueError, match="different module table"):
+        app.run_batch(run_id=run_id)
+    assert run_command(app, build_parser().parse_args(["batch", "--resume", run_id])) == 1
+    assert "not resuming it" in capsys.readouterr().out
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        assert store.get_run(run_id)["completed"] == 0
+    finally:
+        store.close()
@@ -0,0 +1,61 @@
+import pytest
+
+from DoctorDork import ExclusionIndex, doctor_name_key
+
+LEIE_CSV = """LASTNAME,FIRSTNAME,MIDNAME,BUSNAME,GENERAL,SPECIALTY,UPIN,NPI,DOB,ADDRESS,CITY,STATE,ZIP,EXCLTYPE,EXCLDATE,REINDATE,WAIVERDATE,WVRSTATE
+DOE,JANE,Q,,IND,PEDIATRICS,,1234567890,,1 MAIN,AUSTIN,TX,78701,1128a1,20200101,00000000,,
+DOE,JANE,,,IND,,,0000000000,,2 ELM,RENO,NV,89501,1128b4,20190101,00000000,,
+SMITH,JOHN,,,IND,,,0000000000,,3 OAK,BOSTON,MA,02108,1128a1,20180101,00000000,,
+,,,ACME CLINIC,ENT,,,0000000000,,4 PINE,MIAMI,FL,33101,1128b7,20170101,00000000,,
+"""
+
+
+@pytest.fixture
+def leie(tmp_path):
+    path = tmp_path / "UPDATED.csv"
+    path.write_text(LEIE_CSV)
+    return ExclusionIndex.from_csv(path)
+
+
+@pytest.mark.parametrize("name, key", [("Dr. Jane Q. Doe, MD", ("DOE", "JANE")), ("Doe, Jane", ("DOE", "JANE")),
+                                       ("Doe, Jane, MD", ("DOE", "JANE")),
+                                       ("Cher", ("CHER", "")), ("MD", None)])
+def test_doctor_name_key(name, key):
+    assert doctor_name_key(name) == key
+
+
+def test_screen_ranks_npi_then_name_and_state_then_name(leie):
+    by_npi = leie.screen({"doctor_name": "Someone Else", "npi": "1234567890"})
+    assert [(m["match"], m["CITY"]) for m in by_npi] == [("npi", "AUSTIN")]
+    by_name = leie.screen({"doctor_name": "Dr. Jane Doe", "state": "nv"})
+    assert [(m["match"], m["CITY"]) for m in by_name] == [("name+state", "RENO"), ("name", "AUSTIN")]
+    assert leie.screen({"doctor_name": "John Smyth", "state": "MA"}) == []
+
+
+def test_placeholder_npis_and_entities_are_not_indexed(leie):
+    assert "0000000000" not in leie.by_npi
+    assert leie.screen({"doctor_name": "Acme Clinic"}) == []
+
+
+def test_saved_index_loads_back(leie, tmp_path):
+    leie.save(tmp_path / "leie.json")
+    loaded = ExclusionIndex.load(tmp_path / "leie.json")
+    assert loaded.records == leie.records
+    assert loaded.screen({"doctor_name": "John Smith", "state": "MA"})[0]["match"] == "name+state"
+
+
+def test_non_leie_files_are_rejected(tmp_path):
+    path = tmp_path / "other.csv"
+    path.write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError, match="Not an LEIE file"):
+        ExclusionIndex.from_csv(path)
+
+
+def test_exclusion_enrichment(app, leie):
+    leie.save(app.LEIE_INDEX_FILE)
+    clear, flagged = app.enrich_exclusions([{"doctor_name": "Wei Lee", "state": "WA"},
+                                            {"doctor_name": "Jane Doe", "state": "TX"}])
+    assert clear == {"Status": "No match"}
+    assert flagged["Status"] == "POSSIBLE EXCLUSION (name+state match)"
+    assert flagged["Excluded NPI"] == "1234567890"
+    assert flagged["Other Matches"] == "1"
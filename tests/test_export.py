@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from DoctorDork import EXPORT_SINKS, ColumnarSink, ExportFanout, ExportSink
+
+
+def rows_of(roster):
+    return [(doctor, {"contact": [("Healthgrades", f"https://hg.example/{n}")],
+                      "reviews": f"https://www.google.com/search?q={n}"})
+            for n, doctor in enumerate(roster)]
+
+
+def column(directory, name):
+    manifest = json.loads((directory / "columns.json").read_text())
+    files = {c["name"]: c["file"] for c in manifest["columns"]}
+    return (directory / files[name]).read_text().split("\n")[:-1]
+
+
+def test_several_formats_are_written_from_one_pass(app, roster, home):
+    consumed = []
+
+    def rows():
+        for row in rows_of(roster):
+            consumed.append(row)
+            yield row
+
+    written = app.export_batch_results(rows(), "batch", "csv, jsonl,html")
+    assert written == ["batch.csv", "batch.jsonl", "batch.html"]
+    assert len(consumed) == len(roster)
+    assert (home / "batch.csv").read_text().count("\n") == 1 + 2 * len(roster)
+    assert len((home / "batch.jsonl").read_text().splitlines()) == len(roster)
+    assert "https://hg.example/4" in (home / "batch.html").read_text()
+
+
+def test_json_is_one_document(app, roster, home):
+    written = app.export_batch_results(rows_of(roster), "batch.json", "json")
+    document = json.loads((home / written[0]).read_text())
+    assert [d["doctor_name"] for d in document["doctors"]] == [d["doctor_name"] for d in roster]
+
+
+def test_sharded_json_becomes_json_lines(app, roster, home, capsys):
+    written = app.export_batch_results(rows_of(roster), "batch", "json,csv", shard_rows=2)
+    assert written == ["batch.jsonl.manifest.json", "batch.csv.manifest.json"]
+    assert "writing JSON lines instead" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("fmt, options, message", [
+    ("html", {"shard_rows": 2}, "html can't be sharded"),
+    ("columnar", {"compress": "gzip"}, "columnar can't be compressed"),
+    ("csv,columnar", {"shard_bytes": 100}, "columnar can't be sharded"),
+])
+def test_unsupported_options_are_refused(app, roster, home, capsys, fmt, options, message):
+    assert app.export_batch_results(rows_of(roster), "batch", fmt, **options) is None
+    assert message in capsys.readouterr().out
+    assert not list(home.glob("batch*"))
+
+
+def test_unknown_formats_are_refused(app, roster, capsys):
+    assert app.export_batch_results(rows_of(roster), "batch", "csv,xml") is None
+    assert "Unknown export format: xml" in capsys.readouterr().out
+
+
+def test_columnar_backfills_columns_that_appear_later(tmp_path, monkeypatch):
+    monkeypatch.setattr(ColumnarSink, "FLUSH_ROWS", 2)
+    sink = ColumnarSink(str(tmp_path / "batch"))
+    for n in range(5):
+        results = {"contact": [("Healthgrades", f"hg{n}")]}
+        if n >= 3:
+            results["contact"].append(("Vitals", f"v{n}"))
+        if n == 1:
+            results["reviews"] = "g1"
+        sink.write({"doctor_name": f"Doctor {n}", "state": "TX"}, results)
+    manifest = json.loads(open(sink.close()).read())
+    assert manifest["rows"] == 5
+    directory = tmp_path / "batch.columns"
+    assert column(directory, "doctor_name") == [f"Doctor {n}" for n in range(5)]
+    assert column(directory, "city") == [""] * 5
+    assert column(directory, "contact.Healthgrades") == [f"hg{n}" for n in range(5)]
+    assert column(directory, "contact.Vitals") == ["", "", "", "v3", "v4"]
+    assert column(directory, "reviews") == ["", "g1", "", "", ""]
+
+
+def test_columnar_export_through_the_app(app, roster, home):
+    written = app.export_batch_results(rows_of(roster), "batch", "columnar")
+    assert written == ["batch.columns/columns.json"]
+    assert column(home / "batch.columns", "reviews")[2] == "https://www.google.com/search?q=2"
+
+
+class FailingSink(ExportSink):
+    def __init__(self, base="", **options):
+        self.closed = False
+
+    def write(self, doctor_info, results):
+        raise RuntimeError("disk full")
+
+    def close(self):
+        self.closed = True
+        return "failed"
+
+
+class ListSink(ExportSink):
+    def __init__(self):
+        self.rows = []
+
+    def write(self, doctor_info, results):
+        self.rows.append(doctor_info["doctor_name"])
+
+    def close(self):
+        return "list"
+
+
+def test_a_failing_sink_does_not_stall_the_others(roster, monkeypatch):
+    monkeypatch.setattr(ExportFanout, "BATCH", 1)
+    monkeypatch.setattr(ExportFanout, "QUEUE_SIZE", 1)
+    failing, listing = FailingSink(), ListSink()
+    with pytest.raises(RuntimeError, match="disk full"):
+        ExportFanout([failing, listing]).run(rows_of(roster * 4))
+    assert failing.closed
+    assert len(listing.rows) == 20
+
+
+def test_export_failures_are_reported(app, roster, capsys, monkeypatch):
+    monkeypatch.setitem(EXPORT_SINKS, "csv", FailingSink)
+    assert app.export_batch_results(rows_of(roster), "batch", "csv") is None
+    assert "Export failed: disk full" in capsys.readouterr().out
+
+
+def test_columns_that_sanitize_alike_get_their_own_files(tmp_path):
+    sink = ColumnarSink(str(tmp_path / "batch"))
+    sink.write({"doctor_name": "A"}, {"reviews": [("Rate MDs", "space"), ("Rate_MDs", "underscore"),
+                                                  ("Rate-MDs", "dash"), ("rate mds", "lower")]})
+    sink.close()
+    directory = tmp_path / "batch.columns"
+    manifest = json.loads((directory / "columns.json").read_text())
+    files = [c["file"] for c in manifest["columns"]]
+    assert len({f.lower() for f in files}) == len(files)
+    assert [column(directory, f"reviews.{platform}") for platform in ("Rate MDs", "Rate_MDs", "Rate-MDs", "rate mds")] \
+        == [["space"], ["underscore"], ["dash"], ["lower"]]
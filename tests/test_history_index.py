@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from DoctorDork import HistoryIndex
+
+ENTRIES = [
+    {"timestamp": "2026-08-01T10:00:00", "type": "contact_search", "doctor_name": "Dr. John Smith", "state": "tx"},
+    {"timestamp": "2026-08-15T10:00:00", "type": "medical_board_lookup", "doctor_name": "Jane Smithers", "state": "MA"},
+    {"timestamp": "2026-09-01T10:00:00", "type": "contact_search", "doctor_name": "Smith, Anna", "state": "TX"},
+    {"timestamp": "2026-09-20T10:00:00", "type": "batch_processing", "run_id": "x"},
+]
+
+
+def append(path, *entries):
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / "history.jsonl"
+    append(path, *ENTRIES)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path, history):
+    index = HistoryIndex(tmp_path / "history.db")
+    assert index.sync(history) == len(ENTRIES)
+    yield index
+    index.close()
+
+
+def names(entries):
+    return [entry.get("doctor_name") for entry in entries]
+
+
+def test_name_tokens_match_as_prefixes(index):
+    assert names(index.query(name="smith")) == ["Smith, Anna", "Jane Smithers", "Dr. John Smith"]
+    assert names(index.query(name="smith john")) == ["Dr. John Smith"]
+    assert names(index.query(name="Dr. Smi")) == ["Smith, Anna", "Jane Smithers", "Dr. John Smith"]
+
+
+def test_filters_combine(index):
+    assert names(index.query(name="smith", state="tx")) == ["Smith, Anna", "Dr. John Smith"]
+    assert names(index.query(type="contact_search", since="2026-08-02")) == ["Smith, Anna"]
+    assert names(index.query(until="2026-08-15")) == ["Jane Smithers", "Dr. John Smith"]
+    assert len(index.query(limit=2)) == 2
+
+
+def test_parse_filter():
+    assert HistoryIndex.parse_filter("john smith state:tx since:2026-09-01 foo:bar") == {
+        "state": "TX", "since": "2026-09-01", "name": "john smith foo:bar"}
+
+
+def test_sync_only_ingests_new_complete_lines(index, history):
+    assert index.sync(history) == 0
+    with open(history, "a") as f:
+        f.write(json.dumps({"doctor_name": "Wei Lee", "timestamp": "2026-10-01"}) + "\n" + '{"doctor_name": "Par')
+    assert index.sync(history) == 1
+    with open(history, "a") as f:
+        f.write('tial"}\n')
+    assert index.sync(history) == 1
+    assert index.count() == len(ENTRIES) + 2
+
+
+def test_compaction_keeps_the_archive_complete(index, history):
+    append(history, *({"timestamp": f"2026-10-{n:02d}", "doctor_name": f"Doctor {n}"} for n in range(1, 11)))
+    index.sync(history, keep=3)
+    assert len(history.read_text().splitlines()) == 3
+    assert index.count() == len(ENTRIES) + 10
+    append(history, {"timestamp": "2026-10-20", "doctor_name": "Late Entry"})
+    assert index.sync(history) == 1
+    assert index.count() == len(ENTRIES) + 11
+
+
+def test_app_queries_the_full_archive(app, monkeypatch):
+    monkeypatch.setattr(app, "HISTORY_COMPACT_BYTES", 2000)
+    monkeypatch.setattr(app, "HISTORY_LIMIT", 10)
+    surnames = [a + b for a in "ABCDEFGH" for b in "xyzvw"]
+    for surname in surnames:
+        app.save_history({"type": "contact_search", "doctor_name": f"Doctor {surname}", "state": "TX"})
+    assert len(app.read_history_file()) < len(surnames)
+    assert len(app.query_history(name="doctor", limit=0)) == len(surnames)
+    assert names(app.query_history(name="ax")) == ["Doctor Ax"]
@@ -0,0 +1,71 @@
+import pytest
+
+from DoctorDork import HospitalIndex
+
+HOSPITALS_CSV = """Facility ID,Facility Name,Address,City/Town,State,ZIP Code,Telephone Number,Hospital Type,Emergency Services,Hospital overall rating
+220071,MASS GENERAL,55 FRUIT ST,BOSTON,MA,02114,(617) 726-2000,Acute Care Hospitals,Yes,5
+22075,BOSTON CHILDRENS,300 LONGWOOD AVE,Boston,MA,02115,(617) 355-6000,Childrens,Yes,Not Available
+450001,AUSTIN GENERAL,1 MAIN ST,AUSTIN,TX,78701,,Acute Care Hospitals,Yes,3
+,NO CCN,,,TX,,,,,
+"""
+
+AFFILIATIONS_CSV = """NPI,Ind_PAC_ID,Provider Last Name,Provider First Name,facility_type,Facility Affiliations Certification Number
+1234567890,1,DOE,JANE,Hospital,220071
+1234567890,1,DOE,JANE,Hospital,022075
+1111111111,2,SMITH,JOHN,Hospital,450001
+2222222222,3,SMITH,JOHN,Hospital,220071
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "hospitals.csv").write_text(HOSPITALS_CSV)
+    (tmp_path / "affiliations.csv").write_text(AFFILIATIONS_CSV)
+    index = HospitalIndex(tmp_path / "hospitals.db")
+    assert index.import_hospitals(tmp_path / "hospitals.csv") == 3
+    assert index.import_affiliations(tmp_path / "affiliations.csv") == 4
+    yield index
+    index.close()
+
+
+def test_hospitals_by_location(index):
+    assert [h["name"] for h in index.hospitals_in("ma", "Boston")] == ["BOSTON CHILDRENS", "MASS GENERAL"]
+    assert [h["ccn"] for h in index.hospitals_in("TX")] == ["450001"]
+    assert len(index.hospitals_in("MA", limit=1)) == 1
+
+
+def test_affiliations_by_npi_then_name(index):
+    match, hospitals = index.affiliations({"doctor_name": "Someone", "npi": "1234567890"})
+    assert match == "npi"
+    assert sorted(h["name"] for h in hospitals) == ["BOSTON CHILDRENS", "MASS GENERAL"]
+    match, hospitals = index.affiliations({"doctor_name": "Dr. John Smith", "state": "TX"})
+    assert (match, [h["name"] for h in hospitals]) == ("name+state", ["AUSTIN GENERAL"])
+    match, hospitals = index.affiliations({"doctor_name": "John Smith", "state": "CA"})
+    assert match == "name" and len(hospitals) == 2
+    assert index.affiliations({"doctor_name": "Nobody Here"}) == (None, [])
+
+
+def test_reimport_replaces_the_table(index, tmp_path):
+    (tmp_path / "small.csv").write_text(HOSPITALS_CSV.splitlines()[0] + "\n" + HOSPITALS_CSV.splitlines()[3] + "\n")
+    assert index.import_hospitals(tmp_path / "small.csv") == 1
+    assert index.stats() == {"hospitals": 1, "affiliations": 4, "clinicians": 3}
+
+
+def test_files_without_required_columns_are_rejected(tmp_path):
+    (tmp_path / "bad.csv").write_text("Name,City\nX,Y\n")
+    index = HospitalIndex(tmp_path / "hospitals.db")
+    try:
+        with pytest.raises(ValueError, match="missing column"):
+            index.import_hospitals(tmp_path / "bad.csv")
+    finally:
+        index.close()
+
+
+def test_hospital_enrichment(app, index, tmp_path):
+    app.HOSPITALS_DB = index.path
+    affiliated, nearby = app.enrich_hospitals([{"doctor_name": "Jane Doe", "state": "MA", "npi": "1234567890"},
+                                               {"doctor_name": "Ann Other", "city": "Austin", "state": "TX"}])
+    assert affiliated["Matched On"] == "npi"
+    assert "MASS GENERAL (Boston, MA)" in affiliated["Affiliated Hospitals"]
+    assert nearby["Affiliated Hospitals"] == "None on file"
+    assert nearby["Hospitals In Area"] == "AUSTIN GENERAL"
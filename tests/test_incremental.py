@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from DoctorDork import ResultStore
+
+
+@pytest.fixture
+def store(app):
+    store = ResultStore(app.RESULTS_DB)
+    yield store
+    store.close()
+
+
+def copies(roster):
+    return [dict(doctor) for doctor in roster]
+
+
+def test_fingerprint_depends_on_row_and_table_version():
+    row = {"doctor_name": "Jane Doe", "state": "TX"}
+    assert ResultStore.fingerprint(row, "v1") == ResultStore.fingerprint(dict(reversed(list(row.items()))), "v1")
+    assert ResultStore.fingerprint(row, "v1") != ResultStore.fingerprint(row, "v2")
+    assert ResultStore.fingerprint(row, "v1") != ResultStore.fingerprint({**row, "state": "MA"}, "v1")
+
+
+def test_incremental_run_only_regenerates_changed_rows(app, roster, store, monkeypatch):
+    first = app.run_batch(copies(roster), source="roster.csv")
+    edited = copies(roster)
+    edited[1]["city"] = "Dallas"
+    edited.append({"doctor_name": "New Doctor", "city": "Boston", "state": "MA", "specialty": ""})
+
+    processed = []
+    process_rows = app.process_rows
+
+    def counting(rows, enrich=()):
+        processed.extend(i for i, _ in rows)
+        return process_rows(rows, enrich)
+
+    monkeypatch.setattr(app, "process_rows", counting)
+    second = app.run_batch(edited, source="roster.csv", incremental=True)
+    assert processed == [1, len(roster)]
+
+    rows = list(store.iter_results(second))
+    assert len(rows) == len(edited)
+    assert all(results for _, _, results in rows)
+    assert rows[1][1]["city"] == "Dallas"
+    assert rows[0][2] == next(store.iter_results(first))[2]
+    assert [i for i, _, _ in store.iter_results(second, changed_only=True)] == [1, len(roster)]
+
+
+def test_reuse_follows_the_origin_of_reused_rows(app, roster, store):
+    first = app.run_batch(copies(roster), source="roster.csv")
+    app.run_batch(copies(roster), source="roster.csv", incremental=True)
+    third = app.run_batch(copies(roster), source="roster.csv", incremental=True)
+    origins = {origin for (origin,) in store.conn.execute("SELECT origin FROM rows WHERE run_id = ?", (third,))}
+    assert origins == {first}
+    assert [r for _, _, r in store.iter_results(third)] == [r for _, _, r in store.iter_results(first)]
+
+
+def test_table_changes_invalidate_reuse(app, roster, store):
+    app.run_batch(copies(roster), source="roster.csv")
+    app.PLATFORMS_FILE.write_text(json.dumps({"medical_boards": {"MA": {"url": "https://example.org/ma"}}}))
+    app.platform_overrides.next_check = 0
+    run_id = app.run_batch(copies(roster), source="roster.csv", incremental=True)
+    assert store.get_run(run_id)["completed"] == len(roster)
+    assert len(list(store.iter_results(run_id, changed_only=True))) == len(roster)
+    row = next(store.iter_results(run_id))
+    assert row[2]["medical_board"][0][1] == "https://example.org/ma"
+
+
+def test_incremental_without_an_earlier_run_processes_everything(app, roster, store):
+    run_id = app.run_batch(copies(roster), source="other.csv", incremental=True)
+    assert len(list(store.iter_results(run_id, changed_only=True))) == len(roster)
+
+
+def test_changed_only_export(app, roster, home):
+    app.run_batch(copies(roster), source="roster.csv")
+    edited = copies(roster)
+    edited[0]["specialty"] = "dermatology"
+    run_id = app.run_batch(edited, source="roster.csv", incremental=True)
+    (path,) = app.export_run(run_id, str(home / "changed"), changed_only=True, export_format="jsonl")
+    lines = open(path).read().splitlines()
+    assert [json.loads(line)["doctor_name"] for line in lines] == [roster[0]["doctor_name"]]
@@ -0,0 +1,85 @@
+import json
+
+from DoctorDork import LinkChecker
+from stub_server import fake_page
+
+URL = "https://www.mass.gov/orgs/board-of-registration-in-medicine"
+
+
+def checker(address, tmp_path):
+    return LinkChecker(tmp_path / "health.json", timeout=5, host_override=address)
+
+
+def test_fingerprints_measure_how_much_a_page_changed():
+    page = b"<html><body><p>" + b" ".join(b"word%d" % n for n in range(300)) + b"</p></body></html>"
+    edited = page.replace(b"word150", b"edited")
+    assert LinkChecker.distance(LinkChecker.fingerprint(page), LinkChecker.fingerprint(page)) == 0
+    assert LinkChecker.distance(LinkChecker.fingerprint(page), LinkChecker.fingerprint(edited)) <= \
+        LinkChecker.CHANGE_THRESHOLD
+    assert LinkChecker.distance(LinkChecker.fingerprint(fake_page("a.gov", "/", 0)),
+                                LinkChecker.fingerprint(fake_page("a.gov", "/", 1))) > LinkChecker.CHANGE_THRESHOLD
+
+
+def test_markup_and_scripts_are_ignored():
+    assert LinkChecker.fingerprint(b"<p>Find a <b>doctor</b> today</p><script>var t = 1;</script>") == \
+        LinkChecker.fingerprint(b"<div>find a doctor   TODAY</div><script>var t = 2;</script>")
+
+
+def test_revalidation_keeps_what_was_known(stub, tmp_path):
+    address, _ = stub
+    links = checker(address, tmp_path)
+    first = links.check(URL)
+    assert first["status"] == 200 and first["bytes"] > 0 and first["etag"]
+    again = links.check(URL)
+    assert again["status"] == 304 and again["health"] == "ok" and again["bytes"] == 0
+    assert {key: again[key] for key in ("etag", "last_modified", "fingerprint", "final_url")} == \
+        {key: first[key] for key in ("etag", "last_modified", "fingerprint", "final_url")}
+    assert links.changed() == {}
+
+
+def test_edited_pages_are_flagged(stub, tmp_path):
+    address, handler = stub
+    links = checker(address, tmp_path)
+    links.check(URL)
+    handler.revision = 1
+    record = links.check(URL)
+    assert record["status"] == 200 and record["changed"]["content"] > LinkChecker.CHANGE_THRESHOLD
+    assert list(links.changed()) == [URL]
+    assert links.changed(["https://elsewhere.example"]) == {}
+
+
+def test_moved_pages_are_flagged(stub, tmp_path):
+    address, handler = stub
+    links = checker(address, tmp_path)
+    links.check(URL)
+    handler.redirects = {"www.mass.gov": "/search"}
+    record = links.check(URL)
+    assert record["final_url"] == "https://www.mass.gov/search"
+    assert record["changed"]["redirect"] == {"from": URL, "to": "https://www.mass.gov/search"}
+
+
+def test_records_survive_a_reload(stub, tmp_path):
+    address, _ = stub
+    links = checker(address, tmp_path)
+    links.check(URL)
+    links.save()
+    reloaded = checker(address, tmp_path)
+    assert reloaded.get(URL) == links.get(URL)
+    assert reloaded.check(URL)["status"] == 304
+
+
+def test_saves_from_concurrent_sweeps_merge(stub, tmp_path):
+    address, _ = stub
+    first, second = checker(address, tmp_path), checker(address, tmp_path)
+    first.check(URL)
+    second.check("https://www.tmb.state.tx.us/")
+    first.save()
+    second.save()
+    saved = json.loads((tmp_path / "health.json").read_text())
+    assert sorted(saved) == sorted([URL, "https://www.tmb.state.tx.us/"])
+    assert second.get(URL) == first.get(URL)
+
+
+def test_a_corrupt_health_file_starts_empty(tmp_path):
+    (tmp_path / "health.json").write_text("{not json")
+    assert LinkChecker(tmp_path / "health.json").health == {}
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from DoctorDork import DoctorDork, ModuleRegistry
+
+MODULE = {"name": "Demo", "key": "demo", "title": "DEMO", "required": ["doctor_name"],
+          "platforms": {"Site": "https://example.org/?q={doctor_name}+{state}", "Plain": "https://example.org/"}}
+
+
+def test_templates_render_with_quoted_fields():
+    registry = ModuleRegistry([MODULE])
+    assert registry.render("Demo", {"doctor_name": "Jane%20Doe", "state": "TX"}) == [
+        ["Site", "https://example.org/?q=Jane%20Doe+TX"], ["Plain", "https://example.org/"]]
+    assert registry.render("Demo", {"doctor_name": "x", "state": "y"}, only_field="state") == [
+        ["Site", "https://example.org/?q=x+y"]]
+
+
+def test_modules_missing_required_fields_are_skipped():
+    registry = ModuleRegistry([MODULE])
+    assert registry.render_all({"doctor_name": "", "state": "TX"}) == {}
+    assert list(registry.render_all({"doctor_name": "a", "state": "TX"})) == ["demo"]
+
+
+@pytest.mark.parametrize("module, message", [
+    ({**MODULE, "platforms": {"Site": "https://x/{zip}"}}, "unknown field"),
+    ({**MODULE, "required": ["zip"]}, "unknown field"),
+    ({**MODULE, "key": ""}, "missing 'key'"),
+])
+def test_invalid_modules_are_rejected(module, message):
+    with pytest.raises(ValueError, match=message):
+        ModuleRegistry([module])
+
+
+def test_duplicate_module_names_are_rejected():
+    with pytest.raises(ValueError, match="Duplicate"):
+        ModuleRegistry([MODULE, MODULE])
+
+
+def test_reload_only_recompiles_changed_templates():
+    registry = ModuleRegistry([MODULE])
+    changed = {**MODULE, "platforms": {**MODULE["platforms"], "Plain": "https://example.org/new"}}
+    assert registry.load([changed]) == 1
+
+
+def test_from_file_accepts_a_modules_object(tmp_path):
+    path = tmp_path / "modules.json"
+    path.write_text(json.dumps({"modules": [MODULE]}))
+    assert ModuleRegistry.from_file(path).names() == ["Demo"]
+
+
+def test_built_in_table_round_trips():
+    registry = ModuleRegistry(DoctorDork.MODULES)
+    assert ModuleRegistry(registry.to_table()).to_table() == registry.to_table()
+
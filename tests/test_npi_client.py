@@ -0,0 +1,56 @@
+from DoctorDork import NPIRegistryClient
+
+
+def client(address, tmp_path=None, **options):
+    return NPIRegistryClient(f"http://{address}/api/", cache_path=tmp_path and tmp_path / "npi.db",
+                             backoff=0, timeout=5, **options)
+
+
+def test_query_key_normalizes_names_and_state():
+    assert NPIRegistryClient.query_key({"doctor_name": "Dr. Jane Doe,", "state": " tx"}) == \
+        NPIRegistryClient.query_key({"doctor_name": "jane doe", "state": "TX"})
+
+
+def test_resolve_shares_one_request_per_query_and_caches(stub, tmp_path, roster):
+    address, _ = stub
+    doctors = roster + [dict(roster[0])]
+    npi = client(address, tmp_path)
+    try:
+        summaries = npi.resolve(doctors)
+        assert npi.stats["requests"] == len(roster)
+        assert summaries[0] == summaries[-1]
+        assert all("error" not in summary for summary in summaries)
+    finally:
+        npi.close()
+
+    again = client(address, tmp_path)
+    try:
+        assert again.resolve(doctors) == summaries
+        assert again.stats["requests"] == 0
+        assert again.stats["cache_hits"] == len(roster)
+    finally:
+        again.close()
+
+
+def test_transient_failures_are_retried_then_reported(stub):
+    address, handler = stub
+    handler.error_rate = 1.0
+    npi = client(address, retries=2)
+    (summary,) = npi.resolve([{"doctor_name": "Jane Doe", "state": "TX"}])
+    assert summary == {"error": "HTTP 503"}
+    assert npi.stats["retries"] == 2
+    assert npi.stats["errors"] == 1
+
+
+def test_summarize_prefers_a_match_in_the_doctor_city():
+    def result(number, city):
+        return {"number": number, "basic": {"first_name": "JANE", "last_name": "DOE"},
+                "taxonomies": [{"code": "208000000X", "desc": "Pediatrics", "primary": True}],
+                "addresses": [{"address_purpose": "LOCATION", "address_1": "1 MAIN ST", "city": city,
+                               "state": "TX", "postal_code": "787010000"}]}
+
+    response = {"result_count": 2, "results": [result(1, "DALLAS"), result(2, "AUSTIN")]}
+    summary = NPIRegistryClient.summarize(response, {"doctor_name": "Jane Doe", "city": "Austin"})
+    assert summary["npi"] == "2"
+    assert summary["practice_address"] == "1 MAIN ST, AUSTIN, TX 78701"
+    assert NPIRegistryClient.summarize({"results": []}, {}) == {"matches": 0}
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from DoctorDork import ModuleRegistry, PlatformOverrides
+
+
+def write(path, data, mtime=None):
+    path.write_text(json.dumps(data))
+    if mtime:
+        os.utime(path, (mtime, mtime))
+
+
+def test_poll_returns_overrides_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "platforms.json"
+    overrides = PlatformOverrides(path, interval=0)
+    assert overrides.poll() is None
+    write(path, {"medical_boards": {}}, mtime=1_000_000)
+    assert overrides.poll() == {"medical_boards": {}}
+    assert overrides.poll() is None
+    write(path, {"modules": {}}, mtime=2_000_000)
+    assert overrides.poll() == {"modules": {}}
+    path.unlink()
+    assert overrides.poll() == {}
+
+
+def test_poll_rejects_a_non_object(tmp_path):
+    path = tmp_path / "platforms.json"
+    write(path, [1, 2])
+    with pytest.raises(ValueError):
+        PlatformOverrides(path).poll()
+
+
+def test_merge_boards_replaces_adds_and_removes_states():
+    base = {"MA": {"name": "Mass", "url": "https://ma"}, "TX": {"name": "Texas", "url": "https://tx"}}
+    merged = PlatformOverrides.merge_boards(base, {"ma": {"url": "https://new-ma"}, "TX": None,
+                                                   "ZZ": {"name": "Z", "url": "https://zz"}})
+    assert merged == {"MA": {"name": "Mass", "url": "https://new-ma"}, "ZZ": {"name": "Z", "url": "https://zz"}}
+    assert "TX" in base
+    with pytest.raises(ValueError):
+        PlatformOverrides.merge_boards(base, {"QQ": {"name": "no url"}})
+
+
+def test_module_overrides_merge_platform_by_platform():
+    base = [{"name": "A", "key": "a", "title": "A", "platforms": {"One": "https://1", "Two": "https://2"}},
+            {"name": "B", "key": "b", "title": "B", "platforms": {"Three": "https://3"}}]
+    merged = ModuleRegistry.merge(base, {"A": {"platforms": {"Two": None, "Four": "https://4"}}, "B": None,
+                                         "C": {"key": "c", "title": "C", "platforms": {"Five": "https://5"}}})
+    assert [(m["name"], m["platforms"]) for m in merged] == [
+        ("A", {"One": "https://1", "Four": "https://4"}), ("C", {"Five": "https://5"})]
+
+
+def test_app_picks_up_edited_overrides(app):
+    app.platform_overrides.interval = app.platform_overrides.next_check = 0
+    name = app.modules.names()[0]
+    write(app.PLATFORMS_FILE, {"medical_boards": {"MA": {"url": "https://example.org/ma"}},
+                               "modules": {name: None}}, mtime=1_000_000)
+    assert app.refresh_platforms()
+    assert app.medical_boards["MA"]["url"] == "https://example.org/ma"
+    assert name not in app.modules.names()
+
+    write(app.PLATFORMS_FILE, {}, mtime=2_000_000)
+    assert app.refresh_platforms()
+    assert app.medical_boards == app.MEDICAL_BOARDS
+    assert name in app.modules.names()
+
+
+def test_broken_overrides_keep_the_current_tables(app):
+    app.platform_overrides.interval = app.platform_overrides.next_check = 0
+    app.PLATFORMS_FILE.write_text("{not json")
+    boards = app.medical_boards
+    assert not app.refresh_platforms()
+    assert app.medical_boards is boards
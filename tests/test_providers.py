@@ -0,0 +1,174 @@
+import csv
+
+import pytest
+
+from DoctorDork import Gazetteer, ProviderIndex, build_parser, run_command
+
+
+def nppes_file(path, *providers):
+    """An npidata_pfile-style CSV; each provider is a dict of stored fields"""
+    header = list(ProviderIndex.NPPES_COLUMNS.values())
+    header += [f"Healthcare Provider {kind}_{n}" for n in (1, 2) for kind in ("Taxonomy Code", "Primary Taxonomy Switch")]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for provider in providers:
+            row = [provider.get(field, "") for field in ProviderIndex.NPPES_COLUMNS]
+            row += [provider.get("taxonomy", ""), "N", provider.get("primary", ""), "Y" if provider.get("primary") else ""]
+            writer.writerow(row)
+    return path
+
+
+def provider(npi, last, zip_code, **fields):
+    return {"npi": npi, "entity": "1", "last": last, "first": "Pat", "zip": zip_code + "1234", "state": "MA",
+            "city": "BOSTON", **fields}
+
+
+@pytest.fixture
+def gazetteer(geonames):
+    return Gazetteer.from_geonames(geonames)
+
+
+@pytest.fixture
+def providers(tmp_path):
+    index = ProviderIndex(tmp_path / "providers.db")
+    count = index.import_nppes(nppes_file(
+        tmp_path / "npidata.csv",
+        provider("1000000001", "NEAR", "02108", taxonomy="208000000X"),
+        provider("1000000002", "ACROSS", "02139", taxonomy="207Q00000X", primary="207RC0000X"),
+        provider("1000000003", "WEST", "01060", taxonomy="208000000X"),
+        provider("1000000004", "GONE", "02108", deactivated="01/01/2020"),
+        provider("1000000005", "CLINIC", "02108", entity="2"),
+    ))
+    assert count == 3
+    yield index
+    index.close()
+
+
+def test_gazetteer_lookups(gazetteer):
+    assert gazetteer.lookup_zip("02139-4307")[1] == "Cambridge"
+    assert gazetteer.lookup_zip("") is None
+    assert [entry[0] for entry in gazetteer.city_zips("st. louis", "mo")] == ["63101"]
+
+
+@pytest.mark.parametrize("row, result", [
+    ({"city": "Boston", "state": "MA"}, ("ok", {})),
+    ({"city": "BOSTON", "state": "ma"}, ("corrected", {"city": "Boston"})),
+    ({"city": "", "state": "", "zip": "78701"}, ("corrected", {"city": "Austin", "state": "TX"})),
+    ({"city": "Springfield", "state": "MA"}, ("unknown", {})),
+])
+def test_gazetteer_normalizes_locations(gazetteer, row, result):
+    assert gazetteer.normalize(row) == result
+
+
+def test_near_returns_zips_by_distance(gazetteer):
+    found = gazetteer.near(42.3576, -71.0684, 10)
+    assert [entry[0] for _, entry in found] == ["02108", "02139"]
+    assert found[0][0] == pytest.approx(0, abs=0.01)
+    assert len(gazetteer.near(42.3576, -71.0684, 100)) == 3
+
+
+def test_gazetteer_round_trips(gazetteer, tmp_path):
+    gazetteer.save(tmp_path / "gazetteer.json")
+    assert Gazetteer.load(tmp_path / "gazetteer.json").zips == gazetteer.zips
+
+
+def test_providers_within_radius(providers, gazetteer):
+    found = providers.within(gazetteer, "02108", 10)
+    assert [(p["last"], p["miles"]) for p in found] == [("NEAR", 0.0), ("ACROSS", 1.9)]
+    assert found[1]["taxonomy"] == "207RC0000X"
+    assert [p["last"] for p in providers.within(gazetteer, "02108", 100, taxonomy="2080")] == ["NEAR", "WEST"]
+    with pytest.raises(KeyError):
+        providers.within(gazetteer, "99999", 10)
+
+
+def test_nearby_command(app, geonames, providers, capsys):
+    assert not run_command(app, build_parser().parse_args(["gazetteer", str(geonames)]))
+    app.PROVIDERS_DB = providers.path
+    assert not run_command(app, build_parser().parse_args(["nearby", "02108", "--miles", "5", "--json"]))
+    assert '"NEAR"' in capsys.readouterr().out
+
+
+def test_weekly_update_upserts_and_removes(providers, tmp_path):
+    weekly = nppes_file(
+        tmp_path / "npidata_weekly.csv",
+        provider("1000000001", "MOVED", "02139", taxonomy="208000000X"),
+        provider("1000000003", "WEST", "01060", deactivated="02/02/2024"),
+        provider("1000000006", "NEWCOMER", "02108"),
+    )
+    assert providers.apply_update(weekly) == {"upserted": 2, "removed": 1}
+    rows = {row["npi"]: dict(row) for row in providers.conn.execute("SELECT * FROM providers")}
+    assert sorted(rows) == ["1000000001", "1000000002", "1000000006"]
+    assert (rows["1000000001"]["last"], rows["1000000001"]["zip5"]) == ("MOVED", "02139")
+    (applied,) = providers.applied_updates()
+    assert (applied[0], applied[2], applied[3]) == ("npidata_weekly.csv", 2, 1)
+
+
+def test_reactivated_providers_are_kept(providers, tmp_path):
+    weekly = nppes_file(tmp_path / "weekly.csv",
+                        provider("1000000004", "BACK", "02108", deactivated="01/01/2020", reactivated="03/03/2024"))
+    assert providers.apply_update(weekly) == {"upserted": 1, "removed": 0}
+    assert providers.count() == 4
+
+
+def test_deactivation_report(providers, tmp_path):
+    report = tmp_path / "deactivated.csv"
+    report.write_text("NPI,Deactivation Date\n1000000002,01/01/2024\n1000000099,01/01/2024\nnot-an-npi,\n")
+    npis = ProviderIndex.read_deactivations(report)
+    assert npis == ["1000000002", "1000000099"]
+    assert providers.apply_update(deactivations=npis) == {"upserted": 0, "removed": 1}
+    assert providers.applied_updates()[0][0] == "deactivations"
+
+
+def test_every_application_is_kept_in_the_update_log(providers, tmp_path):
+    providers.apply_update(deactivations=["1000000001"])
+    providers.apply_update(deactivations=["1000000002"])
+    weekly = nppes_file(tmp_path / "weekly.csv", provider("1000000008", "NEW", "02108"))
+    providers.apply_update(weekly)
+    providers.apply_update(weekly)
+    log = providers.applied_updates()
+    assert [(name, upserted, removed) for name, _, upserted, removed in log] == [
+        ("weekly.csv", 1, 0), ("weekly.csv", 1, 0), ("deactivations", 0, 1), ("deactivations", 0, 1)]
+    assert len({applied for _, applied, _, _ in log}) == 4
+
+
+def test_update_logs_keyed_by_name_are_upgraded(tmp_path):
+    import sqlite3
+
+    conn = sqlite3.connect(str(tmp_path / "providers.db"))
+    conn.execute("CREATE TABLE updates (name TEXT PRIMARY KEY, applied TEXT NOT NULL, "
+                 "upserted INTEGER NOT NULL, removed INTEGER NOT NULL)")
+    conn.execute("INSERT INTO updates VALUES ('deactivations', '2026-01-01T00:00:00', 0, 3)")
+    conn.commit()
+    conn.close()
+    index = ProviderIndex(tmp_path / "providers.db")
+    try:
+        index.apply_update(deactivations=["1000000001"])
+        assert [(name, removed) for name, _, _, removed in index.applied_updates()] == [
+            ("deactivations", 0), ("deactivations", 3)]
+    finally:
+        index.close()
+
+
+def test_a_broken_update_changes_nothing(providers, tmp_path):
+    (tmp_path / "bad.csv").write_text("NPI,Whatever\n1000000001,x\n")
+    with pytest.raises(ValueError, match="Not an NPPES file"):
+        providers.apply_update(tmp_path / "bad.csv")
+    assert providers.count() == 3
+    assert providers.applied_updates() == []
+
+
+def test_full_import_clears_applied_updates(providers, tmp_path):
+    providers.apply_update(deactivations=["1000000001"])
+    assert providers.import_nppes(nppes_file(tmp_path / "full.csv", provider("1000000007", "ONLY", "02108"))) == 1
+    assert providers.applied_updates() == []
+    assert providers.count() == 1
+
+
+def test_an_update_failing_midway_is_rolled_back(providers, tmp_path):
+    weekly = nppes_file(tmp_path / "weekly.csv", provider("1000000001", "CHANGED", "02108"))
+    with open(weekly, "a") as f:
+        f.write("1000000002,1,TRUNCATED\n")
+    with pytest.raises(IndexError):
+        providers.apply_update(weekly)
+    assert providers.conn.execute("SELECT last FROM providers WHERE npi = '1000000001'").fetchone()[0] == "NEAR"
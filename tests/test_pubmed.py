@@ -0,0 +1,73 @@
+import gzip
+
+import pytest
+
+from DoctorDork import PubMedIndex
+
+
+def article(pmid, *authors):
+    names = "".join(f"<Author><LastName>{last}</LastName><ForeName>{fore}</ForeName>"
+                    f"<Initials>{fore[:1]}</Initials></Author>" for last, fore in authors)
+    return (f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article><AuthorList>{names}"
+            f"<Author><CollectiveName>Study Group</CollectiveName></Author>"
+            f"</AuthorList></Article></MedlineCitation></PubmedArticle>")
+
+
+def baseline(path, *articles):
+    text = "<PubmedArticleSet>" + "".join(articles) + "</PubmedArticleSet>"
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "wt") as f:
+            f.write(text)
+    else:
+        path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PubMedIndex(tmp_path / "pubmed.db")
+    yield index
+    index.close()
+
+
+def test_ingest_counts_articles_per_author(index, tmp_path):
+    files = tmp_path / "baseline"
+    files.mkdir()
+    baseline(files / "pubmed0001.xml.gz", article(1, ("Doe", "Jane"), ("Smith", "John")), article(2, ("Doe", "Jane")))
+    baseline(files / "pubmed0002.xml", article(3, ("Doe", "J")), article(4, ("Doe", "Jane A")))
+    (files / "notes.txt").write_text("ignored")
+
+    stats = index.ingest([str(files)], workers=1)
+    assert stats == {"files": 2, "articles": 4, "skipped": 0}
+    assert index.lookup("Dr. Jane Doe") == {"count": 3, "pmids": ["1", "2", "4"], "match": "full name"}
+    assert index.lookup("Jake Doe") == {"count": 4, "pmids": ["1", "2", "3", "4"], "match": "initial"}
+    assert index.lookup("Ann Nobody")["count"] == 0
+    assert index.lookup("Doe") is None
+
+
+def test_ingested_files_are_skipped(index, tmp_path):
+    path = baseline(tmp_path / "pubmed0001.xml", article(1, ("Doe", "Jane")))
+    index.ingest([str(path)])
+    assert index.ingest([str(path)]) == {"files": 0, "articles": 0, "skipped": 1}
+    assert index.lookup("Jane Doe")["count"] == 1
+
+
+def test_parallel_ingest_matches_serial(tmp_path):
+    files = [baseline(tmp_path / f"pubmed{n:04d}.xml", article(n, ("Doe", "Jane")), article(n + 100, ("Lee", "Wei")))
+             for n in range(3)]
+    index = PubMedIndex(tmp_path / "parallel.db")
+    try:
+        assert index.ingest([str(path) for path in files], workers=2)["articles"] == 6
+        assert index.lookup("Wei Lee")["count"] == 3
+        assert index.stats()["files"] == 3
+    finally:
+        index.close()
+
+
+def test_publication_enrichment(app, tmp_path):
+    assert app.enrich_publications([{"doctor_name": "Jane Doe"}]) == [None]
+    index = PubMedIndex(app.PUBMED_INDEX_DB)
+    index.ingest([str(baseline(tmp_path / "pubmed0001.xml", article(7, ("Doe", "Jane"))))])
+    index.close()
+    (row,) = app.enrich_publications([{"doctor_name": "Jane Doe"}])
+    assert row == {"PubMed Articles": "1", "Matched On": "full name", "PMIDs": "7"}
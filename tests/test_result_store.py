@@ -0,0 +1,83 @@
+import pytest
+
+from DoctorDork import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    yield store
+    store.close()
+
+
+def test_create_run_registers_every_row(store, roster):
+    run_id = store.create_run(roster, source="roster.csv", version="v1")
+    run = store.get_run(run_id)
+    assert run["total"] == len(roster)
+    assert run["completed"] == 0
+    assert run["status"] == "running"
+    assert [info for _, info in store.pending_rows(run_id)] == roster
+
+
+def test_record_checkpoints_rows(store, roster):
+    run_id = store.create_run(roster)
+    store.record(run_id, [(0, {"contact_search": "a"}), (2, {"contact_search": "c"})])
+    assert store.get_run(run_id)["completed"] == 2
+    assert [i for i, _ in store.pending_rows(run_id)] == [1, 3, 4]
+    assert [(i, results) for i, _, results in store.iter_results(run_id)] == [
+        (0, {"contact_search": "a"}), (2, {"contact_search": "c"})]
+
+
+def test_store_survives_reopening(tmp_path, roster):
+    store = ResultStore(tmp_path / "results.db")
+    run_id = store.create_run(roster)
+    store.record(run_id, [(0, {"x": 1})])
+    store.close()
+    store = ResultStore(tmp_path / "results.db")
+    try:
+        assert store.get_run(run_id)["completed"] == 1
+        assert len(list(store.pending_rows(run_id))) == len(roster) - 1
+    finally:
+        store.close()
+
+
+def test_interrupted_run_resumes_where_it_stopped(app, roster, monkeypatch):
+    app.CHECKPOINT_INTERVAL = 2
+    process_rows = app.process_rows
+    calls = []
+
+    def flaky(rows, enrich=()):
+        calls.append([i for i, _ in rows])
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return process_rows(rows, enrich)
+
+    monkeypatch.setattr(app, "process_rows", flaky)
+    with pytest.raises(KeyboardInterrupt):
+        app.run_batch(roster, source="roster.csv")
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        (run,) = store.list_runs()
+        assert run["status"] == "interrupted"
+        assert run["completed"] == 2
+    finally:
+        store.close()
+
+    calls.clear()
+    monkeypatch.setattr(app, "process_rows", process_rows)
+    assert app.run_batch(run_id=run["run_id"]) == run["run_id"]
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        run = store.get_run(run["run_id"])
+        assert run["status"] == "complete"
+        assert run["completed"] == len(roster)
+        rows = list(store.iter_results(run["run_id"]))
+        assert [i for i, _, _ in rows] == list(range(len(roster)))
+        assert all(results["contact_search"] for _, _, results in rows)
+    finally:
+        store.close()
+
+
+def test_resuming_an_unknown_run_fails(app):
+    with pytest.raises(KeyError):
+        app.run_batch(run_id="nope")
@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+
+import pytest
+
+from DoctorDork import Screen
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+@pytest.fixture
+def typed(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda: "1")
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: os.terminal_size((80, 40)))
+
+
+def test_frames_are_written_in_one_piece_without_a_shell(monkeypatch):
+    monkeypatch.setattr("os.system", lambda command: pytest.fail("spawned a shell"))
+    stream = Terminal()
+    Screen(stream).draw("logo\n", "menu\n")
+    assert stream.getvalue() == "\033[Hlogo\033[K\nmenu\033[K\n\033[J"
+
+
+def test_unchanged_leading_regions_are_not_redrawn(typed):
+    stream = Terminal()
+    screen = Screen(stream)
+    assert screen.draw("logo\n", "menu\n", prompt="> ") == "1"
+    stream.seek(0)
+    stream.truncate()
+    screen.draw("logo\n", "other\n", prompt="> ")
+    assert stream.getvalue() == "\033[2;1Hother\033[K\n\033[J> "
+
+
+def test_output_after_a_frame_forces_a_full_repaint(typed):
+    stream = Terminal()
+    screen = Screen(stream)
+    screen.draw("logo\n", prompt="> ")
+    screen.draw("logo\n", "results\n")
+    stream.seek(0)
+    stream.truncate()
+    screen.draw("logo\n", prompt="> ")
+    assert stream.getvalue().startswith("\033[Hlogo")
+    screen.invalidate()
+    assert not screen.intact
+
+
+def test_pipes_get_plain_text(typed):
+    stream = io.StringIO()
+    Screen(stream).draw("logo\n", "", "menu\n", prompt="> ")
+    assert stream.getvalue() == "logo\nmenu\n> "
+
+
+def test_a_screen_and_its_prints_arrive_in_one_write(monkeypatch):
+    writes = []
+
+    class Counting(Terminal):
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    stream = Counting()
+    monkeypatch.setattr("sys.stdout", sys.stdout)
+    screen = Screen(stream)
+    screen.begin("logo\n")
+    print("Doctor's name:")
+    print("City:")
+    assert writes == []
+    sys.stdout.flush()
+    assert writes == ["\033[Hlogo\033[K\n\033[JDoctor's name:\nCity:\n"]
+    screen.end()
+    assert not isinstance(sys.stdout, Screen.Frame)
+
+
+def test_the_next_draw_closes_the_frame(typed, monkeypatch):
+    stream = Terminal()
+    real = io.StringIO()
+    monkeypatch.setattr("sys.stdout", real)
+    screen = Screen(stream)
+    screen.begin("logo\n")
+    print("results")
+    screen.draw("logo\n", "menu\n", prompt="> ")
+    assert sys.stdout is real
+    assert stream.getvalue() == "\033[Hlogo\033[K\n\033[Jresults\n\033[Hlogo\033[K\nmenu\033[K\n\033[J> "
+    assert real.getvalue() == ""
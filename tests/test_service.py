@@ -0,0 +1,172 @@
+import http.client
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from DoctorDork import SingleFlight, TTLCache
+
+
+def request(address, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(address, timeout=10)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.getheader("Content-Type"), response.read()
+    finally:
+        conn.close()
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1) and cache.get("c") == (True, 3)
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 3, 1, 1)
+    assert stats["hit_ratio"] == 0.75
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl=5)
+    cache.put("a", 1)
+    now[0] += 4.9
+    assert cache.get("a") == (True, 1)
+    now[0] += 0.2
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expired"] == 1 and cache.stats()["size"] == 0
+
+
+def concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def run(i):
+        try:
+            results[i] = target()
+        except BaseException as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_computation():
+    flights, release, calls = SingleFlight(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, results, errors = concurrently(8, lambda: flights.do("key", compute))
+    while flights.stats()["coalesced"] < 7:
+        time.sleep(0.01)
+    assert flights.stats()["in_flight"] == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer"] * 8 and len(calls) == 1
+    assert flights.stats() == {"computations": 1, "coalesced": 7, "in_flight": 0}
+    assert flights.do("key", lambda: "again") == "again"
+
+
+@pytest.mark.parametrize("error", [ValueError("API down"), KeyboardInterrupt()])
+def test_waiters_get_the_leaders_failure(error):
+    flights, release = SingleFlight(), threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise error
+
+    threads, results, errors = concurrently(4, lambda: flights.do("key", compute))
+    while flights.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(e is error for e in errors) and results == [None] * 4
+
+
+def test_lookup_caches_by_raw_query(service):
+    first = service.lookup({"doctor_name": "John Smith", "city": "Boston", "state": "MA"})
+    assert first["results"]["medical_board"][0][0] == "Massachusetts"
+    again = service.lookup({"doctor_name": "  john   SMITH", "city": "boston", "state": "ma"})
+    assert again is first
+    assert service.cache.stats()["hits"] == 1
+    assert service.metrics()["requests"] == 2
+
+
+def test_equivalent_specialties_share_a_cache_entry(service):
+    first = service.lookup({"doctor_name": "Jane Doe", "state": "TX", "specialty": "cardio"})
+    assert service.lookup({"doctor_name": "Jane Doe", "state": "TX", "specialty": "Cardiology"}) is first
+    assert service.key({"specialty": "cardiologist"}, ()) == service.key({"specialty": "Cardiovascular Disease"}, ())
+    assert service.key({"specialty": "banana"}, ()) != service.key({"specialty": "cardio"}, ())
+
+
+def test_failed_enrichment_is_not_cached(service, monkeypatch):
+    outcomes = [{"NPI": None, "Error": "API down"}, {"NPI": "1234567890", "Error": None}]
+    monkeypatch.setattr(service.app, "enrich_npi", lambda doctors: [outcomes.pop(0) for _ in doctors])
+    query = {"doctor_name": "Jane Doe", "state": "TX"}
+    failed = service.lookup(query, ("npi_registry",))
+    assert ["Error", "API down"] in [list(row) for row in failed["results"]["npi_registry"]]
+    assert service.cache.stats()["size"] == 0
+    found = service.lookup(query, ("npi_registry",))
+    assert ["NPI", "1234567890"] in [list(row) for row in found["results"]["npi_registry"]]
+    assert service.lookup(query, ("npi_registry",)) is found
+
+
+def test_override_reloads_clear_the_cache(service):
+    app = service.app
+    query = {"doctor_name": "John Smith", "state": "MA"}
+    service.lookup(query)
+    assert app.watch_platforms is False and app.refresh_platforms() is False
+    app.PLATFORMS_FILE.write_text(json.dumps({"medical_boards": {"MA": {"url": "https://example.org/ma"}}}))
+    os.utime(app.PLATFORMS_FILE, (1_000_000, 1_000_000))
+    deadline = time.monotonic() + 5
+    while service.cache.stats()["size"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert service.lookup(query)["results"]["medical_board"][0][1] == "https://example.org/ma"
+
+
+def test_close_stops_the_watcher(app):
+    from DoctorDork import LookupService
+
+    app.platform_overrides.interval = 0.05
+    service = LookupService(app)
+    service.close()
+    assert not service.watcher.is_alive()
+
+
+def test_http_lookup_and_metrics(server):
+    status, content_type, body = request(server, "GET", "/lookup?doctor_name=John+Smith&state=MA")
+    assert status == 200 and content_type == "application/json"
+    assert json.loads(body)["doctor_info"]["doctor_name"] == "John Smith"
+    status, _, body = request(server, "POST", "/lookup", json.dumps({"doctor_name": "John Smith", "state": "MA"}),
+                              {"Content-Type": "application/json"})
+    assert status == 200
+    metrics = json.loads(request(server, "GET", "/metrics")[2])
+    assert metrics["requests"] == 2 and metrics["cache"]["hits"] == 1
+    status, content_type, body = request(server, "GET", "/metrics?format=prometheus")
+    assert content_type.startswith("text/plain")
+    assert "doctordork_cache_hits 1\n" in body.decode()
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("GET", "/lookup?state=MA", None, 400),
+    ("GET", "/lookup?doctor_name=X&enrich=astrology", None, 400),
+    ("POST", "/lookup", "not json", 400),
+    ("POST", "/lookup", "[1]", 400),
+    ("GET", "/nowhere", None, 404),
+    ("GET", "/health", None, 200),
+])
+def test_http_errors(server, method, path, body, status):
+    assert request(server, method, path, body)[0] == status
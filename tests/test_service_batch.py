@@ -0,0 +1,104 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from DoctorDork import ServiceHandler
+
+
+def post_batch(address, body, path="/batch", headers=None):
+    conn = http.client.HTTPConnection(address, timeout=10)
+    try:
+        conn.request("POST", path, body=body, headers=headers or {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, response.getheader("Content-Type"), response.read().decode()
+    finally:
+        conn.close()
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_batch_streams_ndjson_in_row_order(server, roster):
+    status, content_type, body = post_batch(server, json.dumps({"doctors": roster}))
+    assert status == 200 and content_type == "application/x-ndjson"
+    records = [json.loads(line) for line in body.splitlines()]
+    assert [r["row"] for r in records] == list(range(len(roster)))
+    assert [r["doctor_info"]["doctor_name"] for r in records] == [d["doctor_name"] for d in roster]
+    assert records[0]["results"]["medical_board"][0][0] == "Massachusetts"
+
+
+def test_batch_accepts_an_ndjson_body(server, roster):
+    body = "\n".join(json.dumps(d) for d in roster) + "\n\n"
+    status, _, text = post_batch(server, body, headers={"Content-Type": "application/x-ndjson"})
+    assert status == 200 and len(text.splitlines()) == len(roster)
+
+
+def test_batch_streams_server_sent_events_with_progress(server, roster, monkeypatch):
+    monkeypatch.setattr(ServiceHandler, "STREAM_FLUSH_ROWS", 2)
+    status, content_type, body = post_batch(server, json.dumps(roster), path="/batch?format=sse")
+    assert status == 200 and content_type == "text/event-stream"
+    events = sse_events(body)
+    assert [name for name, _ in events] == ["result", "result", "progress", "result", "result", "progress",
+                                            "result", "progress", "done"]
+    assert [data for name, data in events if name == "progress"] == [
+        {"done": 2, "total": 5}, {"done": 4, "total": 5}, {"done": 5, "total": 5}]
+    assert events[-1] == ("done", {"done": 5, "total": 5})
+
+
+def test_batch_failures_end_the_stream_with_an_error(server, service, roster, monkeypatch):
+    normalize = service.normalize
+
+    def failing(doctor_info):
+        if doctor_info["doctor_name"] == "Maria Garcia":
+            raise RuntimeError("gazetteer unavailable")
+        return normalize(doctor_info)
+
+    monkeypatch.setattr(service.app, "CHECKPOINT_INTERVAL", 2)
+    monkeypatch.setattr(service, "normalize", failing)
+    body = post_batch(server, json.dumps({"doctors": roster}), headers={"Accept": "text/event-stream"})[2]
+    events = sse_events(body)
+    assert [name for name, _ in events] == ["result"] * 2 + ["error"]
+    assert events[-1][1] == {"error": "gazetteer unavailable", "done": 2}
+
+
+@pytest.mark.parametrize("body", ['{"doctors": "nobody"}', '{"doctors": [1]}', '{"doctors": [{}], "enrich": "x"}'])
+def test_bad_batches_are_rejected(server, body):
+    assert post_batch(server, body)[0] == 400
+
+
+def test_stream_batch_yields_chunks_and_counts_rows(service, roster, monkeypatch):
+    monkeypatch.setattr(service.app, "CHECKPOINT_INTERVAL", 2)
+    rows = list(service.stream_batch(roster))
+    assert [row for row, _, _ in rows] == list(range(len(roster)))
+    assert rows[3][1]["state"] == "FL"
+    assert service.metrics()["batches"] == 1 and service.metrics()["batch_rows"] == len(roster)
+
+
+def test_a_stopped_stream_stops_its_producer(service, roster, monkeypatch):
+    monkeypatch.setattr(service.app, "CHECKPOINT_INTERVAL", 1)
+    monkeypatch.setattr(service, "STREAM_QUEUE_CHUNKS", 1)
+    produced = []
+    process_rows = service.app.process_rows
+
+    def counting(rows, enrich):
+        produced.extend(rows)
+        return process_rows(rows, enrich)
+
+    monkeypatch.setattr(service.app, "process_rows", counting)
+    stop = threading.Event()
+    stream = service.stream_batch(roster * 20, stop=stop)
+    assert next(stream)[0] == 0
+    stream.close()
+    assert stop.is_set()
+    time.sleep(0.7)  # longer than the producer's hand-over timeout
+    settled = len(produced)
+    time.sleep(0.6)
+    assert len(produced) == settled < len(roster) * 20
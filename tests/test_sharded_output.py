@@ -0,0 +1,80 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from DoctorDork import ShardedOutput
+
+
+def read(path):
+    return (gzip.open(path, 'rt', encoding='utf-8') if path.suffix == ".gz" else open(path, encoding='utf-8')).read()
+
+
+def rows_of(roster):
+    return [(doctor, {"contact": [("Healthgrades", f"https://hg.example/{n}"), ("Vitals", f"https://vitals.example/{n}")],
+                      "reviews": f"https://www.google.com/search?q={n}"})
+            for n, doctor in enumerate(roster)]
+
+
+def test_unsharded_output_is_a_single_file(tmp_path):
+    out = ShardedOutput(str(tmp_path / "out.jsonl"))
+    out.write("a\n")
+    out.write("b\n")
+    assert out.close() == str(tmp_path / "out.jsonl")
+    assert (tmp_path / "out.jsonl").read_text() == "a\nb\n"
+    assert not (tmp_path / "out.jsonl.manifest.json").exists()
+
+
+def test_empty_output_still_writes_the_header(tmp_path):
+    out = ShardedOutput(str(tmp_path / "out.csv"), compress="gzip", header="h\n")
+    assert out.close() == str(tmp_path / "out.csv.gz")
+    assert read(tmp_path / "out.csv.gz") == "h\n"
+
+
+def test_shards_roll_by_rows_with_a_header_each_and_a_manifest(tmp_path):
+    out = ShardedOutput(str(tmp_path / "out.csv"), shard_rows=2, header="h\n")
+    for n in range(5):
+        out.write(f"{n}\n")
+    manifest = json.loads(open(out.close()).read())
+    assert manifest["rows"] == 5 and manifest["format"] == "csv" and manifest["compression"] is None
+    assert [(s["file"], s["first_row"], s["rows"]) for s in manifest["shards"]] == [
+        ("out-00000.csv", 0, 2), ("out-00001.csv", 2, 2), ("out-00002.csv", 4, 1)]
+    assert [read(tmp_path / s["file"]) for s in manifest["shards"]] == ["h\n0\n1\n", "h\n2\n3\n", "h\n4\n"]
+
+
+def test_shards_roll_by_uncompressed_bytes_at_record_boundaries(tmp_path):
+    out = ShardedOutput(str(tmp_path / "out.jsonl"), compress="gzip", shard_bytes=10)
+    out.write("x" * 25 + "\n", rows=3)  # an oversized record is never split
+    out.write("y\n")
+    out.write("z\n")
+    manifest = json.loads(open(out.close()).read())
+    assert manifest["compression"] == "gzip"
+    assert [(s["file"], s["rows"], s["bytes"]) for s in manifest["shards"]] == [
+        ("out-00000.jsonl.gz", 3, 26), ("out-00001.jsonl.gz", 2, 4)]
+    assert read(tmp_path / "out-00001.jsonl.gz") == "y\nz\n"
+
+
+def test_unknown_compression_is_refused(tmp_path):
+    with pytest.raises(ValueError, match="Unknown compression"):
+        ShardedOutput(str(tmp_path / "out.csv"), compress="bzip2")
+
+
+def test_sharded_compressed_csv_export_keeps_a_doctor_in_one_shard(app, roster, home):
+    written = app.export_batch_results(rows_of(roster), "batch.csv", "csv", compress="gzip", shard_rows=3)
+    assert written == ["batch.csv.manifest.json"]
+    manifest = json.loads(open(written[0]).read())
+    assert manifest["rows"] == 5
+    shards = [list(csv.reader(read(home / s["file"]).splitlines())) for s in manifest["shards"]]
+    assert all(shard[0][0] == "doctor_name" for shard in shards)
+    assert [len(shard) - 1 for shard in shards] == [9, 6]  # three links per doctor
+    assert [row[0] for shard in shards for row in shard[1:]][::3] == [d["doctor_name"] for d in roster]
+
+
+def test_jsonl_export_shards_by_doctor(app, roster, home):
+    written = app.export_batch_results(rows_of(roster), "batch", "jsonl", shard_rows=2)
+    manifest = json.loads(open(written[0]).read())
+    assert [s["rows"] for s in manifest["shards"]] == [2, 2, 1]
+    lines = [json.loads(line) for s in manifest["shards"] for line in read(home / s["file"]).splitlines()]
+    assert [line["doctor_name"] for line in lines] == [d["doctor_name"] for d in roster]
+    assert lines[0]["results"]["reviews"] == "https://www.google.com/search?q=0"
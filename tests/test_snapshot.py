@@ -0,0 +1,135 @@
+import os
+
+from DoctorDork import DoctorDork, Snapshot, build_parser, run_command
+
+
+class Table:
+    LIMIT = 10
+
+    def __init__(self, rows):
+        self.rows = {row: len(row) for row in rows}
+
+    def size(self):
+        return min(len(self.rows), self.LIMIT)
+
+
+def make_class(body):
+    namespace = {}
+    exec(f"class Table:\n{body}", namespace)
+    return namespace["Table"]
+
+
+def test_key_covers_source_constants_names_and_nested_code():
+    base = make_class("    def f(self):\n        return 'a'\n")
+    assert Snapshot.key(base, [1]) == Snapshot.key(make_class("    def f(self):\n        return 'a'\n"), [1])
+    assert Snapshot.key(base, [1]) != Snapshot.key(base, [2])
+    variants = [
+        "    def f(self):\n        return 'b'\n",
+        "    def f(self):\n        return str('a')\n",
+        "    def f(self):\n        def g():\n            return 1\n        return g\n",
+        "    def f(self):\n        def g():\n            return 2\n        return g\n",
+        "    LIMIT = 5\n    def f(self):\n        return 'a'\n",
+        "    @property\n    def f(self):\n        return 'a'\n",
+    ]
+    keys = [Snapshot.key(base, [1])] + [Snapshot.key(make_class(body), [1]) for body in variants]
+    assert len(set(keys) - {keys[0]}) == len(variants) - 1  # a property hashes like its getter
+    assert keys[-1] == keys[0]
+
+
+def test_stable_reprs_ignore_set_order():
+    assert Snapshot.stable({"b", "a"}) == Snapshot.stable({"a", "b"}) == "{'a', 'b'}"
+    assert Snapshot.stable([("x", {1: frozenset({3, 2})})]) == "list(tuple('x', {1: {2, 3}}))"
+
+
+def test_sections_are_stored_once_and_loaded_lazily(tmp_path):
+    path, key = tmp_path / "snap.bin", Snapshot.key(Table, ["a"])
+    built = Snapshot(path).get("table", key, Table, lambda: Table(["a", "bb"]))
+    assert built.size() == 2 and path.exists()
+    snapshot = Snapshot(path)
+    loaded = snapshot.get("table", key, Table, lambda: Table([]))
+    assert loaded.rows == {"a": 1, "bb": 2} and loaded.size() == 2
+    assert snapshot.stats == {"loaded": 1, "rebuilt": 0}
+    assert snapshot.describe()["table"]["key"] == key
+
+
+def test_stale_sections_are_rebuilt_but_not_rewritten(tmp_path):
+    path = tmp_path / "snap.bin"
+    Snapshot(path).get("table", "old", Table, lambda: Table(["a"]))
+    stat = path.stat()
+    snapshot = Snapshot(path)
+    assert snapshot.get("table", "new", Table, lambda: Table(["b"])).rows == {"b": 1}
+    assert snapshot.stale == {"table"} and snapshot.stats["rebuilt"] == 1
+    assert (path.stat().st_mtime_ns, path.stat().st_size) == (stat.st_mtime_ns, stat.st_size)
+    snapshot.put("table", "new", Table(["b"]))
+    assert snapshot.stale == set()
+    assert Snapshot(path).get("table", "new", Table, lambda: Table([])).rows == {"b": 1}
+
+
+def test_other_sections_survive_a_rewrite(tmp_path):
+    path = tmp_path / "snap.bin"
+    first, second = Snapshot(path), Snapshot(path)
+    first.get("one", "k1", Table, lambda: Table(["a"]))
+    second.get("two", "k2", Table, lambda: Table(["b"]))
+    assert sorted(Snapshot(path).describe()) == ["one", "two"]
+
+
+def test_unreadable_snapshots_are_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "snap.bin"
+    path.write_bytes(b"garbage")
+    assert Snapshot(path).sections == {}
+    Snapshot(path).get("table", "k", Table, lambda: Table(["a"]))
+    assert list(Snapshot(path).describe()) == ["table"]
+    monkeypatch.setattr(Snapshot, "environment", classmethod(lambda cls: [0, [2, 7], 0]))
+    snapshot = Snapshot(path)
+    assert snapshot.sections == {}
+    assert snapshot.get("table", "k", Table, lambda: Table(["z"])).rows == {"z": 1}
+
+
+def test_app_starts_from_the_snapshot(app):
+    assert sorted(app.snapshot.describe()) == ["modules", "taxonomy"]
+    again = DoctorDork()
+    assert again.snapshot.stats == {"loaded": 2, "rebuilt": 0}
+    assert again.taxonomy.normalize("cardiologist") == app.taxonomy.normalize("cardiologist")
+    assert again.modules.names() == app.modules.names()
+
+
+def test_snapshot_command_reports_and_rebuilds_stale_sections(app, capsys, monkeypatch):
+    app.snapshot.put("taxonomy", "outdated", app.taxonomy)
+    stale = DoctorDork()
+    assert stale.snapshot.stale == {"taxonomy"}
+    assert not run_command(stale, build_parser().parse_args(["snapshot"]))
+    out = capsys.readouterr().out
+    assert "(stale)" in out and "snapshot --build" in out
+    assert not run_command(stale, build_parser().parse_args(["snapshot", "--build"]))
+    assert "(stale)" not in capsys.readouterr().out
+    assert DoctorDork().snapshot.stats == {"loaded": 2, "rebuilt": 0}
+    assert not run_command(stale, build_parser().parse_args(["snapshot", "--clear"]))
+    assert not app.SNAPSHOT_FILE.exists()
+
+
+def test_gazetteer_import_stores_its_section(app, geonames):
+    assert not run_command(app, build_parser().parse_args(["gazetteer", str(geonames)]))
+    assert "gazetteer" in app.snapshot.describe()
+    again = DoctorDork()
+    assert again.gazetteer() is not None
+    assert again.snapshot.stats["loaded"] == 3 and again.snapshot.stale == set()
+    os.utime(app.GAZETTEER_FILE, (1_000_000, 1_000_000))
+    edited = DoctorDork()
+    assert edited.gazetteer() is not None and edited.snapshot.stale == {"gazetteer"}
+
+
+def test_a_snapshot_that_cant_be_replaced_is_left_alone(home, tmp_path, monkeypatch):
+    path = tmp_path / "snap.bin"
+    Snapshot(path).get("one", "k1", Table, lambda: Table(["a"]))
+    before = path.read_bytes()
+
+    def refuse(src, dst):
+        raise PermissionError("file is mapped by another process")
+
+    monkeypatch.setattr(os, "replace", refuse)
+    snapshot = Snapshot(path)
+    assert snapshot.get("two", "k2", Table, lambda: Table(["b"])).rows == {"b": 1}
+    assert snapshot.get("one", "k1", Table, lambda: Table([])).rows == {"a": 1}
+    assert snapshot.stats == {"loaded": 1, "rebuilt": 1}
+    assert path.read_bytes() == before and not list(tmp_path.glob("*.tmp"))
+    assert DoctorDork().taxonomy.normalize("cardio")["code"] == "207RC0000X"  # startup survives it too
@@ -0,0 +1,80 @@
+import http.client
+import json
+
+import pytest
+
+from DoctorDork import LinkChecker
+from load_test import percentile, platform_urls, synthetic_doctor
+from stub_server import fake_page, parse_statuses
+
+
+def get(address, path, host, method="GET"):
+    conn = http.client.HTTPConnection(address, timeout=10)
+    try:
+        conn.request(method, path, headers={"Host": host})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_parse_statuses():
+    assert parse_statuses(["www.tmb.state.tx.us=403", " * = 429"]) == {"www.tmb.state.tx.us": 403, "*": 429}
+    with pytest.raises(ValueError):
+        parse_statuses(["twitter.com"])
+
+
+def test_pages_are_deterministic_per_host_path_and_revision():
+    assert fake_page("a.gov", "/x") == fake_page("a.gov", "/x")
+    assert fake_page("a.gov", "/x") != fake_page("a.gov", "/y")
+    assert fake_page("a.gov", "/x", revision=1) != fake_page("a.gov", "/x")
+
+
+def test_any_host_is_served_as_a_page(stub):
+    address, _ = stub
+    status, headers, body = get(address, "/Search.aspx", "www.tmb.state.tx.us")
+    assert status == 200 and body == fake_page("www.tmb.state.tx.us", "/Search.aspx")
+    assert headers["ETag"] and headers["Last-Modified"]
+    status, _, body = get(address, "/Search.aspx", "www.tmb.state.tx.us", method="HEAD")
+    assert status == 200 and body == b""
+
+
+def test_statuses_and_redirects_per_host(stub):
+    address, handler = stub
+    handler.statuses = {"blocked.gov": 403, "*": 200}
+    handler.redirects = {"moved.gov": "/new"}
+    assert get(address, "/", "blocked.gov")[0] == 403
+    status, headers, _ = get(address, "/old", "moved.gov")
+    assert status == 301 and headers["Location"] == "/new"
+    assert get(address, "/new", "moved.gov")[0] == 200
+    handler.statuses = {"*": 500}
+    assert get(address, "/", "anything.org")[0] == 500
+
+
+def test_api_answers_like_the_npi_registry(stub):
+    address, _ = stub
+    status, headers, body = get(address, "/api/?first_name=john&last_name=smith&state=ma", address)
+    data = json.loads(body)
+    assert status == 200 and headers["Content-Type"] == "application/json"
+    assert data["result_count"] == len(data["results"])
+    assert all(r["basic"]["last_name"] == "SMITH" for r in data["results"])
+
+
+def test_link_checker_sends_every_host_to_the_override(stub, tmp_path):
+    address, handler = stub
+    handler.statuses = {"www.tmb.state.tx.us": 403, "gone.example.org": 404}
+    checker = LinkChecker(tmp_path / "health.json", timeout=5, host_override=address)
+    records = checker.check_many(["https://www.mass.gov/orgs/board-of-registration-in-medicine",
+                                  "https://www.tmb.state.tx.us/", "https://gone.example.org/page"])
+    assert [r["health"] for r in records.values()] == ["ok", "blocked", "broken"]
+    assert records["https://www.mass.gov/orgs/board-of-registration-in-medicine"]["final_url"] == \
+        "https://www.mass.gov/orgs/board-of-registration-in-medicine"
+
+
+def test_load_test_helpers(app):
+    assert synthetic_doctor(7) == synthetic_doctor(7)
+    assert len({synthetic_doctor(n)["doctor_name"] for n in range(250)}) == 250
+    assert percentile([], 0.5) == 0.0
+    assert [percentile(list(range(1, 101)), f) for f in (0.5, 0.99, 1.0)] == [50, 99, 100]
+    urls = platform_urls(app, 300)
+    assert len(urls) == len(set(urls)) == 300
@@ -0,0 +1,41 @@
+import urllib.parse
+
+import pytest
+
+from DoctorDork import LinkChecker
+
+
+@pytest.mark.parametrize("status, label", [(200, "ok"), (301, "ok"), (403, "blocked"), (429, "blocked"),
+                                           (404, "broken"), (500, "broken"), (None, "down")])
+def test_classify(status, label):
+    assert LinkChecker.classify(status) == label
+
+
+def test_sweep_lists_every_board_with_registry_links(app):
+    sweep = app.sweep_all_states({"doctor_name": "Jane Doe", "state": "TX"})
+    assert {entry["state"] for entry in sweep} == set(app.medical_boards)
+    assert sweep[0]["state"] == "TX"
+    assert [entry["rank"] for entry in sweep] == list(range(1, len(sweep) + 1))
+    assert all(entry["health"] is None for entry in sweep)
+    assert all(url for entry in sweep for _, url in entry["registry_links"])
+
+
+def test_probed_sweep_ranks_by_health(app, stub):
+    address, handler = stub
+    app.config["link_check_host"] = address
+    broken = urllib.parse.urlsplit(app.medical_boards["CA"]["url"]).hostname
+    blocked = urllib.parse.urlsplit(app.medical_boards["NY"]["url"]).hostname
+    handler.statuses = {broken: 404, blocked: 403}
+
+    sweep = app.sweep_all_states({"doctor_name": "Jane Doe", "state": "TX"}, probe=True, workers=8)
+    labels = [entry["health"]["health"] for entry in sweep]
+    assert sweep[0]["state"] == "TX"
+    by_state = {entry["state"]: entry for entry in sweep}
+    assert by_state["CA"]["health"]["health"] == "broken"
+    assert by_state["NY"]["health"]["health"] == "blocked"
+    rest = labels[1:]
+    assert rest == sorted(rest, key=app.HEALTH_RANK.get)
+
+    # The records are kept, so a later sweep ranks without probing
+    again = app.sweep_all_states({"doctor_name": "Jane Doe", "state": "TX"})
+    assert [entry["state"] for entry in again] == [entry["state"] for entry in sweep]
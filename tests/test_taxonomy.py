@@ -0,0 +1,94 @@
+import pickle
+
+import pytest
+
+from DoctorDork import NUCC_TAXONOMY, ResultStore, TaxonomyIndex, build_parser, roster_columns, run_command
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return TaxonomyIndex(NUCC_TAXONOMY)
+
+
+@pytest.mark.parametrize("text, code", [
+    ("Cardiology", "207RC0000X"),
+    ("cardiologist", "207RC0000X"),
+    ("Dr. Dermatologist", "207N00000X"),
+    ("Family Practice", "207Q00000X"),
+    ("207Q00000X", "207Q00000X"),
+    ("OB/GYN", "207V00000X"),
+    ("interventional cardiology", "207RI0011X"),
+    ("pediatric cardiologist", "2080P0204X"),
+    ("peds", "208000000X"),
+    ("sports med", "207QS0010X"),
+])
+def test_free_text_maps_to_nucc_codes(taxonomy, text, code):
+    assert taxonomy.normalize(text)["code"] == code
+
+
+@pytest.mark.parametrize("text", ["", "   ", "banana", "physician"])
+def test_unrecognised_text_has_no_code(taxonomy, text):
+    assert taxonomy.normalize(text) is None
+
+
+def test_results_are_memoized_but_not_pickled(taxonomy):
+    taxonomy.normalize("cardiologist")
+    assert "cardiologist" in taxonomy._memo
+    copy = pickle.loads(pickle.dumps(taxonomy))
+    assert copy._memo == {}
+    assert copy.normalize("cardiologist") == taxonomy.normalize("cardiologist")
+
+
+def test_specialty_is_kept_as_typed(app):
+    row = app.normalize_specialty({"doctor_name": "Jane Doe", "specialty": "cardiologist"})
+    assert row["specialty"] == "cardiologist"
+    assert (row["taxonomy_name"], row["taxonomy_code"]) == ("Cardiology", "207RC0000X")
+    assert "taxonomy_code" not in app.normalize_specialty({"specialty": "banana"})
+
+
+def test_equivalent_specialties_build_the_same_searches(app):
+    links = [app.generate_links(app.normalize_specialty({"doctor_name": "Jane Doe", "city": "Austin", "state": "TX",
+                                                         "specialty": specialty}))
+             for specialty in ("cardio", "Cardiology", "Cardiovascular Disease")]
+    assert links[0] == links[1] == links[2]
+    assert "%22Cardiology%22" in links[0]["contact_search"]
+    assert dict(links[0]["social_media"])["LinkedIn"].endswith("+Cardiology")
+    assert "banana" in app.generate_links(app.normalize_specialty(
+        {"doctor_name": "Jane Doe", "city": "Austin", "state": "TX", "specialty": "banana"}))["contact_search"]
+
+
+def test_bulk_generation_searches_by_the_canonical_name(app):
+    doctors = [app.normalize_specialty({"doctor_name": "Jane Doe", "city": "Austin", "state": "TX",
+                                        "specialty": specialty}) for specialty in ("cardio", "Cardiology")]
+    columns = app.bulk_generate(roster_columns(doctors))
+    assert columns["specialty"] == ["cardio", "Cardiology"]
+    assert columns["contact_search"][0] == columns["contact_search"][1] == \
+        app.generate_links(doctors[0])["contact_search"]
+
+
+def test_batch_rows_with_equivalent_specialties_share_one_generation(app, monkeypatch):
+    calls = []
+    generate_links = app.generate_links
+    monkeypatch.setattr(app, "generate_links", lambda info: calls.append(info["specialty"]) or generate_links(info))
+    rows = [(n, app.normalize_specialty({"doctor_name": "Jane Doe", "city": "Austin", "state": "TX",
+                                         "specialty": specialty}))
+            for n, specialty in enumerate(["cardio", "Cardiology", "banana", " Banana"])]
+    results = app.process_rows(rows)
+    assert calls == ["cardio", "banana"]
+    assert results[0][1] == results[1][1] and results[2][1] == results[3][1]
+
+
+def test_batch_rows_carry_the_taxonomy(app, roster):
+    run_id = app.run_batch([dict(doctor) for doctor in roster])
+    store = ResultStore(app.RESULTS_DB)
+    try:
+        rows = [info for _, info, _ in store.iter_results(run_id)]
+    finally:
+        store.close()
+    assert [row["specialty"] for row in rows] == [doctor["specialty"] for doctor in roster]
+    assert rows[0]["taxonomy_code"] == "207RC0000X"
+
+
+def test_taxonomy_command(app, capsys):
+    assert not run_command(app, build_parser().parse_args(["taxonomy", "pediatric", "cardiologist"]))
+    assert "2080P0204X" in capsys.readouterr().out